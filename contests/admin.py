@@ -1,6 +1,44 @@
 from django.contrib import admin
 from .models import Contest, ContestProblem, ContestRegistration
+from . import scoreboard
+
+
+@admin.register(Contest)
+class ContestAdmin(admin.ModelAdmin):
+    list_display = ('title', 'start_time', 'end_time', 'is_public')
+    readonly_fields = ('scoreboard_version',)
+    actions = ['rejudge_submissions', 'rebuild_scoreboard']
+
+    # Fields the scoreboard is computed from.
+    SCOREBOARD_FIELDS = ('start_time', 'end_time', 'penalty_minutes', 'freeze_minutes')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and any(field in form.changed_data for field in self.SCOREBOARD_FIELDS):
+            scoreboard.rebuild(obj)
+
+    @admin.action(description='Rebuild scoreboard from submissions')
+    def rebuild_scoreboard(self, request, queryset):
+        for contest in queryset:
+            entries = scoreboard.rebuild(contest)
+            self.message_user(request, f'Rebuilt the scoreboard of {contest.title}: {entries} participant(s).')
+
+    @admin.action(description='Rejudge contest submissions')
+    def rejudge_submissions(self, request, queryset):
+        from submissions import rejudge
+        from submissions.models import Submission
+
+        for contest in queryset:
+            job = rejudge.start(
+                Submission.objects.filter(
+                    problem__contestproblem__contest=contest,
+                    submitted_at__range=(contest.start_time, contest.end_time),
+                ).distinct(),
+                description=f'contest {contest.title}',
+                user=request.user,
+            )
+            self.message_user(request, f'Started rejudge job {job.id} for {job.total} submission(s).')
+
 
-admin.site.register(Contest)
 admin.site.register(ContestProblem)
 admin.site.register(ContestRegistration)
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contests', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contest',
+            name='freeze_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='contest',
+            name='penalty_minutes',
+            field=models.PositiveIntegerField(default=20),
+        ),
+        migrations.AddField(
+            model_name='contest',
+            name='scoreboard_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ScoreboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solved', models.PositiveIntegerField(default=0)),
+                ('penalty', models.PositiveIntegerField(default=0)),
+                ('public_solved', models.PositiveIntegerField(default=0)),
+                ('public_penalty', models.PositiveIntegerField(default=0)),
+                ('cells', models.JSONField(default=dict)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scoreboard', to='contests.contest')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['contest', '-solved', 'penalty', 'user'], name='scoreboard_live_rank'), models.Index(fields=['contest', '-public_solved', 'public_penalty', 'user'], name='scoreboard_public_rank')],
+                'constraints': [models.UniqueConstraint(fields=('contest', 'user'), name='unique_scoreboard_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contests', '0002_scoreboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contest',
+            index=models.Index(fields=['start_time'], name='contests_co_start_t_2c1630_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contest',
+            index=models.Index(fields=['end_time'], name='contests_co_end_tim_806786_idx'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import migrations
+from django.db.models import F
+
+# Frozen copy of the rules in contests.scoreboard as of this migration.
+NOT_COUNTED = ("PENDING", "CE")
+
+
+def _freeze_start(contest):
+    if not contest.freeze_minutes:
+        return None
+    return max(contest.start_time, contest.end_time - timedelta(minutes=contest.freeze_minutes))
+
+
+def _cell(contest, attempts):
+    frozen_from = _freeze_start(contest)
+    cell = {"tries": 0, "public_tries": 0, "pending": 0, "solved_at": None}
+    for verdict, submitted_at in attempts:
+        if frozen_from is not None and submitted_at >= frozen_from:
+            cell["pending"] += 1
+        if verdict == "AC":
+            cell["solved_at"] = int((submitted_at - contest.start_time).total_seconds())
+            break
+        cell["tries"] += 1
+        if frozen_from is None or submitted_at < frozen_from:
+            cell["public_tries"] += 1
+    return cell
+
+
+def _totals(contest, entry):
+    frozen_from = _freeze_start(contest)
+    public_until = (frozen_from - contest.start_time).total_seconds() if frozen_from else None
+    for cell in entry.cells.values():
+        if cell["solved_at"] is None:
+            continue
+        penalty = cell["solved_at"] // 60 + contest.penalty_minutes * cell["tries"]
+        entry.solved += 1
+        entry.penalty += penalty
+        if public_until is None or cell["solved_at"] < public_until:
+            entry.public_solved += 1
+            entry.public_penalty += penalty
+
+
+def rebuild_scoreboards(apps, schema_editor):
+    # Contests that started before scoreboards were kept, including any
+    # running now, would otherwise only list users judged since the deploy.
+    Contest = apps.get_model('contests', 'Contest')
+    ContestProblem = apps.get_model('contests', 'ContestProblem')
+    ScoreboardEntry = apps.get_model('contests', 'ScoreboardEntry')
+    Submission = apps.get_model('submissions', 'Submission')
+
+    for contest in Contest.objects.all():
+        labels = dict(ContestProblem.objects.filter(contest=contest).values_list('problem_id', 'label'))
+        rows = (
+            Submission.objects.filter(
+                submitted_at__gte=contest.start_time,
+                submitted_at__lte=contest.end_time,
+                problem_id__in=labels,
+            )
+            .exclude(verdict__in=NOT_COUNTED)
+            .order_by('user_id', 'problem_id', 'submitted_at', 'id')
+            .values_list('user_id', 'problem_id', 'verdict', 'submitted_at')
+        )
+        entries = {}
+        for (user_id, problem_id), attempts in groupby(rows.iterator(), key=lambda row: row[:2]):
+            cell = _cell(contest, ((verdict, at) for _, _, verdict, at in attempts))
+            entry = entries.setdefault(user_id, ScoreboardEntry(contest=contest, user_id=user_id, cells={}))
+            entry.cells[labels[problem_id]] = cell
+        for entry in entries.values():
+            _totals(contest, entry)
+
+        ScoreboardEntry.objects.filter(contest=contest).delete()
+        ScoreboardEntry.objects.bulk_create(entries.values(), batch_size=1000)
+        Contest.objects.filter(id=contest.id).update(scoreboard_version=F('scoreboard_version') + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contests', '0003_contest_time_indexes'),
+        # Everything read from Submission exists as of this one.
+        ('submissions', '0003_alter_submission_options_alter_submission_language_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_scoreboards, migrations.RunPython.noop),
+    ]
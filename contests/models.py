@@ -1,7 +1,13 @@
 from django.db import models
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from problems.models import Problem
 
+# Bumped whenever a contest changes; part of the cached list's key.
+LIST_VERSION_KEY = "contests:list:version"
+
 class Contest(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -9,10 +15,28 @@ class Contest(models.Model):
     end_time = models.DateTimeField()
     is_public = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # ICPC rules: minutes added per wrong attempt on a solved problem, and
+    # how long before the end the public scoreboard stops changing.
+    penalty_minutes = models.PositiveIntegerField(default=20)
+    freeze_minutes = models.PositiveIntegerField(default=0)
+    # Bumped on every scoreboard change; see contests.scoreboard.
+    scoreboard_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_time']),
+            models.Index(fields=['end_time']),
+        ]
 
     def __str__(self):
         return self.title
 
+
+@receiver([post_save, post_delete], sender=Contest)
+def invalidate_contest_list(sender, **kwargs):
+    cache.add(LIST_VERSION_KEY, 0, timeout=None)
+    cache.incr(LIST_VERSION_KEY)
+
 class ContestProblem(models.Model):
     contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='contest_problems')
     problem = models.ForeignKey(Problem, on_delete=models.CASCADE)
@@ -27,3 +51,32 @@ class ContestRegistration(models.Model):
 
     class Meta:
         unique_together = ('contest', 'user')
+
+
+class ScoreboardEntry(models.Model):
+    """
+    One participant's row of a contest scoreboard, kept current by
+    contests.scoreboard.
+
+    ``cells`` maps problem labels to ``{"tries", "public_tries", "pending",
+    "solved_at"}``: wrong attempts before the first AC, those of them made
+    before the freeze, attempts made during the freeze, and seconds from
+    the start to the first AC (or null). The totals come in a live and a
+    public (as of the freeze) flavour so both can be ranked by the database.
+    """
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE, related_name='scoreboard')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    solved = models.PositiveIntegerField(default=0)
+    penalty = models.PositiveIntegerField(default=0)
+    public_solved = models.PositiveIntegerField(default=0)
+    public_penalty = models.PositiveIntegerField(default=0)
+    cells = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['contest', 'user'], name='unique_scoreboard_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['contest', '-solved', 'penalty', 'user'], name='scoreboard_live_rank'),
+            models.Index(fields=['contest', '-public_solved', 'public_penalty', 'user'], name='scoreboard_public_rank'),
+        ]
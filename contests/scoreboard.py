@@ -0,0 +1,226 @@
+"""
+Live contest scoreboards under ICPC rules.
+
+Each participant has a ``ScoreboardEntry`` holding one cell per problem.
+Whenever a submission to a running contest is judged, ``record`` recomputes
+the author's cell for that problem from their submissions within the
+contest window. That is a handful of rows, and recomputing rather than
+adding up makes retries and rejudges harmless. The entry's totals follow
+from its cells:
+
+- ``solved``: problems with an AC.
+- ``penalty``: for each solved problem, the minutes from the start to the
+  first AC plus ``penalty_minutes`` per earlier wrong attempt. Compilation
+  errors don't count as attempts.
+
+The last ``freeze_minutes`` of a contest are frozen. Everyone but staff
+sees the standings as they were when the freeze began, with attempts made
+since then shown as pending, until the contest ends. Entries carry public
+totals for that, so both orderings come straight from an index.
+
+Every change bumps ``Contest.scoreboard_version``. Rendered pages are
+cached per version and served with that version as their ETag, so the
+crowd refreshing a live scoreboard costs one query per change rather than
+one per request. The table is the durable copy; ``rebuild`` recomputes it
+from the submissions, e.g. after changing a contest's rules.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+
+from submissions.models import Submission
+
+from .models import Contest, ContestProblem, ScoreboardEntry
+
+# Verdicts that neither solve a problem nor cost penalty time.
+NOT_COUNTED = ("PENDING", "CE")
+
+
+def freeze_start(contest):
+    if not contest.freeze_minutes:
+        return None
+    return max(contest.start_time, contest.end_time - timedelta(minutes=contest.freeze_minutes))
+
+
+def is_frozen(contest, at):
+    start = freeze_start(contest)
+    return start is not None and start <= at < contest.end_time
+
+
+def _window(contest):
+    return Submission.objects.filter(
+        submitted_at__gte=contest.start_time,
+        submitted_at__lte=contest.end_time,
+    ).exclude(verdict__in=NOT_COUNTED)
+
+
+def _cell(contest, attempts):
+    """Fold ``(verdict, submitted_at)`` pairs, oldest first, into a cell."""
+    frozen_from = freeze_start(contest)
+    cell = {"tries": 0, "public_tries": 0, "pending": 0, "solved_at": None}
+    for verdict, submitted_at in attempts:
+        if frozen_from is not None and submitted_at >= frozen_from:
+            cell["pending"] += 1
+        if verdict == "AC":
+            cell["solved_at"] = int((submitted_at - contest.start_time).total_seconds())
+            break
+        cell["tries"] += 1
+        if frozen_from is None or submitted_at < frozen_from:
+            cell["public_tries"] += 1
+    return cell
+
+
+def _totals(contest, entry):
+    frozen_from = freeze_start(contest)
+    public_until = (frozen_from - contest.start_time).total_seconds() if frozen_from else None
+    entry.solved = entry.penalty = entry.public_solved = entry.public_penalty = 0
+    for cell in entry.cells.values():
+        if cell["solved_at"] is None:
+            continue
+        penalty = cell["solved_at"] // 60 + contest.penalty_minutes * cell["tries"]
+        entry.solved += 1
+        entry.penalty += penalty
+        if public_until is None or cell["solved_at"] < public_until:
+            entry.public_solved += 1
+            entry.public_penalty += penalty
+
+
+def record(submission):
+    """Bring the scoreboards of every contest ``submission`` counts for up to date."""
+    contest_problems = ContestProblem.objects.filter(
+        problem_id=submission.problem_id,
+        contest__start_time__lte=submission.submitted_at,
+        contest__end_time__gte=submission.submitted_at,
+    ).select_related("contest")
+    for contest_problem in contest_problems:
+        update(contest_problem, submission.user_id)
+
+
+def update(contest_problem, user_id):
+    contest = contest_problem.contest
+    attempts = (
+        _window(contest)
+        .filter(user_id=user_id, problem_id=contest_problem.problem_id)
+        .order_by("submitted_at", "id")
+        .values_list("verdict", "submitted_at")
+    )
+    with transaction.atomic():
+        # Lock the entry before reading the attempts: a worker that read them
+        # first could otherwise write back a cell older than another's.
+        entry, created = ScoreboardEntry.objects.select_for_update().get_or_create(
+            contest=contest, user_id=user_id,
+        )
+        cell = _cell(contest, attempts)
+        if created and not cell["tries"] and cell["solved_at"] is None:
+            # Nothing counted yet; don't list them.
+            transaction.set_rollback(True)
+            return
+        if entry.cells.get(contest_problem.label) == cell:
+            return
+        entry.cells[contest_problem.label] = cell
+        _totals(contest, entry)
+        entry.save()
+        Contest.objects.filter(id=contest.id).update(scoreboard_version=F("scoreboard_version") + 1)
+
+
+def rebuild(contest):
+    """Recompute ``contest``'s whole scoreboard from its submissions."""
+    labels = dict(ContestProblem.objects.filter(contest=contest).values_list("problem_id", "label"))
+    rows = (
+        _window(contest)
+        .filter(problem_id__in=labels)
+        .order_by("user_id", "problem_id", "submitted_at", "id")
+        .values_list("user_id", "problem_id", "verdict", "submitted_at")
+    )
+    entries = {}
+    for (user_id, problem_id), attempts in groupby(rows.iterator(), key=lambda row: row[:2]):
+        cell = _cell(contest, ((verdict, at) for _, _, verdict, at in attempts))
+        entry = entries.setdefault(user_id, ScoreboardEntry(contest=contest, user_id=user_id, cells={}))
+        entry.cells[labels[problem_id]] = cell
+    for entry in entries.values():
+        _totals(contest, entry)
+
+    with transaction.atomic():
+        ScoreboardEntry.objects.filter(contest=contest).delete()
+        ScoreboardEntry.objects.bulk_create(entries.values(), batch_size=1000)
+        Contest.objects.filter(id=contest.id).update(scoreboard_version=F("scoreboard_version") + 1)
+    return len(entries)
+
+
+def _public_cell(cell, public_until):
+    solved = cell["solved_at"] is not None and (public_until is None or cell["solved_at"] < public_until)
+    return {
+        "solved": solved,
+        "tries": cell["public_tries"],
+        "time": cell["solved_at"] // 60 if solved else None,
+        "pending": cell["pending"],
+    }
+
+
+def _live_cell(cell):
+    solved = cell["solved_at"] is not None
+    return {
+        "solved": solved,
+        "tries": cell["tries"],
+        "time": cell["solved_at"] // 60 if solved else None,
+        "pending": 0,
+    }
+
+
+def _standings(contest, live, offset, limit):
+    solved, penalty = ("solved", "penalty") if live else ("public_solved", "public_penalty")
+    entries = ScoreboardEntry.objects.filter(contest=contest)
+    total = entries.count()
+    rows = list(entries.select_related("user").order_by(f"-{solved}", penalty, "user_id")[offset:offset + limit])
+
+    labels = sorted(ContestProblem.objects.filter(contest=contest).values_list("label", flat=True))
+    frozen_from = freeze_start(contest)
+    public_until = (frozen_from - contest.start_time).total_seconds() if frozen_from else None
+
+    results = []
+    rank = previous = None
+    for index, entry in enumerate(rows):
+        key = (getattr(entry, solved), getattr(entry, penalty))
+        if index == 0:
+            # Ties share a rank, so count everyone strictly ahead.
+            rank = entries.filter(
+                Q(**{f"{solved}__gt": key[0]}) | Q(**{solved: key[0], f"{penalty}__lt": key[1]})
+            ).count() + 1
+        elif key != previous:
+            rank = offset + index + 1
+        previous = key
+        cells = {}
+        for label in labels:
+            cell = entry.cells.get(label)
+            if cell is not None:
+                cells[label] = _live_cell(cell) if live else _public_cell(cell, public_until)
+        results.append({
+            "rank": rank,
+            "user_id": entry.user_id,
+            "username": entry.user.username,
+            "solved": key[0],
+            "penalty": key[1],
+            "cells": cells,
+        })
+    return {"count": total, "problems": labels, "results": results}
+
+
+def snapshot(contest, live, page, page_size):
+    """One page of the standings at ``contest``'s current version, cached."""
+    view = "live" if live else "public"
+    key = f"scoreboard:{contest.id}:{contest.scoreboard_version}:{view}:{page}:{page_size}"
+    data = cache.get(key)
+    if data is None:
+        data = {
+            "version": contest.scoreboard_version,
+            "frozen": not live,
+            "page": page,
+            "page_size": page_size,
+            **_standings(contest, live, (page - 1) * page_size, page_size),
+        }
+        cache.set(key, data, timeout=settings.CONTEST_SCOREBOARD_TTL)
+    return data
@@ -13,10 +13,8 @@ class ContestSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'start_time', 'end_time', 'is_public', 'created_at', 'is_registered']
 
     def get_is_registered(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return ContestRegistration.objects.filter(user=user, contest=obj).exists()
-        return False
+        # Annotated by ContestListView in the same query as the contests.
+        return getattr(obj, 'is_registered', False)
 
 
 
@@ -29,7 +27,7 @@ class ContestRegistrationSerializer(serializers.ModelSerializer):
 class ProblemSerializer(serializers.ModelSerializer):
     class Meta:
         model = Problem
-        fields = '__all__'
+        exclude = ['test_manifest', 'tag_index']
 
 class ContestProblemSerializer(serializers.ModelSerializer):
     problem = ProblemSerializer()
@@ -1,3 +1,251 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from problems.models import Problem
+from submissions.models import Submission
+
+from . import scoreboard
+from .models import Contest, ContestProblem, ContestRegistration, ScoreboardEntry
+from .views import ContestListView
+
+START = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+
+# Tests must not need Redis.
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _contest(**fields):
+    """A two-hour contest starting at START."""
+    return Contest(title="Round", start_time=START, end_time=START + timedelta(hours=2), **fields)
+
+
+def _at(minutes, seconds=0):
+    return START + timedelta(minutes=minutes, seconds=seconds)
+
+
+class CellTests(SimpleTestCase):
+    def test_wrong_attempts_before_the_first_ac(self):
+        cell = scoreboard._cell(_contest(), [("WA", _at(5)), ("TLE", _at(10)), ("AC", _at(30, 15)), ("WA", _at(40))])
+        self.assertEqual(cell, {"tries": 2, "public_tries": 2, "pending": 0, "solved_at": 1815})
+
+    def test_unsolved(self):
+        cell = scoreboard._cell(_contest(), [("WA", _at(5)), ("RE", _at(6))])
+        self.assertEqual(cell, {"tries": 2, "public_tries": 2, "pending": 0, "solved_at": None})
+
+    def test_attempts_during_the_freeze_are_pending(self):
+        contest = _contest(freeze_minutes=30)
+        cell = scoreboard._cell(contest, [("WA", _at(80)), ("WA", _at(95)), ("AC", _at(100)), ("WA", _at(110))])
+        self.assertEqual(cell, {"tries": 2, "public_tries": 1, "pending": 2, "solved_at": 6000})
+
+    def test_freeze_longer_than_the_contest(self):
+        contest = _contest(freeze_minutes=500)
+        self.assertEqual(scoreboard.freeze_start(contest), START)
+        cell = scoreboard._cell(contest, [("WA", _at(1)), ("AC", _at(2))])
+        self.assertEqual(cell, {"tries": 1, "public_tries": 0, "pending": 2, "solved_at": 120})
+
+    def test_is_frozen(self):
+        contest = _contest(freeze_minutes=30)
+        self.assertFalse(scoreboard.is_frozen(contest, _at(89)))
+        self.assertTrue(scoreboard.is_frozen(contest, _at(90)))
+        self.assertFalse(scoreboard.is_frozen(contest, _at(120)))
+        self.assertFalse(scoreboard.is_frozen(_contest(), _at(100)))
+
+
+class TotalsTests(SimpleTestCase):
+    def totals(self, contest, cells):
+        entry = ScoreboardEntry(contest=contest, cells=cells)
+        scoreboard._totals(contest, entry)
+        return entry.solved, entry.penalty, entry.public_solved, entry.public_penalty
+
+    def test_penalty_is_minutes_plus_wrong_attempts(self):
+        cells = {
+            # 30 minutes plus two wrong attempts.
+            "A": {"tries": 2, "public_tries": 2, "pending": 0, "solved_at": 1815},
+            # Seconds are dropped: 59 minutes.
+            "B": {"tries": 0, "public_tries": 0, "pending": 0, "solved_at": 3599},
+            # Wrong attempts on unsolved problems cost nothing.
+            "C": {"tries": 5, "public_tries": 5, "pending": 0, "solved_at": None},
+        }
+        self.assertEqual(self.totals(_contest(), cells), (2, 129, 2, 129))
+        self.assertEqual(self.totals(_contest(penalty_minutes=10), cells), (2, 109, 2, 109))
+
+    def test_solves_during_the_freeze_stay_hidden(self):
+        cells = {
+            "A": {"tries": 1, "public_tries": 1, "pending": 0, "solved_at": 1800},
+            "B": {"tries": 2, "public_tries": 1, "pending": 2, "solved_at": 6000},
+        }
+        self.assertEqual(self.totals(_contest(freeze_minutes=30), cells), (2, 190, 1, 50))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ScoreboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.alice, cls.bob = (User.objects.create_user(name) for name in ("alice", "bob"))
+        cls.contest = _contest(freeze_minutes=30)
+        cls.contest.save()
+        cls.problem = Problem.objects.create(code="a", name="A", difficulty="Easy")
+        cls.contest_problem = ContestProblem.objects.create(contest=cls.contest, problem=cls.problem, label="A")
+
+    def submit(self, user, verdict, minutes):
+        submission = Submission.objects.create(user=user, problem=self.problem, code="", language="python", verdict=verdict)
+        Submission.objects.filter(id=submission.id).update(submitted_at=_at(minutes))
+        submission.refresh_from_db()
+        scoreboard.record(submission)
+        return submission
+
+    def test_record_keeps_the_entry_current(self):
+        self.submit(self.alice, "WA", 10)
+        self.submit(self.alice, "CE", 12)
+        self.submit(self.alice, "AC", 20)
+        entry = ScoreboardEntry.objects.get(contest=self.contest, user=self.alice)
+        self.assertEqual(entry.cells["A"], {"tries": 1, "public_tries": 1, "pending": 0, "solved_at": 1200})
+        self.assertEqual((entry.solved, entry.penalty), (1, 40))
+
+    def test_nothing_counted_lists_nobody(self):
+        self.submit(self.alice, "CE", 10)
+        self.submit(self.alice, "PENDING", 11)
+        self.assertFalse(ScoreboardEntry.objects.exists())
+
+    def test_submissions_outside_the_contest_are_ignored(self):
+        self.submit(self.alice, "AC", -5)
+        self.submit(self.alice, "AC", 125)
+        self.assertFalse(ScoreboardEntry.objects.exists())
+
+    def test_rejudge_recomputes_the_cell(self):
+        submission = self.submit(self.alice, "AC", 20)
+        Submission.objects.filter(id=submission.id).update(verdict="WA")
+        scoreboard.record(submission)
+        entry = ScoreboardEntry.objects.get(contest=self.contest, user=self.alice)
+        self.assertEqual(entry.cells["A"]["solved_at"], None)
+        self.assertEqual((entry.solved, entry.penalty), (0, 0))
+
+    def test_public_standings_are_frozen(self):
+        self.submit(self.alice, "AC", 50)
+        self.submit(self.bob, "WA", 40)
+        self.submit(self.bob, "AC", 95)
+        self.contest.refresh_from_db()
+
+        public = scoreboard.snapshot(self.contest, live=False, page=1, page_size=10)
+        self.assertEqual(
+            [(row["rank"], row["username"], row["solved"], row["penalty"]) for row in public["results"]],
+            [(1, "alice", 1, 50), (2, "bob", 0, 0)],
+        )
+        self.assertEqual(public["results"][1]["cells"]["A"], {"solved": False, "tries": 1, "time": None, "pending": 1})
+
+        live = scoreboard.snapshot(self.contest, live=True, page=1, page_size=10)
+        self.assertEqual(
+            [(row["rank"], row["username"], row["solved"], row["penalty"]) for row in live["results"]],
+            [(1, "alice", 1, 50), (2, "bob", 1, 115)],
+        )
+        self.assertEqual(live["results"][1]["cells"]["A"], {"solved": True, "tries": 1, "time": 95, "pending": 0})
+
+    def test_ties_share_a_rank(self):
+        self.submit(self.alice, "AC", 30)
+        self.submit(self.bob, "AC", 30)
+        self.contest.refresh_from_db()
+        live = scoreboard.snapshot(self.contest, live=True, page=2, page_size=1)
+        self.assertEqual([(row["rank"], row["username"]) for row in live["results"]], [(1, "bob")])
+
+    def test_rebuild_matches_record(self):
+        self.submit(self.alice, "WA", 10)
+        self.submit(self.alice, "AC", 100)
+        self.submit(self.bob, "RE", 20)
+        fields = ("user_id", "cells", "solved", "penalty", "public_solved", "public_penalty")
+        before = list(ScoreboardEntry.objects.order_by("user_id").values(*fields))
+        self.assertEqual(scoreboard.rebuild(self.contest), 2)
+        self.assertEqual(list(ScoreboardEntry.objects.order_by("user_id").values(*fields)), before)
+
+
+@override_settings(CACHES=LOCAL_CACHES, CONTEST_LIST_TTL=300)
+class ContestListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        current = now()
+        cls.alice = get_user_model().objects.create_user("alice")
+        cls.upcoming = Contest.objects.create(
+            title="Upcoming", start_time=current + timedelta(days=1), end_time=current + timedelta(days=1, hours=2),
+        )
+        cls.running = Contest.objects.create(
+            title="Running", start_time=current - timedelta(hours=1), end_time=current + timedelta(hours=1),
+        )
+        cls.past = Contest.objects.create(
+            title="Past", start_time=current - timedelta(days=1), end_time=current - timedelta(days=1) + timedelta(hours=2),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def titles(self, client, **query):
+        response = client.get("/api/contests/", query)
+        self.assertEqual(response.status_code, 200)
+        return [(contest["title"], contest["is_registered"]) for contest in response.json()["results"]]
+
+    def as_alice(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        return client
+
+    def test_status_filters(self):
+        self.assertEqual(
+            self.titles(self.client),
+            [("Upcoming", False), ("Running", False), ("Past", False)],
+        )
+        self.assertEqual(self.titles(self.client, status="upcoming"), [("Upcoming", False)])
+        self.assertEqual(self.titles(self.client, status="running"), [("Running", False)])
+        self.assertEqual(self.titles(self.client, status="past"), [("Past", False)])
+
+    def test_anonymous_list_is_cached_until_a_contest_changes(self):
+        self.assertEqual(self.titles(self.client, status="running"), [("Running", False)])
+        # Bypasses the signal, so the cached page is still served.
+        Contest.objects.filter(id=self.running.id).update(title="Renamed")
+        self.assertEqual(self.titles(self.client, status="running"), [("Running", False)])
+
+        self.running.title = "Final"
+        self.running.save()
+        self.assertEqual(self.titles(self.client, status="running"), [("Final", False)])
+
+        Contest.objects.create(title="Late", start_time=now() - timedelta(minutes=5), end_time=now() + timedelta(hours=3))
+        self.assertEqual(self.titles(self.client, status="running"), [("Final", False), ("Late", False)])
+
+    def test_cache_expires_when_the_next_contest_starts(self):
+        Contest.objects.filter(id=self.upcoming.id).update(start_time=now() + timedelta(seconds=30))
+        self.assertLessEqual(ContestListView.cache_timeout(), 31)
+        Contest.objects.filter(id=self.upcoming.id).update(start_time=now() + timedelta(hours=5))
+        self.assertEqual(ContestListView.cache_timeout(), 300)
+
+    def test_is_registered_is_per_user(self):
+        alice = self.as_alice()
+        self.assertEqual(self.titles(alice, status="running"), [("Running", False)])
+        # Caches the anonymous page before alice registers.
+        self.assertEqual(self.titles(self.client, status="running"), [("Running", False)])
+
+        response = alice.post(f"/api/contests/{self.running.id}/register/")
+        self.assertIn(response.status_code, (200, 201))
+        self.assertTrue(ContestRegistration.objects.filter(contest=self.running, user=self.alice).exists())
+        self.assertEqual(self.titles(alice, status="running"), [("Running", True)])
+
+        # Neither the cached anonymous page nor a fresh one shows her registration.
+        self.assertEqual(self.titles(self.client, status="running"), [("Running", False)])
+        cache.clear()
+        self.assertEqual(self.titles(self.client, status="running"), [("Running", False)])
+
+        bob = get_user_model().objects.create_user("bob")
+        client = APIClient()
+        client.force_authenticate(bob)
+        self.assertEqual(self.titles(client, status="running"), [("Running", False)])
+
+    def test_is_registered_takes_one_query(self):
+        ContestRegistration.objects.create(contest=self.past, user=self.alice)
+        ContestRegistration.objects.create(contest=self.upcoming, user=self.alice)
+        alice = self.as_alice()
+        # The count and the page, with is_registered in the page's query.
+        with self.assertNumQueries(2):
+            titles = self.titles(alice)
+        self.assertEqual(titles, [("Upcoming", True), ("Running", False), ("Past", True)])
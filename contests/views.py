@@ -1,3 +1,5 @@
+import hashlib
+
 from rest_framework import generics, permissions
 from .models import Contest, ContestRegistration
 from .serializers import ContestSerializer, ContestRegistrationSerializer, ContestProblemSerializer
@@ -9,22 +11,79 @@ from rest_framework.exceptions import PermissionDenied, NotFound
 from django.utils.timezone import now
 from .models import Contest, ContestProblem, ContestRegistration
 from rest_framework.generics import ListAPIView
-from submissions.models import Submission
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Min
-from users.models import User  
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, Min, OuterRef, Q
+from django.utils.http import parse_etags
+from rest_framework.pagination import PageNumberPagination
+from .models import LIST_VERSION_KEY
+from . import scoreboard
+
+
+class ContestPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 
 class ContestListView(generics.ListAPIView):
+    """
+    Contests, newest first, optionally only ``?status=upcoming``,
+    ``running`` or ``past``. The anonymous list is cached until a contest
+    changes or one starts or ends.
+    """
     serializer_class = ContestSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ContestPagination
 
     def get_queryset(self):
-        return Contest.objects.all()
-
-    def get_serializer_context(self):
-        return {'request': self.request}
+        current_time = now()
+        contests = Contest.objects.all()
+        when = self.request.query_params.get('status')
+        if when == 'upcoming':
+            contests = contests.filter(start_time__gt=current_time).order_by('start_time', 'id')
+        elif when == 'running':
+            contests = contests.filter(start_time__lte=current_time, end_time__gte=current_time).order_by('end_time', 'id')
+        elif when == 'past':
+            contests = contests.filter(end_time__lt=current_time).order_by('-end_time', '-id')
+        else:
+            contests = contests.order_by('-start_time', '-id')
+
+        user = self.request.user
+        if user.is_authenticated:
+            contests = contests.annotate(is_registered=Exists(
+                ContestRegistration.objects.filter(contest=OuterRef('pk'), user=user)
+            ))
+        return contests
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        version = cache.get_or_set(LIST_VERSION_KEY, 0, timeout=None)
+        url = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+        key = f"contests:list:{version}:{url}"
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, timeout=self.cache_timeout())
+        return Response(data)
+
+    @staticmethod
+    def cache_timeout():
+        """Seconds until the next contest starts or ends, capped at CONTEST_LIST_TTL."""
+        current_time = now()
+        boundaries = Contest.objects.aggregate(
+            start=Min('start_time', filter=Q(start_time__gt=current_time)),
+            end=Min('end_time', filter=Q(end_time__gt=current_time)),
+        )
+        timeout = settings.CONTEST_LIST_TTL
+        for boundary in boundaries.values():
+            if boundary is not None:
+                timeout = min(timeout, (boundary - current_time).total_seconds() + 1)
+        return max(1, int(timeout))
 
 
 class ContestRegisterView(APIView):
@@ -64,50 +123,39 @@ class ContestProblemsView(ListAPIView):
 
 
 class ContestLeaderboardView(APIView):
+    """
+    One page of a contest's ICPC standings (``?page=``, ``?page_size=``).
+
+    During the freeze only staff see live results. Pages carry the
+    scoreboard version as their ETag and honour If-None-Match.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
 
-   
-    def get(self,request, contest_id):
+    def get(self, request, contest_id):
         try:
             contest = Contest.objects.get(id=contest_id)
         except Contest.DoesNotExist:
             return Response({"error": "Contest not found"}, status=404)
 
-        if now() < contest.start_time:
+        current_time = now()
+        if current_time < contest.start_time:
             return Response({"error": "Contest has not started"}, status=403)
 
-        
-        contest_problem_ids = ContestProblem.objects.filter(contest=contest).values_list("problem_id", flat=True)
-
-        
-        ac_subs = (
-            Submission.objects
-            .filter(problem_id__in=contest_problem_ids, verdict="AC", submitted_at__lte=contest.end_time)
-            .values("user", "problem")
-            .annotate(first_ac=Min("submitted_at"))
-        )
-
-    
-        leaderboard = {}
-        for sub in ac_subs:
-            user_id = sub["user"]
-            if user_id not in leaderboard:
-                leaderboard[user_id] = {"solved": 0, "time": 0}
-            leaderboard[user_id]["solved"] += 1
-            leaderboard[user_id]["time"] += int((sub["first_ac"] - contest.start_time).total_seconds())
-
-        
-        users = User.objects.in_bulk(leaderboard.keys())
-        result = []
-        for user_id, stats in leaderboard.items():
-            result.append({
-                "user_id": user_id,
-                "username": users[user_id].username,
-                "solved": stats["solved"],
-                "time": stats["time"]
-            })
-
-        
-        result.sort(key=lambda x: (-x["solved"], x["time"]))
-
-        return Response(result)
+        try:
+            page = max(1, int(request.query_params.get("page", 1)))
+            page_size = min(self.MAX_PAGE_SIZE, max(1, int(request.query_params.get("page_size", self.PAGE_SIZE))))
+        except ValueError:
+            return Response({"error": "page and page_size must be integers"}, status=400)
+
+        live = request.user.is_staff or not scoreboard.is_frozen(contest, current_time)
+        view = "live" if live else "public"
+        etag = f'"{contest.id}-{contest.scoreboard_version}-{view}-{page}-{page_size}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={settings.CONTEST_SCOREBOARD_MAX_AGE}",
+        }
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(scoreboard.snapshot(contest, live, page, page_size), headers=headers)
@@ -9,7 +9,7 @@ export default function ContestLeaderboard() {
   useEffect(() => {
     api
       .get(`/contests/${id}/leaderboard/`)
-      .then((res) => setEntries(res.data))
+      .then((res) => setEntries(res.data.results))
       .catch((err) => console.error("Failed to load leaderboard", err));
   }, [id]);
 
@@ -22,19 +22,19 @@ export default function ContestLeaderboard() {
             <th className="py-2">#</th>
             <th className="py-2">Username</th>
             <th className="py-2">Solved</th>
-            <th className="py-2">Time</th>
+            <th className="py-2">Penalty</th>
           </tr>
         </thead>
         <tbody>
-          {entries.map((entry, idx) => (
+          {entries.map((entry) => (
             <tr
               key={entry.user_id}
               className="border-b border-gray-800 hover:bg-gray-800/50"
             >
-              <td className="py-2">{idx + 1}</td>
+              <td className="py-2">{entry.rank}</td>
               <td className="py-2">{entry.username}</td>
               <td className="py-2">{entry.solved}</td>
-              <td className="py-2">{Math.floor(entry.time / 60)} min</td>
+              <td className="py-2">{entry.penalty} min</td>
             </tr>
           ))}
         </tbody>
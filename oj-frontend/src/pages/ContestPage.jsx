@@ -14,15 +14,32 @@ import {
   Flag,
 } from "lucide-react";
 
+// The page's "upcoming" section lists running contests before upcoming ones.
+const STATUSES = ["running", "upcoming", "past"];
+const EMPTY_SECTION = { items: [], page: 0, hasMore: false };
+
+const fetchPage = (status, page) =>
+  api.get("/contests/", { params: { status, page } }).then((res) => ({
+    items: res.data.results,
+    page,
+    hasMore: Boolean(res.data.next),
+  }));
+
 export default function ContestPage() {
-  const [contests, setContests] = useState([]);
+  const [sections, setSections] = useState({
+    running: EMPTY_SECTION,
+    upcoming: EMPTY_SECTION,
+    past: EMPTY_SECTION,
+  });
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(null);
 
   useEffect(() => {
-    api
-      .get("/contests/")
-      .then((res) => {
-        setContests(res.data);
+    Promise.all(STATUSES.map((status) => fetchPage(status, 1)))
+      .then((pages) => {
+        setSections(
+          Object.fromEntries(STATUSES.map((status, i) => [status, pages[i]]))
+        );
         setLoading(false);
       })
       .catch((err) => {
@@ -31,13 +48,37 @@ export default function ContestPage() {
       });
   }, []);
 
+  const loadMore = async (status) => {
+    setLoadingMore(status);
+    try {
+      const next = await fetchPage(status, sections[status].page + 1);
+      setSections((prev) => ({
+        ...prev,
+        [status]: { ...next, items: [...prev[status].items, ...next.items] },
+      }));
+    } catch (err) {
+      console.error(err);
+      toast.error("❌ Error loading more contests");
+    } finally {
+      setLoadingMore(null);
+    }
+  };
+
   const register = async (contestId) => {
     try {
       const res = await api.post(`/contests/${contestId}/register/`);
       toast.success("🎉 Successfully registered for contest!");
-      setContests((prev) =>
-        prev.map((c) =>
-          c.id === contestId ? { ...c, is_registered: true } : c
+      setSections((prev) =>
+        Object.fromEntries(
+          STATUSES.map((status) => [
+            status,
+            {
+              ...prev[status],
+              items: prev[status].items.map((c) =>
+                c.id === contestId ? { ...c, is_registered: true } : c
+              ),
+            },
+          ])
         )
       );
     } catch (err) {
@@ -46,12 +87,31 @@ export default function ContestPage() {
   };
 
   const now = new Date();
-  const upcomingContests = contests.filter(
-    (contest) => new Date(contest.end_time) > now
-  );
-  const pastContests = contests.filter(
-    (contest) => new Date(contest.end_time) <= now
-  );
+  const upcomingContests = [
+    ...sections.running.items,
+    ...sections.upcoming.items,
+  ];
+  const pastContests = sections.past.items;
+  // Running contests are exhausted before more upcoming ones are loaded.
+  const moreUpcoming = sections.running.hasMore
+    ? "running"
+    : sections.upcoming.hasMore
+    ? "upcoming"
+    : null;
+  const morePast = sections.past.hasMore ? "past" : null;
+
+  const renderLoadMore = (status) =>
+    status && (
+      <div className="mt-8 flex justify-center">
+        <button
+          onClick={() => loadMore(status)}
+          disabled={loadingMore !== null}
+          className="px-6 py-2 bg-gray-800/50 border border-gray-700/50 rounded-xl text-gray-300 hover:border-cyan-400 hover:text-cyan-400 disabled:opacity-40 disabled:cursor-not-allowed transition-colors"
+        >
+          {loadingMore === status ? "Loading..." : "Load more"}
+        </button>
+      </div>
+    );
 
   const getContestStatus = (contest) => {
     const startTime = new Date(contest.start_time);
@@ -221,9 +281,12 @@ export default function ContestPage() {
             </div>
 
             {upcomingContests.length > 0 ? (
-              <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-2">
-                {upcomingContests.map((contest) => renderContestCard(contest))}
-              </div>
+              <>
+                <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-2">
+                  {upcomingContests.map((contest) => renderContestCard(contest))}
+                </div>
+                {renderLoadMore(moreUpcoming)}
+              </>
             ) : (
               <div className="text-center py-12">
                 <Calendar className="w-16 h-16 text-gray-600 mx-auto mb-4" />
@@ -246,11 +309,14 @@ export default function ContestPage() {
             </div>
 
             {pastContests.length > 0 ? (
-              <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-2">
-                {pastContests.map((contest) =>
-                  renderContestCard(contest, true)
-                )}
-              </div>
+              <>
+                <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-2">
+                  {pastContests.map((contest) =>
+                    renderContestCard(contest, true)
+                  )}
+                </div>
+                {renderLoadMore(morePast)}
+              </>
             ) : (
               <div className="text-center py-12">
                 <Flag className="w-16 h-16 text-gray-600 mx-auto mb-4" />
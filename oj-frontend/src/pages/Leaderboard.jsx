@@ -50,7 +50,7 @@ export default function Leaderboard() {
             Authorization: `Bearer ${token}`,
           },
         });
-        setData(res.data);
+        setData(res.data.results);
       } catch (err) {
         console.error("Failed to fetch leaderboard", err);
       } finally {
@@ -100,7 +100,7 @@ export default function Leaderboard() {
               >
                 <CardHeader className="text-center pb-2">
                   <div className="flex justify-center mb-2">
-                    {getRankIcon(idx + 1)}
+                    {getRankIcon(entry.rank)}
                   </div>
                   <CardTitle className="text-lg font-bold">
                     {entry.username}
@@ -178,13 +178,13 @@ export default function Leaderboard() {
                       >
                         <td className="p-4">
                           <div className="flex items-center gap-3">
-                            {getRankIcon(idx + 1)}
+                            {getRankIcon(entry.rank)}
                             <span
                               className={`font-bold ${
                                 idx < 3 ? "text-cyan-400" : "text-gray-300"
                               }`}
                             >
-                              #{idx + 1}
+                              #{entry.rank}
                             </span>
                           </div>
                         </td>
@@ -58,9 +58,34 @@ export default function ProblemDetail() {
 
   useEffect(() => {
     if (!submissionId) return;
+    let interval = null;
+    const token = localStorage.getItem("access");
+    const source = new EventSource(
+      `${api.defaults.baseURL}submission/${submissionId}/events/?token=${token}`
+    );
+    source.onmessage = (e) => {
+      const event = JSON.parse(e.data);
+      if (event.type === "verdict") {
+        setVerdict(event.verdict);
+        setIsSubmitting(false);
+        source.close();
+      }
+    };
+    // No live updates (or the stream broke): fall back to polling.
+    source.onerror = () => {
+      source.close();
+      if (!interval) interval = startPolling();
+    };
+    return () => {
+      source.close();
+      clearInterval(interval);
+    };
+  }, [submissionId]);
+
+  const startPolling = () => {
     const interval = setInterval(async () => {
       try {
-        const res = await api.get(`submission/${submissionId}/`);
+        const res = await api.get(`submission/${submissionId}/status/`);
         if (res.data.verdict !== "PENDING") {
           setVerdict(res.data.verdict);
           setIsSubmitting(false);
@@ -71,8 +96,8 @@ export default function ProblemDetail() {
         clearInterval(interval);
       }
     }, 3000);
-    return () => clearInterval(interval);
-  }, [submissionId, verdict]);
+    return interval;
+  };
 
   const handleSubmit = async () => {
     try {
@@ -88,7 +113,13 @@ export default function ProblemDetail() {
       toast.success("Code submitted successfully!");
     } catch (err) {
       setIsSubmitting(false);
-      toast.error("Error submitting code");
+      if (err.response?.status === 429) {
+        toast.error(
+          `${err.response.data.error} (retry in ${err.response.data.retry_after}s)`
+        );
+      } else {
+        toast.error("Error submitting code");
+      }
     }
   };
 
@@ -100,12 +131,21 @@ export default function ProblemDetail() {
         code: code_p,
         input: customInput,
       });
-      setOutput(res.data.output || "");
-      setVerdict(res.data.error ? `Error: ${res.data.error}` : "");
+      let result = res.data;
+      while (result.status === "PENDING") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        result = (await api.get(`run/${res.data.run_id}/`)).data;
+      }
+      setOutput(result.output || "");
+      setVerdict(result.error ? `Error: ${result.error}` : "");
       setIsRunning(false);
     } catch (err) {
       setIsRunning(false);
-      toast.error("Error running code");
+      if (err.response?.status === 429) {
+        toast.error(err.response.data.error);
+      } else {
+        toast.error("Error running code");
+      }
     }
   };
 
@@ -192,7 +232,7 @@ export default function ProblemDetail() {
                 </h2>
               </div>
               <div className="prose prose-invert max-w-none">
-                <ReactMarkdown>{problem.statement}</ReactMarkdown>
+                <div dangerouslySetInnerHTML={{ __html: problem.statement_html }} />
               </div>
             </div>
 
@@ -202,7 +242,7 @@ export default function ProblemDetail() {
                 Input Format
               </h3>
               <div className="prose prose-invert max-w-none">
-                <ReactMarkdown>{problem.input_format}</ReactMarkdown>
+                <div dangerouslySetInnerHTML={{ __html: problem.input_format_html }} />
               </div>
             </div>
 
@@ -212,7 +252,7 @@ export default function ProblemDetail() {
                 Output Format
               </h3>
               <div className="prose prose-invert max-w-none">
-                <ReactMarkdown>{problem.output_format}</ReactMarkdown>
+                <div dangerouslySetInnerHTML={{ __html: problem.output_format_html }} />
               </div>
             </div>
 
@@ -222,7 +262,7 @@ export default function ProblemDetail() {
                 Constraints
               </h3>
               <div className="prose prose-invert max-w-none">
-                <ReactMarkdown>{problem.constraints}</ReactMarkdown>
+                <div dangerouslySetInnerHTML={{ __html: problem.constraints_html }} />
               </div>
             </div>
 
@@ -14,47 +14,89 @@ import {
   Tag,
   TrendingUp,
   BookOpen,
+  X,
 } from "lucide-react";
 
+const PAGE_SIZE = 50;
+
 export default function ProblemsList() {
   const [problems, setProblems] = useState([]);
-  const [filteredProblems, setFilteredProblems] = useState([]);
+  const [count, setCount] = useState(0);
+  const [page, setPage] = useState(1);
   const [search, setSearch] = useState("");
+  const [query, setQuery] = useState("");
   const [difficulty, setDifficulty] = useState("All");
+  const [tag, setTag] = useState("");
   const [loading, setLoading] = useState(true);
+  const [fetching, setFetching] = useState(false);
+
+  // Only ask the server once typing pauses.
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      const next = search.trim();
+      if (next !== query) {
+        setQuery(next);
+        setPage(1);
+      }
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [search, query]);
 
   useEffect(() => {
+    let ignore = false;
+    setFetching(true);
     api
-      .get("problems/")
+      .get("problems/", {
+        params: {
+          page,
+          page_size: PAGE_SIZE,
+          difficulty: difficulty !== "All" ? difficulty : undefined,
+          tag: tag || undefined,
+          search: query || undefined,
+        },
+      })
       .then((res) => {
-        setProblems(res.data);
-        setFilteredProblems(res.data);
-        setLoading(false);
+        if (ignore) return;
+        setProblems(res.data.results);
+        setCount(res.data.count);
       })
       .catch((err) => {
+        if (ignore) return;
         console.error(err);
         alert("Failed to load problems");
+      })
+      .finally(() => {
+        if (ignore) return;
         setLoading(false);
+        setFetching(false);
       });
-  }, []);
+    return () => {
+      ignore = true;
+    };
+  }, [page, query, difficulty, tag]);
 
-  useEffect(() => {
-    let filtered = problems;
+  const pageCount = Math.max(1, Math.ceil(count / PAGE_SIZE));
+  const firstShown = count ? (page - 1) * PAGE_SIZE + 1 : 0;
+  const lastShown = (page - 1) * PAGE_SIZE + problems.length;
 
-    if (difficulty !== "All") {
-      filtered = filtered.filter((p) => p.difficulty === difficulty);
-    }
+  // Any change of filter starts again from the first page.
+  const filterByDifficulty = (value) => {
+    setDifficulty(value);
+    setPage(1);
+  };
 
-    if (search.trim()) {
-      filtered = filtered.filter(
-        (p) =>
-          p.name.toLowerCase().includes(search.toLowerCase()) ||
-          p.tags.some((tag) => tag.toLowerCase().includes(search.toLowerCase()))
-      );
-    }
+  const filterByTag = (value) => {
+    setTag(value);
+    setPage(1);
+  };
 
-    setFilteredProblems(filtered);
-  }, [search, difficulty, problems]);
+  const clearFilters = () => {
+    setSearch("");
+    setQuery("");
+    setDifficulty("All");
+    setTag("");
+    setPage(1);
+  };
 
   const getDifficultyConfig = (difficulty) => {
     switch (difficulty?.toLowerCase()) {
@@ -143,7 +185,7 @@ export default function ProblemsList() {
                 <select
                   className="pl-12 pr-8 py-3 bg-gray-900/50 border border-gray-600 rounded-xl text-white focus:border-cyan-400 focus:outline-none transition-colors appearance-none cursor-pointer min-w-[200px]"
                   value={difficulty}
-                  onChange={(e) => setDifficulty(e.target.value)}
+                  onChange={(e) => filterByDifficulty(e.target.value)}
                 >
                   <option value="All">All Difficulties</option>
                   <option value="Easy">🟢 Easy</option>
@@ -153,72 +195,111 @@ export default function ProblemsList() {
               </div>
             </div>
 
-            <div className="mt-4 flex items-center gap-2 text-sm text-gray-400">
+            <div className="mt-4 flex items-center gap-2 text-sm text-gray-400 flex-wrap">
               <TrendingUp className="w-4 h-4" />
               <span>
-                Showing {filteredProblems.length} of {problems.length} problems
+                Showing {firstShown}–{lastShown} of {count} problems
               </span>
+              {tag && (
+                <button
+                  onClick={() => filterByTag("")}
+                  className="flex items-center gap-1 bg-cyan-500/10 text-cyan-400 px-2 py-1 rounded-lg text-xs font-medium border border-cyan-400/30 hover:bg-cyan-500/20 transition-colors"
+                >
+                  <Tag className="w-3 h-3" />
+                  {tag}
+                  <X className="w-3 h-3" />
+                </button>
+              )}
             </div>
           </div>
 
-          {filteredProblems.length > 0 ? (
-            <div className="grid gap-4">
-              {filteredProblems.map((problem) => {
-                const diffConfig = getDifficultyConfig(problem.difficulty);
-
-                return (
-                  <Link to={`/problems/${problem.code}`} key={problem.id}>
-                    <div className="group bg-gray-800/30 hover:bg-gray-700/40 border border-gray-700/50 hover:border-cyan-500/30 rounded-xl p-6 transition-all duration-300 hover:shadow-lg hover:shadow-cyan-500/10 hover:scale-[1.01]">
-                      <div className="flex items-start justify-between gap-4">
-                        <div className="flex-1 min-w-0">
-                          <div className="flex items-center gap-3 mb-3">
-                            <h3 className="text-xl font-semibold text-white group-hover:text-cyan-400 transition-colors truncate">
-                              {problem.name}
-                            </h3>
-                            <div
-                              className={`flex items-center gap-2 px-3 py-1 rounded-full text-sm font-semibold border ${diffConfig.bg} ${diffConfig.border} ${diffConfig.color}`}
-                            >
-                              {diffConfig.icon}
-                              {problem.difficulty}
-                            </div>
-                          </div>
+          {problems.length > 0 ? (
+            <>
+              <div className={`grid gap-4 transition-opacity ${fetching ? "opacity-60" : ""}`}>
+                {problems.map((problem) => {
+                  const diffConfig = getDifficultyConfig(problem.difficulty);
 
-                          <div className="flex items-center gap-2 flex-wrap">
-                            <Tag className="w-4 h-4 text-gray-400" />
-                            {problem.tags.map((tag, index) => (
-                              <span
-                                key={index}
-                                className="bg-gray-700/50 text-gray-300 px-2 py-1 rounded-lg text-xs font-medium border border-gray-600/50"
+                  return (
+                    <Link to={`/problems/${problem.code}`} key={problem.id}>
+                      <div className="group bg-gray-800/30 hover:bg-gray-700/40 border border-gray-700/50 hover:border-cyan-500/30 rounded-xl p-6 transition-all duration-300 hover:shadow-lg hover:shadow-cyan-500/10 hover:scale-[1.01]">
+                        <div className="flex items-start justify-between gap-4">
+                          <div className="flex-1 min-w-0">
+                            <div className="flex items-center gap-3 mb-3">
+                              <h3 className="text-xl font-semibold text-white group-hover:text-cyan-400 transition-colors truncate">
+                                {problem.name}
+                              </h3>
+                              <div
+                                className={`flex items-center gap-2 px-3 py-1 rounded-full text-sm font-semibold border ${diffConfig.bg} ${diffConfig.border} ${diffConfig.color}`}
                               >
-                                {tag}
-                              </span>
-                            ))}
+                                {diffConfig.icon}
+                                {problem.difficulty}
+                              </div>
+                            </div>
+
+                            <div className="flex items-center gap-2 flex-wrap">
+                              <Tag className="w-4 h-4 text-gray-400" />
+                              {problem.tags.map((name, index) => (
+                                <span
+                                  key={index}
+                                  onClick={(e) => {
+                                    // Filter by the tag instead of opening the problem.
+                                    e.preventDefault();
+                                    filterByTag(name.trim().toLowerCase());
+                                  }}
+                                  className="bg-gray-700/50 text-gray-300 px-2 py-1 rounded-lg text-xs font-medium border border-gray-600/50 hover:border-cyan-400/50 hover:text-cyan-400 cursor-pointer transition-colors"
+                                >
+                                  {name}
+                                </span>
+                              ))}
+                            </div>
                           </div>
-                        </div>
 
-                        <div className="flex-shrink-0 opacity-0 group-hover:opacity-100 mt-4 transition-opacity">
-                          <div className="w-8 h-8 bg-cyan-500/20 rounded-full flex items-center justify-center">
-                            <svg
-                              className="w-4 h-4 text-cyan-400"
-                              fill="none"
-                              stroke="currentColor"
-                              viewBox="0 0 24 24"
-                            >
-                              <path
-                                strokeLinecap="round"
-                                strokeLinejoin="round"
-                                strokeWidth={2}
-                                d="M9 5l7 7-7 7"
-                              />
-                            </svg>
+                          <div className="flex-shrink-0 opacity-0 group-hover:opacity-100 mt-4 transition-opacity">
+                            <div className="w-8 h-8 bg-cyan-500/20 rounded-full flex items-center justify-center">
+                              <svg
+                                className="w-4 h-4 text-cyan-400"
+                                fill="none"
+                                stroke="currentColor"
+                                viewBox="0 0 24 24"
+                              >
+                                <path
+                                  strokeLinecap="round"
+                                  strokeLinejoin="round"
+                                  strokeWidth={2}
+                                  d="M9 5l7 7-7 7"
+                                />
+                              </svg>
+                            </div>
                           </div>
                         </div>
                       </div>
-                    </div>
-                  </Link>
-                );
-              })}
-            </div>
+                    </Link>
+                  );
+                })}
+              </div>
+
+              {pageCount > 1 && (
+                <div className="mt-8 flex items-center justify-center gap-4">
+                  <button
+                    onClick={() => setPage((p) => p - 1)}
+                    disabled={page <= 1 || fetching}
+                    className="px-4 py-2 bg-gray-800/50 border border-gray-700/50 rounded-xl text-gray-300 hover:border-cyan-400 hover:text-cyan-400 disabled:opacity-40 disabled:cursor-not-allowed disabled:hover:border-gray-700/50 disabled:hover:text-gray-300 transition-colors"
+                  >
+                    Previous
+                  </button>
+                  <span className="text-sm text-gray-400">
+                    Page {page} of {pageCount}
+                  </span>
+                  <button
+                    onClick={() => setPage((p) => p + 1)}
+                    disabled={page >= pageCount || fetching}
+                    className="px-4 py-2 bg-gray-800/50 border border-gray-700/50 rounded-xl text-gray-300 hover:border-cyan-400 hover:text-cyan-400 disabled:opacity-40 disabled:cursor-not-allowed disabled:hover:border-gray-700/50 disabled:hover:text-gray-300 transition-colors"
+                  >
+                    Next
+                  </button>
+                </div>
+              )}
+            </>
           ) : (
             <div className="text-center py-16">
               <div className="bg-gray-800/30 border border-gray-700/50 rounded-2xl p-12 max-w-md mx-auto">
@@ -231,10 +312,7 @@ export default function ProblemsList() {
                   looking for.
                 </p>
                 <button
-                  onClick={() => {
-                    setSearch("");
-                    setDifficulty("All");
-                  }}
+                  onClick={clearFilters}
                   className="bg-cyan-500 hover:bg-cyan-600 text-black px-6 py-2 rounded-xl font-semibold transition-colors"
                 >
                   Clear Filters
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -82,12 +84,58 @@ WSGI_APPLICATION = 'oj_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+#
+# DB_ENGINE picks a profile. "sqlite" (the default) suits a single node: WAL
+# lets the web app read while a judge worker writes, and writers queue on
+# the busy timeout instead of failing with "database is locked".
+# "postgres" is for deployments with several workers writing verdicts.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'oj'),
+            'USER': os.getenv('POSTGRES_USER', 'oj'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            # Seconds a connection is reused; checked before reuse.
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
-}
+    if os.getenv('DB_POOL', '0') == '1':
+        # psycopg's connection pool, shared by the threads of a process.
+        # Django requires persistent connections to be off with it.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        }
+elif DB_ENGINE == 'sqlite':
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 20))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds to wait for the write lock.
+                'timeout': SQLITE_BUSY_TIMEOUT,
+                # Take the write lock when a transaction starts, so two
+                # transactions can't both read and then fail to upgrade.
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000};'
+                ),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown DB_ENGINE: {DB_ENGINE!r}")
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -142,3 +190,156 @@ CORS_ALLOW_CREDENTIALS = True
 AUTH_USER_MODEL = 'users.User'
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_TASK_ROUTES = {
+    'submissions.tasks.evaluate_submission': {'queue': 'judge'},
+    'submissions.tasks.execute_run': {'queue': 'run'},
+    'submissions.tasks.generate_feedback': {'queue': 'feedback'},
+}
+# Ten real priority levels instead of kombu's four, and workers listening on
+# several queues drain them in the order given to -Q (submissions.scheduling).
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+
+# Shared cache for feedback, rate limits and other cross-worker state. Set
+# CACHE_URL to an empty string to fall back to a per-process memory cache.
+CACHE_URL = os.getenv('CACHE_URL', 'redis://localhost:6379/1')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Redis for live submission events (submissions.events); empty disables them.
+SUBMISSION_EVENTS_URL = os.getenv('SUBMISSION_EVENTS_URL', CACHE_URL)
+# Seconds an event stream stays open before the client has to reconnect.
+SUBMISSION_EVENTS_TIMEOUT = int(os.getenv('SUBMISSION_EVENTS_TIMEOUT', 300))
+
+# How long the judge's slim status records (submissions.status) are kept.
+SUBMISSION_STATUS_TTL = int(os.getenv('SUBMISSION_STATUS_TTL', 24 * 3600))
+
+# Redis holding the global leaderboard's sorted set (submissions.leaderboard).
+# Empty ranks straight from the database.
+LEADERBOARD_URL = os.getenv('LEADERBOARD_URL', CACHE_URL)
+
+# Contest scoreboards (contests.scoreboard): how long a rendered page is kept
+# per version, and how long clients may reuse one without asking.
+CONTEST_SCOREBOARD_TTL = int(os.getenv('CONTEST_SCOREBOARD_TTL', 300))
+CONTEST_SCOREBOARD_MAX_AGE = int(os.getenv('CONTEST_SCOREBOARD_MAX_AGE', 5))
+# Longest the anonymous contest list is cached (contests.views.ContestListView).
+CONTEST_LIST_TTL = int(os.getenv('CONTEST_LIST_TTL', 300))
+# How long a problem page stays cached; saving the problem replaces it anyway.
+PROBLEM_DETAIL_TTL = int(os.getenv('PROBLEM_DETAIL_TTL', 24 * 3600))
+
+# Judge
+# "docker" runs submissions in the oj-* images; "local" forks them straight
+# from the worker into Linux namespaces (see submissions.executor).
+JUDGE_EXECUTOR = os.getenv("JUDGE_EXECUTOR", "docker")
+# Local executor: a directory with one unpacked root filesystem per image
+# (e.g. `docker export` of oj-python into <dir>/oj-python) to chroot into.
+# Empty uses the host's own toolchain and filesystem, which is only allowed
+# with DEBUG or the CI environment variable set.
+JUDGE_LOCAL_ROOTFS = os.getenv("JUDGE_LOCAL_ROOTFS", "")
+JUDGE_LOCAL_NAMESPACES = os.getenv("JUDGE_LOCAL_NAMESPACES", "1") == "1"
+# Boxes a host can run at once under a root worker; each gets its own uid,
+# counting down from 65534, so JUDGE_PIDS_LIMIT applies per box.
+JUDGE_LOCAL_SLOTS = int(os.getenv("JUDGE_LOCAL_SLOTS", 64))
+# Refuse kernel interfaces judged programs don't need (harness.SECCOMP_DENIED);
+# needs libseccomp on the worker, without which it is skipped with a warning.
+JUDGE_LOCAL_SECCOMP = os.getenv("JUDGE_LOCAL_SECCOMP", "1") == "1"
+# Workspaces are bind-mounted into the sandbox containers, so this must be a
+# path the docker daemon can see.
+JUDGE_WORKSPACE_ROOT = os.getenv("JUDGE_WORKSPACE_ROOT", "/var/tmp/oj_temp")
+JUDGE_POOL_ENABLED = os.getenv("JUDGE_POOL_ENABLED", "1") == "1"
+# Warm containers kept per image, per worker process.
+JUDGE_POOL_SIZE = int(os.getenv("JUDGE_POOL_SIZE", 2))
+# A container is destroyed and replaced after serving this many leases.
+JUDGE_POOL_MAX_USES = int(os.getenv("JUDGE_POOL_MAX_USES", 50))
+# Caps on a whole sandbox container (docker --memory/--pids-limit). Cases get
+# their own, tighter limits from the harness; these bound everything else,
+# including parallel cases together and anything a program forks.
+JUDGE_CONTAINER_MEMORY = os.getenv("JUDGE_CONTAINER_MEMORY", "2g")
+# Also the local executor's RLIMIT_NPROC for each box's sandboxed commands.
+JUDGE_PIDS_LIMIT = int(os.getenv("JUDGE_PIDS_LIMIT", 256))
+JUDGE_COMPILE_TIMEOUT = int(os.getenv("JUDGE_COMPILE_TIMEOUT", 30))
+JUDGE_ARTIFACT_CACHE_ENABLED = os.getenv("JUDGE_ARTIFACT_CACHE_ENABLED", "1") == "1"
+JUDGE_ARTIFACT_CACHE_DIR = os.getenv(
+    "JUDGE_ARTIFACT_CACHE_DIR", os.path.join(JUDGE_WORKSPACE_ROOT, "artifacts")
+)
+JUDGE_ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("JUDGE_ARTIFACT_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Test cases judged concurrently per submission, by language. Problems can
+# lower or raise this with Problem.max_parallel_cases.
+JUDGE_PARALLEL_CASES = {
+    "python": int(os.getenv("JUDGE_PARALLEL_CASES_PYTHON", 4)),
+    "cpp": int(os.getenv("JUDGE_PARALLEL_CASES_CPP", 4)),
+    "java": int(os.getenv("JUDGE_PARALLEL_CASES_JAVA", 2)),
+}
+# Hard ceiling regardless of language or problem settings.
+JUDGE_MAX_PARALLEL_CASES = int(os.getenv("JUDGE_MAX_PARALLEL_CASES", os.cpu_count() or 1))
+# Problem.time_limit and Problem.memory_limit are scaled by these per language.
+JUDGE_LANGUAGE_MULTIPLIERS = {
+    "python": {"time": 3.0, "memory": 1.0},
+    "cpp": {"time": 1.0, "memory": 1.0},
+    "java": {"time": 2.0, "memory": 2.0},
+}
+# Programs writing more than this to stdout or stderr get OLE.
+JUDGE_OUTPUT_LIMIT = int(os.getenv("JUDGE_OUTPUT_LIMIT", 64 * 1024 * 1024))
+# Bytes kept from each end of a case's stdout for Submission.output.
+JUDGE_OUTPUT_PREVIEW = int(os.getenv("JUDGE_OUTPUT_PREVIEW", 4096))
+# Limits for "Run" with custom input, which has no problem to take them from.
+JUDGE_RUN_TIME_LIMIT = float(os.getenv("JUDGE_RUN_TIME_LIMIT", 5))
+JUDGE_RUN_MEMORY_LIMIT = int(os.getenv("JUDGE_RUN_MEMORY_LIMIT", 256))
+# Runs a user may have queued or running at once (submissions.runs).
+JUDGE_RUN_MAX_PER_USER = int(os.getenv("JUDGE_RUN_MAX_PER_USER", 2))
+# How long a run's result waits to be fetched.
+JUDGE_RUN_RESULT_TTL = int(os.getenv("JUDGE_RUN_RESULT_TTL", 600))
+
+# Local cache of the content-addressed test data (problems.testdata). The
+# database holds every blob; each machine fills its own cache on demand.
+TESTDATA_ROOT = os.getenv("TESTDATA_ROOT", str(BASE_DIR / "testdata"))
+# Reuse the verdict of an identical earlier submission (submissions.verdict_cache).
+JUDGE_VERDICT_CACHE_ENABLED = os.getenv("JUDGE_VERDICT_CACHE_ENABLED", "1") == "1"
+# Priority levels a submission loses for each other pending submission of the
+# same user (submissions.scheduling).
+JUDGE_FAIR_SHARE_STEP = int(os.getenv("JUDGE_FAIR_SHARE_STEP", 1))
+# Queue depth at which new submissions are refused with 429; queues not
+# listed are never full.
+JUDGE_MAX_BACKLOG = {
+    "judge_contest": int(os.getenv("JUDGE_MAX_BACKLOG_CONTEST", 2000)),
+    "judge": int(os.getenv("JUDGE_MAX_BACKLOG", 500)),
+}
+# Seconds a queue depth read from the broker is reused, so admission checks
+# on every submit don't each make a broker round trip.
+JUDGE_QUEUE_DEPTH_TTL = float(os.getenv("JUDGE_QUEUE_DEPTH_TTL", 1.5))
+# Minutes of finished submissions that throughput estimates are based on.
+JUDGE_THROUGHPUT_WINDOW = int(os.getenv("JUDGE_THROUGHPUT_WINDOW", 5))
+# Submissions per minute a bulk rejudge hands to the judge (submissions.rejudge).
+JUDGE_REJUDGE_RATE = int(os.getenv("JUDGE_REJUDGE_RATE", 60))
+# Retry-After when a queue is full and there is no throughput to go by.
+JUDGE_RETRY_AFTER = int(os.getenv("JUDGE_RETRY_AFTER", 30))
+# Fraction of submissions whose per-case results are logged at DEBUG level.
+JUDGE_LOG_SAMPLE_RATE = float(os.getenv("JUDGE_LOG_SAMPLE_RATE", 0.01))
+# Token Prometheus passes as ?token= to scrape /api/judge/metrics/; when
+# empty only admins can read the metrics.
+JUDGE_METRICS_TOKEN = os.getenv("JUDGE_METRICS_TOKEN", "")
+
+# AI feedback (submissions.feedback). "gemini" or "stub" for offline use.
+FEEDBACK_BACKEND = os.getenv("FEEDBACK_BACKEND", "gemini")
+# Verdicts that get feedback without the user asking for it.
+FEEDBACK_AUTO_VERDICTS = ["WA", "RE", "CE", "TLE", "MLE", "OLE"]
+FEEDBACK_CACHE_TTL = int(os.getenv("FEEDBACK_CACHE_TTL", 7 * 24 * 3600))
+FEEDBACK_MAX_CONCURRENCY = int(os.getenv("FEEDBACK_MAX_CONCURRENCY", 4))
+FEEDBACK_RATE_PER_MINUTE = int(os.getenv("FEEDBACK_RATE_PER_MINUTE", 60))
+# Seconds to wait before trying again when the limiter is full.
+FEEDBACK_RETRY_DELAY = 15
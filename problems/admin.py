@@ -1,8 +1,62 @@
+from django import forms
 from django.contrib import admin
 from .models import Problem
 
+
+class ProblemAdminForm(forms.ModelForm):
+    test_cases = forms.JSONField(
+        required=False,
+        help_text='Replace the test data with [{"input": "...", "output": "..."}, ...]. '
+                  'Leave empty to keep the current cases.',
+    )
+
+    class Meta:
+        model = Problem
+        exclude = ['test_manifest']
+
+    def clean_test_cases(self):
+        cases = self.cleaned_data['test_cases']
+        if cases in (None, ''):
+            return None
+        if not isinstance(cases, list) or not all(
+            isinstance(case, dict)
+            and isinstance(case.get('input'), str)
+            and isinstance(case.get('output'), str)
+            for case in cases
+        ):
+            raise forms.ValidationError('Expected a list of {"input": str, "output": str} objects.')
+        return cases
+
+
 @admin.register(Problem)
 class ProblemAdmin(admin.ModelAdmin):
-    list_display = ('name', 'code', 'difficulty')
+    form = ProblemAdminForm
+    list_display = ('name', 'code', 'difficulty', 'test_version')
     search_fields = ('name', 'tags')
-    
\ No newline at end of file
+    readonly_fields = ('test_version',)
+    actions = ['invalidate_verdicts', 'rejudge_submissions']
+
+    def save_model(self, request, obj, form, change):
+        test_cases = form.cleaned_data.get('test_cases')
+        if test_cases:
+            obj.set_test_cases(test_cases)
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description='Invalidate memoized verdicts')
+    def invalidate_verdicts(self, request, queryset):
+        for problem in queryset:
+            problem.bump_test_version()
+            problem.save(update_fields=['test_version', 'test_manifest'])
+        self.message_user(request, f'Bumped the test version of {queryset.count()} problem(s).')
+
+    @admin.action(description='Rejudge all submissions')
+    def rejudge_submissions(self, request, queryset):
+        from submissions import rejudge
+        from submissions.models import Submission
+
+        job = rejudge.start(
+            Submission.objects.filter(problem__in=queryset),
+            description='problems ' + ', '.join(problem.code for problem in queryset),
+            user=request.user,
+        )
+        self.message_user(request, f'Started rejudge job {job.id} for {job.total} submission(s).')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0005_problem_is_contest_only'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='max_parallel_cases',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
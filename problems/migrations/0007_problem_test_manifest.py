@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0006_problem_max_parallel_cases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='test_manifest',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='test_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
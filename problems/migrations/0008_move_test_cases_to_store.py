@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:53
+
+from django.db import migrations
+
+from problems import testdata
+
+
+def move_to_store(apps, schema_editor):
+    Problem = apps.get_model('problems', 'Problem')
+    for problem in Problem.objects.exclude(test_cases=[]):
+        problem.test_manifest = testdata.build_manifest(
+            problem.test_cases, version=1,
+            # The blob table comes later, in 0013; 0014 fills it from here.
+            store=testdata.cache_blob,
+        )
+        problem.test_version = 1
+        problem.save(update_fields=['test_manifest', 'test_version'])
+
+
+def restore_from_store(apps, schema_editor):
+    Problem = apps.get_model('problems', 'Problem')
+    for problem in Problem.objects.exclude(test_manifest={}):
+        problem.test_cases = [
+            {
+                'input': testdata.read_blob(case['input']),
+                'output': testdata.read_blob(case['output']),
+            }
+            for case in problem.test_manifest.get('cases', [])
+        ]
+        problem.save(update_fields=['test_cases'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0007_problem_test_manifest'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_to_store, restore_from_store),
+    ]
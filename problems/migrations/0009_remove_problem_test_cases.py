@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:53
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0008_move_test_cases_to_store'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='problem',
+            name='test_cases',
+        ),
+    ]
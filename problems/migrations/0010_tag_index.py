@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0009_remove_problem_test_cases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='tag_index',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='problems', to='problems.tag'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from problems.models import normalize_tags
+
+
+def fill_tag_index(apps, schema_editor):
+    Problem = apps.get_model('problems', 'Problem')
+    Tag = apps.get_model('problems', 'Tag')
+    for problem in Problem.objects.exclude(tags=[]):
+        names = normalize_tags(problem.tags)
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        problem.tag_index.set(Tag.objects.filter(name__in=names))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0010_tag_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_tag_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+from problems.rendering import render_markdown
+
+
+def render_existing(apps, schema_editor):
+    Problem = apps.get_model('problems', 'Problem')
+    fields = ('statement', 'input_format', 'output_format', 'constraints')
+    for problem in Problem.objects.all():
+        for field in fields:
+            setattr(problem, f'{field}_html', render_markdown(getattr(problem, field)))
+        problem.save(update_fields=[f'{field}_html' for field in fields])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0011_fill_tag_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='constraints_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='input_format_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='output_format_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='statement_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
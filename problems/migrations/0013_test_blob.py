@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0012_rendered_statement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('content', models.BinaryField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+import os
+
+from django.db import migrations
+
+from problems import testdata
+
+
+def fill_test_blob(apps, schema_editor):
+    Problem = apps.get_model('problems', 'Problem')
+    TestBlob = apps.get_model('problems', 'TestBlob')
+    digests = {
+        case[key]
+        for manifest in Problem.objects.values_list('test_manifest', flat=True)
+        for case in manifest.get('cases', [])
+        for key in ('input', 'output')
+    }
+    for digest in digests:
+        path = testdata.blob_path(digest)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            content = f.read()
+        TestBlob.objects.bulk_create([TestBlob(digest=digest, content=content)], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0013_test_blob'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_test_blob, migrations.RunPython.noop),
+    ]
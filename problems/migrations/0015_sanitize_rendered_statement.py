@@ -0,0 +1,29 @@
+from django.core.cache import cache
+from django.db import migrations
+
+from problems.models import detail_version_key
+from problems.rendering import render_markdown
+
+
+def render_existing(apps, schema_editor):
+    Problem = apps.get_model('problems', 'Problem')
+    fields = ('statement', 'input_format', 'output_format', 'constraints')
+    codes = []
+    for problem in Problem.objects.all():
+        for field in fields:
+            setattr(problem, f'{field}_html', render_markdown(getattr(problem, field)))
+        problem.save(update_fields=[f'{field}_html' for field in fields] + ['updated_at'])
+        codes.append(problem.code)
+    # Pages cached from the old HTML stop being served.
+    cache.delete_many([detail_version_key(code) for code in codes])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0014_fill_test_blob'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
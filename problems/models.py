@@ -1,4 +1,10 @@
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import testdata
+from .rendering import render_markdown
 
 DIFFICULTY_CHOICES = (
     ('Easy', 'Easy'),
@@ -6,6 +12,28 @@ DIFFICULTY_CHOICES = (
     ('Hard', 'Hard'),
 )
 
+def normalize_tags(tags):
+    """Lower-cased, stripped, de-duplicated tag names in their original order."""
+    names = (str(tag).strip().lower() for tag in tags or ())
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class TestBlob(models.Model):
+    """One blob of the content-addressed test data; see problems.testdata."""
+    digest = models.CharField(max_length=64, primary_key=True)
+    content = models.BinaryField()
+
+    def __str__(self):
+        return self.digest
+
+
 class Problem(models.Model):
     name = models.CharField(max_length=200)
     code = models.SlugField(unique=True) 
@@ -18,10 +46,108 @@ class Problem(models.Model):
     time_limit = models.FloatField(default=1.0)  
     memory_limit = models.IntegerField(default=256) 
     tags = models.JSONField(default=list)
+    # Normalized copy of ``tags`` for exact lookups; kept in sync by save().
+    tag_index = models.ManyToManyField(Tag, related_name='problems', blank=True, editable=False)
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES)
-    test_cases = models.JSONField(default=list)
+    # Digests of the test data in the content-addressed store; see
+    # problems.testdata. Use set_test_cases() rather than editing it.
+    test_manifest = models.JSONField(default=dict, blank=True)
+    test_version = models.PositiveIntegerField(default=0)
     is_contest_only = models.BooleanField(default=False)
+    # Cap on test cases judged concurrently; 1 keeps timing-sensitive
+    # problems serial. Empty falls back to JUDGE_PARALLEL_CASES.
+    max_parallel_cases = models.PositiveSmallIntegerField(null=True, blank=True)
+    # HTML of the Markdown fields in RENDERED_FIELDS, rendered by save().
+    statement_html = models.TextField(blank=True, editable=False)
+    input_format_html = models.TextField(blank=True, editable=False)
+    output_format_html = models.TextField(blank=True, editable=False)
+    constraints_html = models.TextField(blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Fields that can change a verdict; editing them bumps test_version so
+    # memoized verdicts judged under the old values stop matching.
+    JUDGE_FIELDS = ('time_limit', 'memory_limit')
+    RENDERED_FIELDS = ('statement', 'input_format', 'output_format', 'constraints')
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._judge_values = {
+            field: getattr(instance, field)
+            for field in cls.JUDGE_FIELDS
+            if field in field_names
+        }
+        if 'tags' in field_names:
+            instance._loaded_tags = normalize_tags(instance.tags)
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_judge_values', {})
+        if any(getattr(self, field) != value for field, value in loaded.items()):
+            self.bump_test_version()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'test_version', 'test_manifest'}
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(self.RENDERED_FIELDS):
+            self.render()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *(f'{field}_html' for field in self.RENDERED_FIELDS)}
+        if update_fields is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
+        super().save(*args, **kwargs)
+        self._judge_values = {field: getattr(self, field) for field in self.JUDGE_FIELDS}
+        tags = normalize_tags(self.tags)
+        if tags != getattr(self, '_loaded_tags', None):
+            self.sync_tag_index(tags)
+            self._loaded_tags = tags
+
+    def sync_tag_index(self, names):
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        self.tag_index.set(Tag.objects.filter(name__in=names))
+
+    def render(self):
+        for field in self.RENDERED_FIELDS:
+            setattr(self, f'{field}_html', render_markdown(getattr(self, field)))
+
+    def bump_test_version(self):
+        """Invalidate memoized verdicts without touching the test data."""
+        self.test_version += 1
+        self.test_manifest = {**self.test_manifest, 'version': self.test_version}
+
+    def set_test_cases(self, cases):
+        """Replace the test data with ``[{"input": ..., "output": ...}, ...]``."""
+        manifest = testdata.build_manifest(cases, self.test_version)
+        if manifest["cases"] != self.test_manifest.get("cases"):
+            self.test_version += 1
+            manifest["version"] = self.test_version
+            self.test_manifest = manifest
+
+    def judge_cases(self):
+        """
+        Cases to judge against: manifest entries referencing stored blobs, or
+        the inline sample when the problem has no test data yet.
+        """
+        cases = self.test_manifest.get("cases")
+        if cases:
+            return cases
+        return [{"input_text": self.sample_input, "output_text": self.sample_output}]
+
+
+
+def detail_version_key(code):
+    """Cache key of the version ProblemDetailView serves for ``code``."""
+    return f"problem:detail-version:{code}"
+
+
+@receiver(post_save, sender=Problem)
+def publish_problem_version(sender, instance, **kwargs):
+    cache.set(detail_version_key(instance.code), instance.updated_at.timestamp(), timeout=None)
+
+
+@receiver(post_delete, sender=Problem)
+def forget_problem_version(sender, instance, **kwargs):
+    cache.delete(detail_version_key(instance.code))
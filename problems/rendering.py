@@ -0,0 +1,55 @@
+"""
+Markdown rendering of problem text.
+
+Statements, formats and constraints are written in Markdown and rendered
+once, when a problem is saved, instead of by every client on every view.
+The result goes straight into the page, where it could read the tokens the
+frontend keeps in localStorage, so it must never carry script: raw HTML in
+the source is shown as text rather than passed through, and links and
+images may only point at http(s), mailto or relative URLs.
+"""
+import html
+import re
+from urllib.parse import urlsplit
+
+import markdown
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+
+EXTENSIONS = ["fenced_code", "tables", "sane_lists"]
+
+SAFE_SCHEMES = ("", "http", "https", "mailto")
+
+# Browsers drop these anywhere in a URL, so "java\tscript:" is javascript:.
+# Markdown leaves character references in attributes for the browser to
+# decode, so they are decoded before looking.
+_IGNORED_IN_URLS = re.compile(r"[\x00-\x20\x7f]")
+
+
+def _safe_url(url):
+    try:
+        scheme = urlsplit(_IGNORED_IN_URLS.sub("", html.unescape(url))).scheme
+    except ValueError:
+        return False
+    return scheme.lower() in SAFE_SCHEMES
+
+
+class _SafeUrls(Treeprocessor):
+    def run(self, root):
+        for element in root.iter():
+            for attribute in ("href", "src"):
+                url = element.get(attribute)
+                if url is not None and not _safe_url(url):
+                    element.set(attribute, "")
+
+
+class _Sanitize(Extension):
+    def extendMarkdown(self, md):
+        md.preprocessors.deregister("html_block")
+        md.inlinePatterns.deregister("html")
+        # After every other tree processor, so no link is added later.
+        md.treeprocessors.register(_SafeUrls(md), "safe_urls", 0)
+
+
+def render_markdown(text):
+    return markdown.markdown(text or "", extensions=[*EXTENSIONS, _Sanitize()])
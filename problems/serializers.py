@@ -1,7 +1,19 @@
 from rest_framework import serializers
 from .models import Problem
 
-class ProblemSerializer(serializers.ModelSerializer):
+class ProblemDetailSerializer(serializers.ModelSerializer):
+    """The public problem page: rendered text and samples, no test data."""
     class Meta:
         model = Problem
-        fields = '__all__'
+        fields = [
+            'id', 'code', 'name', 'difficulty', 'tags', 'time_limit', 'memory_limit',
+            'statement_html', 'input_format_html', 'output_format_html', 'constraints_html',
+            'sample_input', 'sample_output', 'updated_at',
+        ]
+
+
+class ProblemListSerializer(serializers.ModelSerializer):
+    """Just what a row of the problem list shows."""
+    class Meta:
+        model = Problem
+        fields = ['id', 'code', 'name', 'difficulty', 'tags']
@@ -0,0 +1,95 @@
+"""
+Content-addressed storage for problem test data.
+
+Every test input and expected output is stored once, as a file named by the
+sha256 of its content under ``TESTDATA_ROOT``. A problem only keeps a
+manifest of those digests::
+
+    {"version": 3, "cases": [{"input": "<sha256>", "output": "<sha256>"}, ...]}
+
+The database (``TestBlob``) holds every blob, so test data uploaded through
+the web service reaches judge workers on other machines. ``TESTDATA_ROOT``
+is each machine's local cache of it, filled on demand by ``fetch_blob``;
+blobs are immutable, so a cached copy never goes stale. The judge links a
+case's files from the cache into the harness's private directory; the
+store itself is never visible to submitted code. ``version`` is bumped
+whenever the list of cases changes, which gives caches a cheap key for
+"same test data".
+"""
+import hashlib
+import os
+import uuid
+
+from django.conf import settings
+
+
+def blob_path(digest):
+    return os.path.join(settings.TESTDATA_ROOT, digest[:2], digest)
+
+
+def relative_path(digest):
+    return f"{digest[:2]}/{digest}"
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.chmod(tmp, 0o600)
+    os.replace(tmp, path)
+
+
+def cache_blob(content):
+    """Put ``content`` (str or bytes) in the local cache only; return its digest."""
+    if isinstance(content, str):
+        content = content.encode()
+    digest = hashlib.sha256(content).hexdigest()
+    path = blob_path(digest)
+    if not os.path.exists(path):
+        _write(path, content)
+    return digest
+
+
+def store_blob(content):
+    """Store ``content`` (str or bytes) and return its digest."""
+    from .models import TestBlob
+
+    if isinstance(content, str):
+        content = content.encode()
+    digest = cache_blob(content)
+    TestBlob.objects.bulk_create([TestBlob(digest=digest, content=content)], ignore_conflicts=True)
+    return digest
+
+
+def fetch_blob(digest):
+    """Local path of blob ``digest``, fetched from the database on a miss."""
+    path = blob_path(digest)
+    if not os.path.exists(path):
+        from .models import TestBlob
+
+        _write(path, bytes(TestBlob.objects.get(digest=digest).content))
+    return path
+
+
+def read_blob(digest):
+    with open(fetch_blob(digest), "rb") as f:
+        return f.read().decode(errors="replace")
+
+
+def build_manifest(cases, version, store=store_blob):
+    """Store ``[{"input": str, "output": str}, ...]`` and describe it."""
+    return {
+        "version": version,
+        "cases": [
+            {"input": store(case["input"]), "output": store(case["output"])}
+            for case in cases
+        ],
+    }
+
+
+def case_text(case):
+    """Return ``(input, output)`` of a manifest entry or an inline case."""
+    if "input" in case:
+        return read_blob(case["input"]), read_blob(case["output"])
+    return case["input_text"], case.get("output_text")
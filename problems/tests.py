@@ -1,3 +1,103 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, override_settings
 
-# Create your tests here.
+from .models import Problem
+from .rendering import render_markdown
+
+# Tests must not need Redis.
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class RenderMarkdownTests(SimpleTestCase):
+    def test_raw_html_is_shown_as_text(self):
+        self.assertEqual(render_markdown("<script>alert(1)</script>"), "<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>")
+        self.assertEqual(
+            render_markdown("Hi <img src=x onerror=alert(1)>"),
+            "<p>Hi &lt;img src=x onerror=alert(1)&gt;</p>",
+        )
+
+    def test_script_urls_are_dropped(self):
+        for text in (
+            "[x](javascript:alert(1))",
+            "[x](JavaScript:alert(1))",
+            # Browsers ignore the tab, and decode the reference first.
+            "[x](java&#x09;script:alert(1))",
+            "[x](data:text/html;base64,PHNjcmlwdD4=)",
+            "[x](vbscript:msgbox)",
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(render_markdown(text), '<p><a href="">x</a></p>')
+        self.assertEqual(
+            render_markdown("![i](data:image/svg+xml;base64,PHN2Zz4=)"),
+            '<p><img alt="i" src="" /></p>',
+        )
+
+    def test_safe_urls_are_kept(self):
+        self.assertEqual(
+            render_markdown("[a](https://example.com/x?y=1) [b](/problems/echo/) [c](mailto:judge@example.com)"),
+            '<p><a href="https://example.com/x?y=1">a</a> <a href="/problems/echo/">b</a>'
+            ' <a href="mailto:judge@example.com">c</a></p>',
+        )
+
+    def test_markdown_still_renders(self):
+        self.assertEqual(render_markdown("**n** is *odd*"), "<p><strong>n</strong> is <em>odd</em></p>")
+        self.assertEqual(render_markdown("```\n<b>1</b>\n```"), "<pre><code>&lt;b&gt;1&lt;/b&gt;\n</code></pre>")
+        self.assertIn("<td>2</td>", render_markdown("| a | b |\n|---|---|\n| 1 | 2 |"))
+        self.assertEqual(render_markdown(""), "")
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RenderOnSaveTests(TestCase):
+    def test_save_renders_every_markdown_field(self):
+        problem = Problem.objects.create(
+            code="echo", name="Echo", difficulty="Easy",
+            statement="Print *n*. <script>alert(1)</script>", constraints="[x](javascript:alert(1))",
+        )
+        problem.refresh_from_db()
+        self.assertEqual(problem.statement_html, "<p>Print <em>n</em>. &lt;script&gt;alert(1)&lt;/script&gt;</p>")
+        self.assertEqual(problem.constraints_html, '<p><a href="">x</a></p>')
+
+        problem.statement = "Print **n**."
+        problem.save(update_fields=["statement"])
+        problem.refresh_from_db()
+        self.assertEqual(problem.statement_html, "<p>Print <strong>n</strong>.</p>")
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ProblemListTagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for code, tags in (
+            ("knapsack", ["DP", "greedy"]),
+            ("paths", ["graphs", "dp"]),
+            ("flow", ["graphs"]),
+            ("sum", []),
+        ):
+            Problem.objects.create(code=code, name=code.title(), difficulty="Easy", tags=tags)
+        Problem.objects.create(code="secret", name="Secret", difficulty="Easy", tags=["dp"], is_contest_only=True)
+
+    def codes(self, query):
+        response = self.client.get("/api/problems/", query)
+        self.assertEqual(response.status_code, 200)
+        codes = [problem["code"] for problem in response.data["results"]]
+        self.assertEqual(response.data["count"], len(codes))
+        return sorted(codes)
+
+    def test_single_tag(self):
+        self.assertEqual(self.codes({"tag": "dp"}), ["knapsack", "paths"])
+        # Tags are matched normalized, and exactly rather than by substring.
+        self.assertEqual(self.codes({"tag": " Graphs "}), ["flow", "paths"])
+        self.assertEqual(self.codes({"tag": "graph"}), [])
+
+    def test_all_of_the_tags(self):
+        self.assertEqual(self.codes({"tags": "dp,graphs"}), ["paths"])
+        self.assertEqual(self.codes({"tag": ["dp", "greedy"]}), ["knapsack"])
+        # A repeated tag still only needs to be there once.
+        self.assertEqual(self.codes({"tags": "dp,DP"}), ["knapsack", "paths"])
+
+    def test_any_of_the_tags(self):
+        # "paths" carries both tags but is listed once.
+        self.assertEqual(self.codes({"tags": "dp,graphs", "match": "any"}), ["flow", "knapsack", "paths"])
+
+    def test_tags_combine_with_other_filters(self):
+        self.assertEqual(self.codes({"tags": "dp,graphs", "match": "any", "search": "pa"}), ["paths"])
+        self.assertEqual(self.codes({"tag": "dp", "difficulty": "hard"}), [])
@@ -1,25 +1,88 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import generics
-from .models import Problem
-from .serializers import ProblemSerializer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db.models import Count, Q
+from rest_framework.pagination import PageNumberPagination
+from .models import Problem, detail_version_key, normalize_tags
+from .serializers import ProblemDetailSerializer, ProblemListSerializer
+
+
+class ProblemPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
 
 
 class ProblemListView(generics.ListAPIView):
-    serializer_class = ProblemSerializer
+    """
+    Public problems, filtered by ``?difficulty=`` and by tags: ``?tag=dp``
+    matches that tag exactly, ``?tags=dp,graphs`` needs all of them, or
+    any of them with ``&match=any``. ``?search=`` keeps problems whose
+    name or one of whose tags contains the text.
+    """
+    serializer_class = ProblemListSerializer
+    pagination_class = ProblemPagination
 
     def get_queryset(self):
-        queryset = Problem.objects.filter(is_contest_only=False)
+        queryset = Problem.objects.filter(is_contest_only=False).only(
+            'id', 'code', 'name', 'difficulty', 'tags'
+        )
         difficulty = self.request.query_params.get("difficulty")
-        tag = self.request.query_params.get("tag")
+        search = self.request.query_params.get("search", "").strip()
+        tags = normalize_tags(
+            self.request.query_params.getlist("tag")
+            + self.request.query_params.get("tags", "").split(",")
+        )
 
         if difficulty:
             queryset = queryset.filter(difficulty__iexact=difficulty)
-        if tag:
-            queryset = queryset.filter(tags__icontains=tag)
+        if tags:
+            tagged = Problem.tag_index.through.objects.filter(tag__name__in=tags)
+            if self.request.query_params.get("match") != "any":
+                # Problems carrying every one of the tags.
+                tagged = (
+                    tagged.values('problem_id')
+                    .annotate(matched=Count('tag_id'))
+                    .filter(matched=len(tags))
+                )
+            queryset = queryset.filter(id__in=tagged.values('problem_id'))
+        if search:
+            # Tag names are stored normalized to lower case.
+            tagged = Problem.tag_index.through.objects.filter(tag__name__contains=search.lower())
+            queryset = queryset.filter(
+                Q(name__icontains=search) | Q(id__in=tagged.values('problem_id'))
+            )
+
+        return queryset.order_by('id')
 
-        return queryset
+class ProblemDetailView(APIView):
+    """
+    A problem's public page, served from the cache and built at most once
+    per saved version. Supports If-None-Match and If-Modified-Since.
+    """
 
-class ProblemDetailView(generics.RetrieveAPIView):
-    queryset = Problem.objects.all()
-    serializer_class = ProblemSerializer
-    lookup_field = 'code'  
+    def get(self, request, code):
+        version = cache.get(detail_version_key(code))
+        entry = cache.get(f"problem:detail:{code}:{version}") if version is not None else None
+        if entry is None:
+            problem = get_object_or_404(Problem, code=code)
+            version = problem.updated_at.timestamp()
+            cache.add(detail_version_key(code), version, timeout=None)
+            entry = {
+                "version": version,
+                "data": ProblemDetailSerializer(problem).data,
+            }
+            # Keyed by the version actually read, so a save racing this
+            # request can't leave stale data under the new version.
+            cache.set(f"problem:detail:{code}:{version}", entry, timeout=settings.PROBLEM_DETAIL_TTL)
 
+        etag = f'"{code}-{entry["version"]}"'
+        last_modified = int(entry["version"])
+        response = Response(entry["data"], headers={"ETag": etag, "Last-Modified": http_date(last_modified)})
+        # A 304 when the client's copy is current, otherwise ``response``.
+        return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
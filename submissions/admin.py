@@ -1,5 +1,58 @@
+import json
+
 from django.contrib import admin
-from submissions.models import Submission
+from submissions.models import RejudgeJob, Submission, SubmissionTestResult
+from submissions import rejudge
+
+
+class SubmissionTestResultInline(admin.TabularInline):
+    model = SubmissionTestResult
+    fields = ('case_index', 'verdict', 'cpu_time', 'wall_time', 'memory', 'output_size', 'output_digest')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Submission)
+class SubmissionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'problem', 'language', 'verdict', 'submitted_at', 'cached_from')
+    list_filter = ('verdict', 'language')
+    search_fields = ('user__username', 'problem__code')
+    raw_id_fields = ('user', 'problem', 'cached_from')
+    inlines = [SubmissionTestResultInline]
+    actions = ['rejudge']
+
+    @admin.action(description='Rejudge selected submissions')
+    def rejudge(self, request, queryset):
+        # Always runs the judge, even when a memoized verdict would match.
+        job = rejudge.start(
+            queryset,
+            description=f'{queryset.count()} selected submissions',
+            user=request.user,
+        )
+        self.message_user(request, f'Started rejudge job {job.id} for {job.total} submission(s).')
+
+
+@admin.register(RejudgeJob)
+class RejudgeJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'description', 'status', 'done', 'total', 'created_by', 'created_at')
+    list_filter = ('status',)
+    readonly_fields = ('description', 'created_by', 'status', 'rate_per_minute', 'total', 'done',
+                       'created_at', 'finished_at', 'report')
+    actions = ['cancel']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Report')
+    def report(self, obj):
+        return json.dumps(rejudge.report(obj), indent=2, ensure_ascii=False)
 
-# Register your models here.
-admin.site.register(Submission)
+    @admin.action(description='Cancel selected rejudge jobs')
+    def cancel(self, request, queryset):
+        for job in queryset:
+            rejudge.cancel(job)
+        self.message_user(request, f'Cancelled {queryset.count()} job(s).')
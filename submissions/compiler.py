@@ -0,0 +1,123 @@
+"""
+Compile step of the judge and the compiled-artifact cache.
+
+A submission is compiled once, before any test case runs, and whatever the
+compiler leaves behind (see ``executor.ARTIFACTS``) is stored in a
+content-addressed directory keyed on the language, the toolchain that
+compiled it (the image digest under docker) and the source itself.
+Resubmissions and "Run" clicks with identical code restore the artifacts into
+the sandbox instead of invoking the compiler. The cache lives on the local filesystem so every worker process on
+a box shares it; the least recently used entries are evicted once it grows
+past ``JUDGE_ARTIFACT_CACHE_MAX_BYTES``.
+"""
+import glob
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import uuid
+
+from django.conf import settings
+
+from .executor import ARTIFACTS, COMPILE_COMMANDS, SOURCE_FILES
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_key(language, toolchain, source):
+    h = hashlib.sha256()
+    h.update(f"{language}\0{toolchain}\0".encode())
+    h.update(source.encode())
+    return h.hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _entry(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def restore(self, key, dest):
+        """Copy a cached entry into ``dest``. Returns False on a miss."""
+        entry = self._entry(key)
+        try:
+            for name in os.listdir(entry):
+                shutil.copy2(os.path.join(entry, name), os.path.join(dest, name))
+            # The entry's mtime doubles as its LRU timestamp.
+            os.utime(entry)
+        except OSError:
+            return False
+        return True
+
+    def store(self, key, src, patterns):
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return
+        tmp = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(tmp)
+            for pattern in patterns:
+                for path in glob.glob(os.path.join(src, pattern)):
+                    shutil.copy2(path, tmp)
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            os.rename(tmp, entry)
+        except OSError as e:
+            # Most likely another worker stored the same key first.
+            logger.debug("Could not cache artifacts for %s: %s", key, e)
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for entry in glob.glob(os.path.join(self.root, "??", "*")):
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(entry))
+                entries.append((os.stat(entry).st_mtime, size, entry))
+            except OSError:
+                continue
+            total += size
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, entry = entries.pop(0)
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+def get_cache():
+    if not settings.JUDGE_ARTIFACT_CACHE_ENABLED:
+        return None
+    return ArtifactCache(
+        settings.JUDGE_ARTIFACT_CACHE_DIR,
+        settings.JUDGE_ARTIFACT_CACHE_MAX_BYTES,
+    )
+
+
+def compile_source(box, language, source):
+    """
+    Prepare ``source`` for running in ``box``.
+
+    Returns ``None`` on success or the compiler's diagnostics on a
+    compilation error.
+    """
+    box.write_file(SOURCE_FILES[language], source)
+
+    cache = get_cache()
+    key = artifact_key(language, box.toolchain(), source) if cache else None
+    if cache and cache.restore(key, box.path):
+        return None
+
+    try:
+        result = box.run(COMPILE_COMMANDS[language], timeout=settings.JUDGE_COMPILE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return f"Compilation timed out after {settings.JUDGE_COMPILE_TIMEOUT} seconds"
+    if result.returncode != 0:
+        return (result.stderr or result.stdout).decode(errors="replace").strip()
+
+    if cache:
+        cache.store(key, box.path, ARTIFACTS[language])
+    return None
@@ -0,0 +1,50 @@
+"""
+Live judge events for a submission, over Redis pub/sub.
+
+The judge publishes to ``submission:<id>`` as it goes::
+
+    {"type": "judging", "cases": 12}
+    {"type": "case", "case": 0, "status": "OK", "cpu_time": 0.01, "memory": 9120}
+    {"type": "verdict", "verdict": "WA", "time_taken": 0.01, "memory_used": 9120}
+    {"type": "feedback"}
+
+``SubmissionEventsView`` relays them to the browser as server-sent events.
+Publishing is best effort: a missing or unreachable Redis never fails a
+judge run, and clients fall back to polling the slim status endpoint
+(``VerdictStatusView``, see submissions.status).
+"""
+import json
+import logging
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def channel(submission_id):
+    return f"submission:{submission_id}"
+
+
+@lru_cache(maxsize=None)
+def _client():
+    return redis.Redis.from_url(settings.SUBMISSION_EVENTS_URL)
+
+
+def publish(submission_id, event):
+    if not settings.SUBMISSION_EVENTS_URL:
+        return
+    try:
+        _client().publish(channel(submission_id), json.dumps(event))
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish event for submission {submission_id}: {e}")
+
+
+def verdict_event(submission):
+    return {
+        "type": "verdict",
+        "verdict": submission.verdict,
+        "time_taken": submission.time_taken,
+        "memory_used": submission.memory_used,
+    }
@@ -0,0 +1,840 @@
+"""
+Sandboxed code execution for the judge.
+
+``JUDGE_EXECUTOR`` picks how submissions are isolated. Every executor hands
+out a ``Sandbox``: a workspace directory plus a way to run commands in it,
+and everything above this module only talks to that.
+
+``docker`` runs submissions inside the per-language ``oj-*`` images.
+Creating and tearing down a container for every test case costs far more
+than running the case itself, so each worker process keeps a small pool of
+pre-started containers per image. A container is leased for one submission;
+when it comes back everything still running in it is killed and its
+workspace is wiped, and it is replaced after ``JUDGE_POOL_MAX_USES`` leases
+or as soon as it looks unhealthy or something survives the kill. When the
+pool is disabled, exhausted or docker refuses to start a container, the
+sandbox falls back to the old ``docker run --rm`` cold start. Both kinds of
+container have no network and are capped in memory and process count
+(``JUDGE_CONTAINER_MEMORY``, ``JUDGE_PIDS_LIMIT``).
+
+``local`` needs no docker daemon: commands are forked straight from the
+worker into fresh Linux namespaces, optionally chrooted into an unpacked
+copy of the image (``JUDGE_LOCAL_ROOTFS``), so starting one costs about as
+much as any other process.
+
+``fake`` runs nothing at all and makes up deterministic results (see
+``FakeSandbox``), for benchmarking the rest of the pipeline.
+"""
+import atexit
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from problems import testdata
+
+from . import harness
+
+logger = logging.getLogger(__name__)
+
+IMAGES = {
+    "python": "oj-python",
+    "cpp": "oj-cpp",
+    "java": "oj-java",
+}
+
+SOURCE_FILES = {
+    "python": "main.py",
+    "cpp": "main.cpp",
+    "java": "Main.java",
+}
+
+# Python has nothing to build, but byte-compiling it still turns syntax
+# errors into a compilation error instead of a failure on the first case.
+COMPILE_COMMANDS = {
+    "python": "python3 -m py_compile main.py",
+    "cpp": "g++ main.cpp -o main",
+    "java": "javac Main.java",
+}
+
+RUN_COMMANDS = {
+    "python": "python3 main.py",
+    "cpp": "./main",
+    "java": "java Main",
+}
+
+# The JVM reserves far more address space than it ever touches, so Java is
+# held to the memory limit through its heap size instead of RLIMIT_AS.
+JVM_RUN_COMMANDS = {
+    "java": "java -Xmx{memory_mb}m -Xss64m Main",
+}
+
+# Where the images install submissions/harness.py.
+HARNESS = "/harness.py"
+
+# Where the harness's private directory is mounted in docker.
+JUDGE_MOUNT = "/judge"
+
+# uid and gid programs run as under docker, and under the local executor
+# when the worker is root, so they can't read the harness's private
+# directory (nobody/nogroup).
+SANDBOX_USER = (65534, 65534)
+
+# Where the harness reports each case as it finishes.
+PROGRESS_FILE = "progress.jsonl"
+
+# The harness as the local executor runs it, on the worker itself.
+HOST_HARNESS = os.path.abspath(harness.__file__)
+
+LOCAL_PATH = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+
+# Glob patterns, relative to the workspace, of what a successful compile
+# leaves behind for the run step.
+ARTIFACTS = {
+    "python": [],
+    "cpp": ["main"],
+    "java": ["*.class"],
+}
+
+IMAGE_DIGEST_TTL = 300
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def image_digest(image):
+    """Return the image id of ``image``, or its name if docker can't say."""
+    now = time.monotonic()
+    with _digests_lock:
+        cached = _digests.get(image)
+        if cached and now - cached[1] < IMAGE_DIGEST_TTL:
+            return cached[0]
+    try:
+        result = subprocess.run(
+            ["docker", "image", "inspect", "-f", "{{.Id}}", image],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=10,
+        )
+    except (subprocess.SubprocessError, OSError):
+        return image
+    if result.returncode != 0:
+        return image
+    digest = result.stdout.decode().strip()
+    with _digests_lock:
+        _digests[image] = (digest, now)
+    return digest
+
+
+def container_options():
+    """``docker run`` flags shared by pooled and one-shot sandbox containers."""
+    return [
+        "--network", "none",
+        "--pids-limit", str(settings.JUDGE_PIDS_LIMIT),
+        "--memory", settings.JUDGE_CONTAINER_MEMORY,
+        "--memory-swap", settings.JUDGE_CONTAINER_MEMORY,
+        "--security-opt", "no-new-privileges",
+    ]
+
+
+def _follow(path, callback, done, interval=0.2):
+    """Pass each JSON line appended to ``path`` to ``callback`` until ``done``."""
+    position = 0
+    pending = b""
+    while True:
+        finished = done.is_set()
+        try:
+            with open(path, "rb") as f:
+                f.seek(position)
+                chunk = f.read()
+        except FileNotFoundError:
+            chunk = b""
+        position += len(chunk)
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            try:
+                callback(json.loads(line))
+            except Exception:
+                logger.exception("Progress callback failed")
+        if finished:
+            return
+        done.wait(interval)
+
+
+class Sandbox:
+    """
+    A workspace and a way to run commands against it.
+
+    The workspace ``root`` holds two directories. ``path`` is where the
+    program is compiled and run. ``private`` belongs to the harness: the
+    test data of the cases being judged, their outputs and progress. The
+    program under test must never be able to read it.
+    """
+
+    def __init__(self, image, root):
+        self.image = image
+        self.root = root
+        self.path = os.path.join(root, "app")
+        self.private = os.path.join(root, "judge")
+        # Set when a command was interrupted; the sandbox may still have
+        # stray processes running and must not be handed out again.
+        self.dirty = False
+
+    def toolchain(self):
+        """Identify the compilers behind this sandbox, for the artifact cache."""
+        raise NotImplementedError
+
+    def command(self, cmd):
+        raise NotImplementedError
+
+    def write_file(self, name, content):
+        file_path = os.path.join(self.path, name)
+        with open(file_path, "w") as f:
+            f.write(content)
+        os.chmod(file_path, 0o644)
+        return file_path
+
+    def run(self, cmd, stdin=None, timeout=10):
+        try:
+            return subprocess.run(
+                self.command(cmd),
+                input=stdin,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            self.dirty = True
+            raise
+
+    def read_file(self, name, limit=None):
+        with open(os.path.join(self.path, name), "rb") as f:
+            return f.read(limit).decode(errors="replace")
+
+    def read_output(self, name, limit=None):
+        """Read one of the files a harness result points at."""
+        with open(os.path.join(self.private, name), "rb") as f:
+            return f.read(limit).decode(errors="replace")
+
+    def _stage(self, index, case):
+        """Put case ``index``'s input and answer where only the harness sees them."""
+        spec = {"input": f"cases/{index}.in", "answer": None}
+        if "input" in case:
+            _place(testdata.fetch_blob(case["input"]), os.path.join(self.private, spec["input"]))
+            spec["answer"] = f"cases/{index}.ans"
+            _place(testdata.fetch_blob(case["output"]), os.path.join(self.private, spec["answer"]))
+            return spec
+        with open(os.path.join(self.private, spec["input"]), "w") as f:
+            f.write(case["input_text"])
+        if case.get("output_text") is not None:
+            spec["answer"] = f"cases/{index}.ans"
+            with open(os.path.join(self.private, spec["answer"]), "w") as f:
+                f.write(case["output_text"])
+        return spec
+
+    def _spec(self):
+        """Where the harness and the program run, for the harness spec."""
+        raise NotImplementedError
+
+    def _run_harness(self, spec, timeout):
+        raise NotImplementedError
+
+    def run_cases(self, language, cases, time_limit, memory_limit=None,
+                  stop_on_failure=True, jobs=1, on_progress=None):
+        """
+        Run every case in a single harness invocation.
+
+        ``cases`` holds either test-data manifest entries, whose ``input`` and
+        ``output`` digests name blobs in the test data store, or inline
+        ``{"input_text": ..., "output_text": ...}`` dicts. Either way they are
+        staged into the private directory for the harness. A case with no
+        expected output is run but not checked. ``time_limit`` is in CPU
+        seconds and ``memory_limit`` in bytes. Returns the harness's per-case
+        result dicts in case order (see ``read_output`` for their files);
+        with ``stop_on_failure`` the list ends at the first case that did not
+        pass. Up to ``jobs`` cases run at the same time. ``on_progress`` is
+        called from another thread with a short summary of each case as it
+        finishes.
+        """
+        os.makedirs(os.path.join(self.private, "cases"), exist_ok=True)
+        spec_cases = [self._stage(index, case) for index, case in enumerate(cases)]
+        command = RUN_COMMANDS[language]
+        if language in JVM_RUN_COMMANDS and memory_limit:
+            command = JVM_RUN_COMMANDS[language].format(memory_mb=memory_limit // (1024 * 1024))
+        spec = {
+            **self._spec(),
+            "command": command,
+            "cases": spec_cases,
+            "time_limit": time_limit,
+            "memory_limit": memory_limit,
+            "address_space": language not in JVM_RUN_COMMANDS,
+            "output_limit": settings.JUDGE_OUTPUT_LIMIT,
+            "preview": settings.JUDGE_OUTPUT_PREVIEW,
+            "stop_on_failure": stop_on_failure,
+            "jobs": jobs,
+            "progress": PROGRESS_FILE if on_progress else None,
+        }
+
+        if on_progress is not None:
+            done = threading.Event()
+            follower = threading.Thread(
+                target=_follow,
+                args=(os.path.join(self.private, PROGRESS_FILE), on_progress, done),
+                daemon=True,
+            )
+            follower.start()
+
+        # Worst case every case runs into the harness's wall clock limit.
+        rounds = -(-len(cases) // max(1, jobs))
+        timeout = rounds * (time_limit * 3 + 1) + 10
+        try:
+            result = self._run_harness(spec, timeout)
+        finally:
+            if on_progress is not None:
+                done.set()
+                follower.join()
+        if result.returncode != 0:
+            raise RuntimeError(
+                "Test harness failed: " + result.stderr.decode(errors="replace").strip()
+            )
+        return [json.loads(line) for line in result.stdout.decode().splitlines() if line]
+
+
+def _place(blob, dest):
+    """Link (or, across filesystems, copy) a test data blob to ``dest``."""
+    try:
+        os.link(blob, dest)
+    except OSError:
+        shutil.copyfile(blob, dest)
+
+
+class DockerSandbox(Sandbox):
+    """
+    A workspace bound to either a warm container or an image.
+
+    The workspace is mounted at /app and the private directory at /judge.
+    The harness runs as root in the container and starts the program as
+    ``SANDBOX_USER``, which can't enter /judge.
+    """
+
+    def __init__(self, image, root, container=None):
+        super().__init__(image, root)
+        self.container = container
+
+    def toolchain(self):
+        return image_digest(self.image)
+
+    def command(self, cmd):
+        if self.container is not None:
+            return ["docker", "exec", "-i", "-w", "/app", self.container.name, "sh", "-c", cmd]
+        return [
+            "docker", "run", "--rm", "-i", *container_options(),
+            *workspace_mounts(self.root),
+            "-w", "/app", self.image, "sh", "-c", cmd,
+        ]
+
+    def _spec(self):
+        return {"workdir": JUDGE_MOUNT, "cwd": "/app", "user": SANDBOX_USER}
+
+    def _run_harness(self, spec, timeout):
+        return self.run(f"python3 {HARNESS} -", stdin=json.dumps(spec).encode(), timeout=timeout)
+
+
+class LocalSandbox(Sandbox):
+    """
+    A workspace whose commands run as plain child processes of the worker.
+
+    Commands are started in a ``harness.Jail``: fresh mount, network, IPC,
+    UTS and PID namespaces, so they have no network, can't see or outlive
+    the rest of the worker's processes, and never as root: each box gets a
+    uid of its own (``LocalExecutor._user``), and a syscall filter where
+    libseccomp is installed. With a ``rootfs`` they are also chrooted
+    into that copy of the language image, with the workspace bound at
+    ``/app`` exactly as in docker. Without one they use the host's toolchain in place, which is
+    only fit for CI and tests.
+
+    The harness itself runs on the worker, outside the jail, and only puts
+    each case's program into one, so the private directory stays out of
+    its reach. Per-case rlimits are applied by the harness either way.
+    """
+
+    def __init__(self, image, root, rootfs=None, namespaces=True, user=SANDBOX_USER):
+        super().__init__(image, root)
+        self.rootfs = rootfs
+        self.namespaces = namespaces
+        self.user = user
+
+    def toolchain(self):
+        return f"local:{self.rootfs or 'host'}:{self.image}"
+
+    def command(self, cmd):
+        return ["sh", "-c", cmd]
+
+    def _environment(self):
+        # Never hand the worker's environment (database URL, API keys) to
+        # submitted code.
+        path = LOCAL_PATH if self.rootfs else os.environ.get("PATH", LOCAL_PATH)
+        return {"PATH": path, "HOME": "/tmp", "LANG": "C.UTF-8"}
+
+    def _jail(self):
+        return harness.Jail(
+            self.path,
+            root=self.rootfs,
+            namespaces=self.namespaces,
+            user=self.user,
+            hide=[self.private],
+            pids=settings.JUDGE_PIDS_LIMIT,
+            seccomp=settings.JUDGE_LOCAL_SECCOMP,
+        )
+
+    def _spawn(self, argv, stdin, timeout, cwd, jail=None):
+        proc = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            env=self._environment(),
+            preexec_fn=jail.enter if jail else None,
+            start_new_session=True,
+        )
+        try:
+            stdout, stderr = proc.communicate(stdin, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.dirty = True
+            if jail:
+                jail.kill(proc.pid)
+            else:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            proc.communicate()
+            raise
+        return subprocess.CompletedProcess(proc.args, proc.returncode, stdout, stderr)
+
+    def run(self, cmd, stdin=None, timeout=10):
+        return self._spawn(self.command(cmd), stdin, timeout, self.path, self._jail())
+
+    def _spec(self):
+        return {"workdir": self.private, "cwd": None, "user": None, "jail": self._jail().config()}
+
+    def _run_harness(self, spec, timeout):
+        return self._spawn(
+            [sys.executable, HOST_HARNESS, "-"], json.dumps(spec).encode(), timeout, self.private,
+        )
+
+
+class FakeSandbox(Sandbox):
+    """
+    A sandbox that runs nothing, for benchmarks and tests of the pipeline
+    around the judge.
+
+    The outcome is read from a ``oj-fake: <STATUS>`` marker in the source:
+    ``CE`` fails compilation, any harness status makes every case end that
+    way, and no marker means every case passes. Results are deterministic
+    and cost no more than writing the workspace files.
+    """
+
+    MARKER = re.compile(r"oj-fake:\s*(\w+)")
+    CPU_TIME = 0.001
+    MEMORY = 1024
+
+    def __init__(self, image, path, language):
+        super().__init__(image, path)
+        self.language = language
+
+    def toolchain(self):
+        return f"fake:{self.image}"
+
+    def _outcome(self):
+        match = self.MARKER.search(self.read_file(SOURCE_FILES[self.language]))
+        return match.group(1) if match else "OK"
+
+    def run(self, cmd, stdin=None, timeout=10):
+        failed = cmd == COMPILE_COMMANDS[self.language] and self._outcome() == "CE"
+        return subprocess.CompletedProcess(
+            cmd, 1 if failed else 0, b"", b"fake compilation error" if failed else b""
+        )
+
+    def run_cases(self, language, cases, time_limit, memory_limit=None,
+                  stop_on_failure=True, jobs=1, on_progress=None):
+        outcome = self._outcome()
+        out = os.path.join(self.private, "out")
+        os.makedirs(out, exist_ok=True)
+        results = []
+        for index, case in enumerate(cases):
+            for name in (f"{index}.out", f"{index}.err"):
+                open(os.path.join(out, name), "w").close()
+            result = {
+                "case": index,
+                "status": outcome,
+                "exit_code": 0 if outcome == "OK" else 1,
+                "signal": None,
+                "cpu_time": time_limit if outcome == "TLE" else self.CPU_TIME,
+                "wall_time": self.CPU_TIME,
+                "compare_time": 0.0,
+                "memory": self.MEMORY,
+                "output": f"out/{index}.out",
+                "stderr": f"out/{index}.err",
+                "digest": hashlib.sha256(b"").hexdigest(),
+                "output_size": 0,
+                "first_diff": {"line": 1, "column": 1} if outcome == "WA" else None,
+            }
+            results.append(result)
+            if on_progress is not None:
+                on_progress({key: result[key] for key in ("case", "status", "cpu_time", "memory")})
+            if stop_on_failure and outcome != "OK":
+                break
+        return results
+
+
+class PooledContainer:
+    def __init__(self, image):
+        self.image = image
+        self.name = f"oj-pool-{image}-{uuid.uuid4().hex[:12]}"
+        self.workdir = os.path.join(settings.JUDGE_WORKSPACE_ROOT, "pool", self.name)
+        self.uses = 0
+
+    def start(self):
+        _make_workspace(self.workdir)
+        subprocess.run(
+            [
+                "docker", "run", "-d", "--name", self.name,
+                "--label", "oj-pool=1", *container_options(),
+                *workspace_mounts(self.workdir), "-w", "/app",
+                self.image, "sleep", "infinity",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30,
+            check=True,
+        )
+
+    def is_healthy(self):
+        try:
+            result = subprocess.run(
+                ["docker", "inspect", "-f", "{{.State.Running}}", self.name],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=5,
+            )
+        except subprocess.TimeoutExpired:
+            return False
+        return result.returncode == 0 and result.stdout.strip() == b"true"
+
+    def _processes(self):
+        """Number of processes in the container, or None if docker can't say."""
+        result = subprocess.run(
+            ["docker", "top", self.name],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=5,
+        )
+        if result.returncode != 0:
+            return None
+        # One line per process under a header.
+        return len(result.stdout.splitlines()) - 1
+
+    def reset(self):
+        """
+        Get the container ready for another lease, or return False if it
+        can't be trusted with one.
+
+        Anything the last lease left running is killed: a program that
+        daemonized itself would otherwise see the next lease's source and
+        test data. Killed orphans stay behind as zombies of ``sleep``, so a
+        container with anything but its ``sleep`` left is thrown away
+        rather than reused. The workspace is then emptied so the next lease
+        starts from a clean /app.
+        """
+        try:
+            subprocess.run(
+                ["docker", "exec", "-u", "0", self.name, "sh", "-c", "kill -9 -1"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=10,
+            )
+            processes = self._processes()
+        except subprocess.TimeoutExpired:
+            processes = None
+        if processes != 1:
+            logger.warning("Not reusing %s: %s processes left over", self.name, processes)
+            return False
+        try:
+            # The directories themselves are what the container has mounted.
+            for directory in WORKSPACE_DIRS:
+                for entry in os.scandir(os.path.join(self.workdir, directory)):
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.unlink(entry.path)
+            return True
+        except OSError as e:
+            logger.warning("Could not reset %s: %s", self.name, e)
+            return False
+
+    def destroy(self):
+        try:
+            subprocess.run(
+                ["docker", "rm", "-f", self.name],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=30,
+            )
+        except subprocess.TimeoutExpired:
+            logger.warning("Timed out removing container %s", self.name)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class ContainerPool:
+    def __init__(self, image, size, max_uses):
+        self.image = image
+        self.size = size
+        self.max_uses = max_uses
+        self._idle = []
+        self._live = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return a healthy warm container, or None to signal a cold start."""
+        while True:
+            spawn = False
+            with self._lock:
+                if self._idle:
+                    container = self._idle.pop()
+                elif self._live < self.size:
+                    container = PooledContainer(self.image)
+                    self._live += 1
+                    spawn = True
+                else:
+                    return None
+
+            if not spawn:
+                if container.is_healthy():
+                    return container
+                logger.warning("Discarding unhealthy container %s", container.name)
+                self._discard(container)
+                continue
+
+            try:
+                container.start()
+                return container
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.warning("Could not start warm %s container: %s", self.image, e)
+                self._discard(container)
+                return None
+
+    def release(self, container, healthy=True):
+        container.uses += 1
+        if healthy and container.uses < self.max_uses and container.reset():
+            with self._lock:
+                self._idle.append(container)
+        else:
+            self._discard(container)
+
+    def _discard(self, container):
+        container.destroy()
+        with self._lock:
+            self._live -= 1
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for container in idle:
+            self._discard(container)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def limits_for(problem, language):
+    """Return ``(cpu seconds, bytes)`` for ``problem`` judged in ``language``."""
+    multipliers = settings.JUDGE_LANGUAGE_MULTIPLIERS.get(language, {})
+    time_limit = problem.time_limit * multipliers.get("time", 1)
+    memory_limit = int(problem.memory_limit * multipliers.get("memory", 1)) * 1024 * 1024
+    return time_limit, memory_limit
+
+
+def parallel_cases(problem, language, case_count):
+    """How many of ``problem``'s cases may run at once in ``language``."""
+    jobs = problem.max_parallel_cases or settings.JUDGE_PARALLEL_CASES.get(language, 1)
+    return max(1, min(jobs, settings.JUDGE_MAX_PARALLEL_CASES, case_count))
+
+
+def get_pool(image):
+    with _pools_lock:
+        if image not in _pools:
+            _pools[image] = ContainerPool(
+                image,
+                size=settings.JUDGE_POOL_SIZE,
+                max_uses=settings.JUDGE_POOL_MAX_USES,
+            )
+        return _pools[image]
+
+
+def shutdown_pools(**kwargs):
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_pools)
+worker_process_shutdown.connect(shutdown_pools)
+
+
+# Subdirectories of a workspace (see Sandbox) and their modes. The private
+# one is closed to everyone but its owner, which programs never run as.
+WORKSPACE_DIRS = {"app": 0o755, "judge": 0o700}
+
+
+def _make_workspace(root):
+    for directory, mode in {"": 0o755, **WORKSPACE_DIRS}.items():
+        path = os.path.join(root, directory)
+        os.makedirs(path, exist_ok=True)
+        os.chmod(path, mode)
+
+
+def _workspace():
+    path = os.path.join(settings.JUDGE_WORKSPACE_ROOT, str(uuid.uuid4()))
+    _make_workspace(path)
+    return path
+
+
+def workspace_mounts(root):
+    """``docker run`` flags mounting the workspace ``root`` into a container."""
+    return [
+        "-v", f"{os.path.join(root, 'app')}:/app",
+        "-v", f"{os.path.join(root, 'judge')}:{JUDGE_MOUNT}",
+    ]
+
+
+class DockerExecutor:
+    @contextmanager
+    def sandbox(self, language):
+        image = IMAGES[language]
+        pool = get_pool(image) if settings.JUDGE_POOL_ENABLED else None
+        container = pool.acquire() if pool else None
+
+        if container is not None:
+            box = DockerSandbox(image, container.workdir, container)
+        else:
+            box = DockerSandbox(image, _workspace())
+
+        try:
+            yield box
+        finally:
+            if container is not None:
+                pool.release(container, healthy=not box.dirty)
+            else:
+                shutil.rmtree(box.root, ignore_errors=True)
+
+
+class LocalExecutor:
+    def __init__(self):
+        if not settings.JUDGE_LOCAL_ROOTFS and not (settings.DEBUG or os.getenv("CI")):
+            # Submissions would run on the worker's own filesystem and could
+            # read anything world-readable there.
+            raise ImproperlyConfigured(
+                "The local executor needs JUDGE_LOCAL_ROOTFS outside DEBUG and CI."
+            )
+        if settings.JUDGE_LOCAL_SECCOMP and not harness.seccomp_available():
+            logger.warning("libseccomp not found; local sandboxes run without a syscall filter")
+
+    @contextmanager
+    def _user(self):
+        """
+        A uid no other box on this host is using, held for the block.
+
+        RLIMIT_NPROC counts processes per uid host-wide, so boxes sharing
+        one would share JUDGE_PIDS_LIMIT too. Slot ``n`` is uid 65534 - n;
+        a lock file per slot keeps workers from picking the same one.
+        """
+        if os.getuid() != 0:
+            # Jails run as the worker's own uid; see harness.Jail.
+            yield SANDBOX_USER
+            return
+        directory = os.path.join(settings.JUDGE_WORKSPACE_ROOT, "uids")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        for slot in range(settings.JUDGE_LOCAL_SLOTS):
+            with open(os.path.join(directory, f"{slot}.lock"), "w") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                yield (SANDBOX_USER[0] - slot, SANDBOX_USER[1])
+                return
+        raise RuntimeError(
+            f"All {settings.JUDGE_LOCAL_SLOTS} sandbox uids are in use; raise JUDGE_LOCAL_SLOTS."
+        )
+
+    @contextmanager
+    def sandbox(self, language):
+        image = IMAGES[language]
+        rootfs = None
+        if settings.JUDGE_LOCAL_ROOTFS:
+            rootfs = os.path.join(settings.JUDGE_LOCAL_ROOTFS, image)
+            # Mount points for the workspace and what the jail mounts itself.
+            for name in ("app", "dev", "proc", "tmp"):
+                os.makedirs(os.path.join(rootfs, name), exist_ok=True)
+
+        with self._user() as user:
+            box = LocalSandbox(
+                image, _workspace(), rootfs=rootfs,
+                namespaces=settings.JUDGE_LOCAL_NAMESPACES, user=user,
+            )
+            if os.getuid() == 0:
+                # Compilers run as the box's user too and write their output here.
+                os.chown(box.path, *user)
+            try:
+                yield box
+            finally:
+                shutil.rmtree(box.root, ignore_errors=True)
+
+
+class FakeExecutor:
+    @contextmanager
+    def sandbox(self, language):
+        box = FakeSandbox(IMAGES[language], _workspace(), language)
+        try:
+            yield box
+        finally:
+            shutil.rmtree(box.root, ignore_errors=True)
+
+
+EXECUTORS = {
+    "docker": DockerExecutor,
+    "local": LocalExecutor,
+    "fake": FakeExecutor,
+}
+
+
+def get_executor(name=None):
+    return _executor(name or settings.JUDGE_EXECUTOR)
+
+
+@lru_cache(maxsize=None)
+def _executor(name):
+    return EXECUTORS[name]()
+
+
+def sandbox(language):
+    """Lease a sandbox for ``language`` for the duration of the block."""
+    return get_executor().sandbox(language)
@@ -0,0 +1,199 @@
+"""
+AI feedback on submissions.
+
+Feedback is produced by the ``generate_feedback`` task on its own
+low-priority ``feedback`` queue, never inside the judge. Responses are cached
+by problem, normalized source, verdict and error signature, so the same
+mistake submitted again doesn't cost another LLM round-trip. Calls to the
+backend are limited both in how many run at once and in how many start per
+minute, across all workers, through the shared cache.
+
+``FEEDBACK_BACKEND`` selects the model: ``gemini`` talks to the Gemini API,
+``stub`` returns canned text so everything can run without network access.
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from dotenv import load_dotenv
+
+from problems.testdata import case_text
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+ERROR_MESSAGE = "No feedback generated due to an error."
+
+PROMPT = """The following code failed a programming test.
+
+📘 Problem Statement:
+{statement}
+
+💻 Code in {lang}:
+{code}
+
+📥 Input:
+{input_data}
+
+📤 Expected Output:
+{output}
+
+❌ Error:
+{error}
+
+🤔 What could be the reason for the failure and how can the user fix it?
+Please give corrected code if possible.
+"""
+
+
+class FeedbackUnavailable(Exception):
+    """The backend could not produce feedback right now; worth retrying."""
+
+
+class GeminiBackend:
+    def __init__(self, model="models/gemini-1.5-flash-latest"):
+        self.model = model
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _model(name):
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        return genai.GenerativeModel(name)
+
+    def generate(self, prompt):
+        try:
+            response = self._model(self.model).generate_content(prompt)
+        except Exception as e:
+            logger.error("❌ Gemini AI Feedback error: %s", e)
+            raise FeedbackUnavailable(str(e)) from e
+        return response.text if hasattr(response, 'text') else "⚠️ Unexpected Gemini response format."
+
+
+class StubBackend:
+    def generate(self, prompt):
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:12]
+        return f"Stub feedback ({digest}): re-read the problem constraints and check edge cases."
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "stub": StubBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name=None):
+    return BACKENDS[name or settings.FEEDBACK_BACKEND]()
+
+
+def normalize_code(code):
+    """Drop trailing whitespace and blank lines so cosmetic edits share a key."""
+    lines = (line.rstrip() for line in code.replace("\r\n", "\n").split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def error_signature(error):
+    """The last non-empty line of an error, with numbers blanked out."""
+    lines = [line.strip() for line in (error or "").splitlines() if line.strip()]
+    if not lines:
+        return ""
+    return re.sub(r"\d+", "N", lines[-1])
+
+
+def cache_key(submission):
+    h = hashlib.sha256()
+    for part in (
+        str(submission.problem_id),
+        submission.language,
+        normalize_code(submission.code),
+        submission.verdict,
+        error_signature(submission.error),
+    ):
+        h.update(part.encode())
+        h.update(b"\0")
+    return f"feedback:{h.hexdigest()}"
+
+
+def build_prompt(submission):
+    problem = submission.problem
+    cases = problem.judge_cases()
+    input_data, output = case_text(cases[0]) if cases else ("", "")
+    return PROMPT.format(
+        statement=problem.statement,
+        lang=submission.language,
+        code=submission.code,
+        input_data=input_data,
+        output=output,
+        error=submission.error or "Wrong Answer",
+    )
+
+
+class Limiter:
+    """Cluster-wide concurrency and per-minute rate limit kept in the cache."""
+
+    INFLIGHT_KEY = "feedback:inflight"
+    # Slots held by a worker that died are released when the key expires.
+    INFLIGHT_TIMEOUT = 300
+
+    def __init__(self, max_concurrency, per_minute):
+        self.max_concurrency = max_concurrency
+        self.per_minute = per_minute
+
+    def acquire(self):
+        cache.add(self.INFLIGHT_KEY, 0, timeout=self.INFLIGHT_TIMEOUT)
+        if cache.incr(self.INFLIGHT_KEY) > self.max_concurrency:
+            self.release()
+            return False
+        window = f"feedback:rate:{int(time.time() // 60)}"
+        cache.add(window, 0, timeout=120)
+        if cache.incr(window) > self.per_minute:
+            self.release()
+            return False
+        return True
+
+    def release(self):
+        try:
+            cache.decr(self.INFLIGHT_KEY)
+        except ValueError:
+            # The key expired while we were holding the slot.
+            pass
+
+
+def get_limiter():
+    return Limiter(settings.FEEDBACK_MAX_CONCURRENCY, settings.FEEDBACK_RATE_PER_MINUTE)
+
+
+def cached_feedback(submission):
+    return cache.get(cache_key(submission))
+
+
+def generate_ai_feedback(submission):
+    """
+    Return feedback text for ``submission``, from the cache if possible.
+
+    Returns ``None`` when the limiter is full and raises
+    ``FeedbackUnavailable`` when the backend fails; the caller decides
+    whether to retry.
+    """
+    key = cache_key(submission)
+    feedback = cache.get(key)
+    if feedback is not None:
+        return feedback
+
+    limiter = get_limiter()
+    if not limiter.acquire():
+        return None
+    try:
+        feedback = get_backend().generate(build_prompt(submission))
+    finally:
+        limiter.release()
+
+    cache.set(key, feedback, timeout=settings.FEEDBACK_CACHE_TTL)
+    return feedback
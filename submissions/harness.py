@@ -0,0 +1,847 @@
+"""
+Test harness.
+
+Runs a compiled program against the test cases of one submission. Under
+docker this file is copied into every ``oj-*`` image as ``/harness.py`` and
+runs inside the sandbox as root; the ``local`` executor runs it on the
+worker itself and only puts the program into a ``Jail``. Either way it must
+only depend on the standard library. The run is described as JSON on
+stdin::
+
+    python3 /harness.py -
+
+    {
+        "command": "./main",          # how to start the program
+        "workdir": "/judge",          # private to the harness, see below
+        "cwd": "/app",                # where the program runs
+        "user": [65534, 65534],       # uid and gid the program runs as, or null
+        "jail": null,                 # local executor only, see Jail
+        "cases": [                    # stdin and expected stdout of each case,
+            {"input": "cases/0.in", "answer": "cases/0.ans"},   # relative to
+            {"input": "cases/1.in", "answer": null}             # workdir
+        ],
+        "time_limit": 2.0,            # CPU seconds per case
+        "memory_limit": 268435456,    # peak RSS in bytes per case, or null
+        "address_space": true,        # also cap the address space (not for JVMs)
+        "output_limit": 67108864,     # bytes of stdout (and of any file written)
+        "preview": 4096,              # bytes kept from each end of stdout
+        "stop_on_failure": true,
+        "jobs": 4,                    # cases run concurrently, default 1
+        "progress": "progress.jsonl"  # optional, see below
+    }
+
+The program must never see the expected answers, so they live only in
+``workdir`` next to everything else the harness writes, and the spec never
+touches the disk. The program can't reach ``workdir``: in docker it runs as
+``user``, which the judge keeps out of that directory, and under the local
+executor ``workdir`` is outside its jail. All it gets of the test data is
+its own case's input, as stdin.
+
+Cases are started in order on a pool of ``jobs`` workers. With
+``stop_on_failure``, once a case fails no further cases are started and any
+running case with a higher index is killed; cases with a lower index are
+allowed to finish, so the reported failure is always the lowest-index one no
+matter how the cases were scheduled. When all cases are done one JSON object
+per case is written to stdout, in case order, on its own line::
+
+    {"case": 0, "status": "OK", "exit_code": 0, "signal": null,
+     "cpu_time": 0.012, "wall_time": 0.015, "compare_time": 0.001,
+     "memory": 9120, "output": "out/0.out", "stderr": "out/0.err", "digest": "<sha256>",
+     "output_size": 2, "first_diff": null}
+
+``status`` is one of OK, WA, RE, TLE, MLE or OLE; ``cpu_time`` and
+``memory`` come from the case's rusage, ``memory`` being the peak RSS in KiB,
+``compare_time`` is the part of ``wall_time`` the harness spent comparing
+output, and ``output``/``stderr`` are paths relative to ``workdir``. With
+``stop_on_failure`` the list ends at the first failing case.
+
+If ``progress`` is set, a short line with ``case``, ``status``, ``cpu_time``
+and ``memory`` is appended to that file as soon as each case finishes, in
+completion order, so the judge can report progress before the run is over.
+Cases cancelled by an earlier failure are left out.
+
+Stdout is never stored whole. It is read from a pipe and fed straight into
+a whitespace-token comparator against the case's ``answer``. The program is
+killed on the first mismatching token (WA) or once it has written more than
+``output_limit`` bytes (OLE). Only the first and last ``preview`` bytes end
+up in ``out/<i>.out``; ``digest`` and ``output_size`` cover everything that
+was read. For a WA, ``first_diff`` holds the 1-based ``line`` and
+``column`` in the program's output where the first wrong token starts.
+"""
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import json
+import math
+import os
+import re
+import resource
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# Wall clock allowance on top of the CPU limit so programs that block on I/O
+# or sleep are still killed eventually.
+WALL_TIME_FACTOR = 3
+WALL_TIME_SLACK = 1.0
+
+# Interpreters and the C runtime map more than they touch, so the address
+# space cap sits above the RSS limit. Anything between the two is still
+# caught by the RSS check once the case finishes.
+ADDRESS_SPACE_SLACK = 64 * 1024 * 1024
+
+# What a runtime prints when an allocation fails under RLIMIT_AS or -Xmx.
+OUT_OF_MEMORY_MARKERS = (
+    b"MemoryError",
+    b"std::bad_alloc",
+    b"java.lang.OutOfMemoryError",
+)
+
+
+READ_SIZE = 1 << 16
+
+_TOKEN = re.compile(rb"\S+")
+_SPACE = re.compile(rb"\s")
+
+
+def _limits(limits):
+    def apply():
+        cpu = int(math.ceil(limits.time_limit))
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        # Stdout is a pipe, so this only caps stderr and files the program
+        # writes itself.
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limits.output_limit, limits.output_limit))
+        if limits.memory_limit and limits.address_space:
+            limit = limits.memory_limit + ADDRESS_SPACE_SLACK
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    return apply
+
+
+class Limits:
+    def __init__(self, spec):
+        self.time_limit = spec["time_limit"]
+        self.memory_limit = spec.get("memory_limit")
+        self.address_space = spec.get("address_space", True)
+        self.output_limit = spec.get("output_limit", 64 * 1024 * 1024)
+        self.preview = spec.get("preview", 4096)
+
+
+# From <sched.h>, <sys/mount.h> and <linux/prctl.h>.
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUTS = 0x04000000
+CLONE_NEWCGROUP = 0x02000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REMOUNT = 0x20
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+PR_SET_PDEATHSIG = 1
+PR_SET_DUMPABLE = 4
+PR_SET_NO_NEW_PRIVS = 38
+PR_SET_SECCOMP = 22
+SECCOMP_MODE_FILTER = 2
+# From <seccomp.h>.
+SCMP_ACT_ALLOW = 0x7FFF0000
+SCMP_ACT_ERRNO = 0x00050000
+SCMP_CMP_MASKED_EQ = 7
+
+# Syscalls a jailed program gets EPERM for: kernel interfaces no judged
+# program needs and that have a history of privilege escalations. A deny
+# list rather than an allow list, so every toolchain keeps working.
+SECCOMP_DENIED = (
+    "acct", "add_key", "bpf", "clock_adjtime", "clock_settime", "delete_module",
+    "finit_module", "fsconfig", "fsmount", "fsopen", "fspick", "init_module",
+    "io_uring_enter", "io_uring_register", "io_uring_setup", "ioperm", "iopl",
+    "kexec_file_load", "kexec_load", "keyctl", "lookup_dcookie", "mount",
+    "move_mount", "name_to_handle_at", "open_by_handle_at", "open_tree",
+    "perf_event_open", "pivot_root", "process_vm_readv", "process_vm_writev",
+    "ptrace", "quotactl", "reboot", "request_key", "setns", "settimeofday",
+    "swapoff", "swapon", "syslog", "umount2", "unshare", "userfaultfd", "vhangup",
+)
+# New namespaces, user namespaces above all, open up much of the kernel to
+# unprivileged code; clone gets EPERM for any of these flags.
+NAMESPACE_FLAGS = (
+    CLONE_NEWNS, CLONE_NEWUTS, CLONE_NEWIPC, CLONE_NEWUSER, CLONE_NEWPID,
+    CLONE_NEWNET, CLONE_NEWCGROUP,
+)
+
+# Where the workspace appears inside a root filesystem.
+APP_MOUNT = "/app"
+# Size of the jail's /tmp, which compilers use for intermediate files.
+TMP_SIZE = b"256m"
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+def _check(result):
+    if result != 0:
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code))
+
+
+class _ArgCmp(ctypes.Structure):
+    _fields_ = [
+        ("arg", ctypes.c_uint),
+        ("op", ctypes.c_int),
+        ("datum_a", ctypes.c_uint64),
+        ("datum_b", ctypes.c_uint64),
+    ]
+
+
+class _SockFprog(ctypes.Structure):
+    _fields_ = [("len", ctypes.c_ushort), ("filter", ctypes.c_void_p)]
+
+
+@lru_cache(maxsize=None)
+def _seccomp_program():
+    """
+    The jail's syscall filter as raw BPF, or None without libseccomp.
+
+    Built once in the parent: loading a ready program between fork and
+    exec then takes one prctl, and libseccomp only ever runs here.
+    Syscalls of other architectures, such as 32-bit ones on x86-64, kill
+    the program, so they can't be used to get around the filter.
+    """
+    name = ctypes.util.find_library("seccomp")
+    if name is None:
+        return None
+    try:
+        lib = ctypes.CDLL(name)
+    except OSError:
+        return None
+    lib.seccomp_init.restype = ctypes.c_void_p
+    lib.seccomp_init.argtypes = [ctypes.c_uint32]
+    lib.seccomp_release.argtypes = [ctypes.c_void_p]
+    lib.seccomp_syscall_resolve_name.argtypes = [ctypes.c_char_p]
+    lib.seccomp_rule_add_array.argtypes = [
+        ctypes.c_void_p, ctypes.c_uint32, ctypes.c_int, ctypes.c_uint, ctypes.POINTER(_ArgCmp),
+    ]
+    lib.seccomp_export_bpf.argtypes = [ctypes.c_void_p, ctypes.c_int]
+
+    def check(result):
+        # libseccomp returns negated error numbers instead of setting errno.
+        if result < 0:
+            raise OSError(-result, os.strerror(-result))
+
+    def deny(syscall, code, *conditions):
+        number = lib.seccomp_syscall_resolve_name(syscall.encode())
+        if number < 0:
+            # Not a syscall on this architecture.
+            return
+        array = (_ArgCmp * len(conditions))(*conditions)
+        check(lib.seccomp_rule_add_array(ctx, SCMP_ACT_ERRNO | code, number, len(conditions), array))
+
+    ctx = lib.seccomp_init(SCMP_ACT_ALLOW)
+    if not ctx:
+        return None
+    try:
+        for syscall in SECCOMP_DENIED:
+            deny(syscall, errno.EPERM)
+        for flag in NAMESPACE_FLAGS:
+            deny("clone", errno.EPERM, _ArgCmp(0, SCMP_CMP_MASKED_EQ, flag, flag))
+        # clone3 passes its flags in memory a filter can't read. ENOSYS
+        # makes the C library fall back to clone.
+        deny("clone3", errno.ENOSYS)
+        with tempfile.TemporaryFile() as f:
+            check(lib.seccomp_export_bpf(ctx, f.fileno()))
+            f.seek(0)
+            return f.read()
+    finally:
+        lib.seccomp_release(ctx)
+
+
+def seccomp_available():
+    """Whether jails get their syscall filter here."""
+    return _seccomp_program() is not None
+
+
+class Jail:
+    """
+    Fresh mount, network, IPC, UTS and PID namespaces for a command started
+    straight from the worker, optionally chrooted into ``root`` with ``app``
+    bound at /app. The root filesystem is read-only apart from /app and an
+    empty tmpfs at /tmp. Without a ``root`` the command runs in ``app`` on
+    the host's filesystem, with an empty tmpfs over each of the ``hide``
+    paths. Either way /proc only shows the jail's own processes.
+
+    ``enter`` runs in the child between fork and exec. A worker running as
+    root switches the command to ``user`` once the jail is set up; root
+    inside the jail could leave the chroot and open anything root owns.
+    Any other worker has no privileges to give up, so the command gets a
+    user namespace mapping only the worker's own ids to create the others
+    in, and loses the capabilities that gives it on exec. Either way it can
+    never gain privileges through exec, and can't have more than ``pids``
+    processes of its user at once. That cap counts every process of the
+    uid on the host, so each jail running at the same time needs a
+    ``user`` of its own; an unprivileged worker shares its uid with its
+    jails, and with that the cap, which only suits CI.
+
+    With ``seccomp`` and libseccomp installed, the command also runs under
+    a filter that refuses the syscalls in ``SECCOMP_DENIED`` and creating
+    namespaces (see ``seccomp_available``).
+
+    With namespaces the child stays outside the PID namespace as a
+    supervisor and the command runs as the second process inside it, under
+    a minimal init. When the command exits, the init exits too, and the
+    kernel kills whatever the command left running in the namespace,
+    however it detached. The supervisor then exits the way the command did,
+    so callers wait for it like for the command itself. Stop it with
+    ``kill`` rather than by signalling its process group, which the
+    command could have left.
+    """
+
+    def __init__(self, app, root=None, namespaces=True, user=None, hide=(), pids=None, seccomp=True):
+        self.app = app
+        self.root = root
+        self.namespaces = namespaces
+        self.user = user
+        self.hide = list(hide)
+        self.pids = pids
+        self.seccomp = seccomp
+        # Ready before the fork; see _seccomp_program.
+        self._filter = None
+        program = _seccomp_program() if seccomp else None
+        if program:
+            self._program = ctypes.create_string_buffer(program, len(program))
+            self._filter = _SockFprog(len(program) // 8, ctypes.addressof(self._program))
+
+    def config(self):
+        """The spec's ``jail`` entry for this jail."""
+        return {
+            "app": self.app,
+            "root": self.root,
+            "namespaces": self.namespaces,
+            "user": self.user,
+            "hide": self.hide,
+            "pids": self.pids,
+            "seccomp": self.seccomp,
+        }
+
+    @staticmethod
+    def protect():
+        """
+        Keep jailed programs from reading the calling process through /proc.
+
+        Unless the worker is root they run as the same user, which would
+        otherwise let them follow /proc/<pid>/cwd or read the memory of
+        whoever started them.
+        """
+        _check(_libc.prctl(PR_SET_DUMPABLE, 0, 0, 0, 0))
+
+    def kill(self, pid):
+        """Kill the command started by ``enter`` in child ``pid``, and all it started."""
+        try:
+            if self.namespaces:
+                # The supervisor takes the whole PID namespace down.
+                os.kill(pid, signal.SIGTERM)
+            else:
+                os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def enter(self):
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        privileged = os.getuid() == 0
+        if self.namespaces:
+            flags = CLONE_NEWNS | CLONE_NEWNET | CLONE_NEWIPC | CLONE_NEWUTS | CLONE_NEWPID
+            if not privileged:
+                flags |= CLONE_NEWUSER
+                # Forked from a protected process; /proc/self must be ours
+                # to write the id maps.
+                _check(_libc.prctl(PR_SET_DUMPABLE, 1, 0, 0, 0))
+            uid, gid = os.getuid(), os.getgid()
+            _check(_libc.unshare(flags))
+            if not privileged:
+                for name, content in (
+                    ("setgroups", "deny"),
+                    ("uid_map", "%d %d 1" % (uid, uid)),
+                    ("gid_map", "%d %d 1" % (gid, gid)),
+                ):
+                    with open("/proc/self/" + name, "w") as f:
+                        f.write(content)
+                _check(_libc.prctl(PR_SET_DUMPABLE, 0, 0, 0, 0))
+            _supervise()
+            # Keep mounts made from here on out of the worker's namespace.
+            _check(_libc.mount(None, b"/", None, MS_REC | MS_PRIVATE, None))
+        if self.root:
+            root = self.root.encode()
+            _check(_libc.mount(root, root, None, MS_BIND | MS_REC, None))
+            _check(_libc.mount(None, root, None, MS_BIND | MS_REMOUNT | MS_RDONLY, None))
+            for source, target, flags in ((self.app, APP_MOUNT, 0), ("/dev", "/dev", MS_REC)):
+                target = os.path.join(self.root, target.lstrip("/")).encode()
+                _check(_libc.mount(source.encode(), target, None, MS_BIND | flags, None))
+            _check(_libc.mount(b"tmpfs", os.path.join(root, b"tmp"), b"tmpfs",
+                               MS_NOSUID | MS_NODEV, b"mode=1777,size=" + TMP_SIZE))
+            _mount_proc(os.path.join(root, b"proc"))
+            os.chroot(self.root)
+            os.chdir(APP_MOUNT)
+        else:
+            if self.namespaces:
+                for path in self.hide:
+                    _check(_libc.mount(b"tmpfs", path.encode(), b"tmpfs", 0, b"size=4k"))
+                _mount_proc(b"/proc")
+            os.chdir(self.app)
+        if privileged and self.user:
+            uid, gid = self.user
+            os.setgroups([])
+            os.setgid(gid)
+            os.setuid(uid)
+        if self.pids:
+            resource.setrlimit(resource.RLIMIT_NPROC, (self.pids, self.pids))
+        _check(_libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0))
+        if self._filter is not None:
+            _check(_libc.prctl(PR_SET_SECCOMP, SECCOMP_MODE_FILTER, ctypes.byref(self._filter), 0, 0))
+
+
+def _fork():
+    pid = _libc.fork()
+    if pid < 0:
+        _check(pid)
+    return pid
+
+
+def _close_fds(keep):
+    os.closerange(0, keep)
+    os.closerange(keep + 1, os.sysconf("SC_OPEN_MAX"))
+
+
+def _supervise():
+    """
+    Fork the init of a just unshared PID namespace and, from it, the
+    command; return in the command. See ``Jail``.
+
+    Runs between fork and exec, so it forks through libc rather than
+    ``os.fork`` and its at-fork hooks.
+    """
+    signals = {signal.SIGTERM, signal.SIGCHLD}
+    signal.pthread_sigmask(signal.SIG_BLOCK, signals)
+    # Whoever started the supervisor may die without killing it.
+    _check(_libc.prctl(PR_SET_PDEATHSIG, signal.SIGTERM, 0, 0, 0))
+    status_read, status_write = os.pipe()
+    init = _fork()
+    if init == 0:
+        os.close(status_read)
+        supervisor = os.getppid()
+        _check(_libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0))
+        if os.getppid() != supervisor:
+            os._exit(1)
+        command = _fork()
+        if command == 0:
+            os.close(status_write)
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+            return
+        # The command's stdio and the exec error pipe stay open only in the
+        # command itself.
+        _close_fds(status_write)
+        _, status = os.waitpid(command, 0)
+        os.write(status_write, status.to_bytes(4, "little"))
+        os._exit(0)
+
+    os.close(status_write)
+    _close_fds(status_read)
+    while True:
+        if signal.sigwait(signals) == signal.SIGTERM:
+            os.kill(init, signal.SIGKILL)
+        if os.waitpid(init, os.WNOHANG)[0]:
+            break
+    data = os.read(status_read, 4)
+    # Nothing written means the init was killed before the command ended.
+    status = int.from_bytes(data, "little") if len(data) == 4 else signal.SIGKILL
+    if os.WIFEXITED(status):
+        os._exit(os.WEXITSTATUS(status))
+    sig = os.WTERMSIG(status)
+    try:
+        signal.signal(sig, signal.SIG_DFL)
+    except (OSError, ValueError):
+        pass
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, {sig})
+    os.kill(os.getpid(), sig)
+    os._exit(128 + sig)
+
+
+def _mount_proc(target):
+    """A /proc of the jail's own PID namespace; left empty where that's refused."""
+    try:
+        _check(_libc.mount(b"proc", target, b"proc", MS_NOSUID | MS_NODEV | MS_NOEXEC, None))
+    except PermissionError:
+        pass
+
+
+class Program:
+    """How the spec says to start the program under test."""
+
+    def __init__(self, spec):
+        self.argv = shlex.split(spec["command"])
+        self.cwd = spec.get("cwd")
+        self.user = spec.get("user")
+        self.jail = Jail(**spec["jail"]) if spec.get("jail") else None
+
+    def start(self, limits, stdin, stderr):
+        options = {}
+        if self.user is not None:
+            uid, gid = self.user
+            options = {"user": uid, "group": gid, "extra_groups": []}
+        apply_limits = _limits(limits)
+
+        def preexec():
+            if self.jail is not None:
+                self.jail.enter()
+            apply_limits()
+
+        return subprocess.Popen(
+            self.argv,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            cwd=self.cwd,
+            preexec_fn=preexec,
+            start_new_session=True,
+            **options
+        )
+
+    def kill(self, proc):
+        if self.jail is not None:
+            self.jail.kill(proc.pid)
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _out_of_memory(stderr_path):
+    with open(stderr_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        tail = f.read()
+    return any(marker in tail for marker in OUT_OF_MEMORY_MARKERS)
+
+
+def _advance(buf, start, end, line, column):
+    """Line and column of ``buf[end]`` given those of ``buf[start]``."""
+    newlines = buf.count(b"\n", start, end)
+    if newlines:
+        return line + newlines, end - buf.rfind(b"\n", start, end)
+    return line, column + end - start
+
+
+class Tokenizer:
+    """
+    Splits a byte stream fed in arbitrary chunks into whitespace-separated
+    tokens, handed out in pieces so no token ever has to be held whole.
+
+    ``feed`` returns ``(piece, line, column, first, last)`` tuples: ``piece``
+    is a run of one token's bytes from this chunk, ``line`` and ``column``
+    are where that token starts, and ``first``/``last`` say whether the
+    piece starts/ends it. A token running into the end of a chunk carries on
+    in the next one; with ``final`` the stream ends there.
+    """
+
+    def __init__(self):
+        # Position of the next byte.
+        self.line = 1
+        self.column = 1
+        # Start of the token the last chunk ended in, if it did.
+        self.token = None
+
+    def feed(self, data, final=False):
+        pieces = []
+        pos = 0
+        if self.token is not None:
+            match = _SPACE.search(data)
+            pos = match.start() if match else len(data)
+            last = match is not None or final
+            if pos or last:
+                pieces.append((data[:pos], *self.token, False, last))
+            self.column += pos
+            if last:
+                self.token = None
+        for match in _TOKEN.finditer(data, pos):
+            self.line, self.column = _advance(data, pos, match.start(), self.line, self.column)
+            pos = match.start()
+            last = match.end() < len(data) or final
+            pieces.append((match.group(), self.line, self.column, True, last))
+            if not last:
+                self.token = (self.line, self.column)
+        self.line, self.column = _advance(data, pos, len(data), self.line, self.column)
+        return pieces
+
+
+def _file_tokens(path):
+    tokenizer = Tokenizer()
+    parts = []
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_SIZE)
+            for piece, _, _, _, last in tokenizer.feed(chunk, final=not chunk):
+                parts.append(piece)
+                if last:
+                    yield b"".join(parts)
+                    parts = []
+            if not chunk:
+                return
+
+
+class Comparator:
+    """
+    Compares streamed output against an answer file token by token.
+
+    ``feed`` returns False as soon as the output can no longer match, after
+    which ``first_diff`` holds the output position of the offending token.
+    Output is checked piece by piece as it arrives, so a token fails the
+    moment it differs from or outgrows the expected one, and the output is
+    never buffered beyond the chunk at hand.
+    """
+
+    def __init__(self, answer_path):
+        self.expected = _file_tokens(answer_path)
+        self.output = Tokenizer()
+        # The expected token the output is in the middle of, and how many
+        # of its bytes have matched so far.
+        self.token = None
+        self.matched = 0
+        self.first_diff = None
+
+    def _check(self, pieces):
+        for piece, line, column, first, last in pieces:
+            if first:
+                self.token = next(self.expected, None)
+                self.matched = 0
+            end = self.matched + len(piece)
+            if (self.token is None or end > len(self.token)
+                    or self.token[self.matched:end] != piece
+                    or (last and end != len(self.token))):
+                self.first_diff = {"line": line, "column": column}
+                return False
+            self.matched = end
+        return True
+
+    def feed(self, data):
+        return self._check(self.output.feed(data))
+
+    def finish(self):
+        if not self._check(self.output.feed(b"", final=True)):
+            return False
+        if next(self.expected, None) is not None:
+            # Output ended early; point just past the last thing written.
+            self.first_diff = {"line": self.output.line, "column": self.output.column}
+            return False
+        return True
+
+
+class Capture:
+    """Keeps the head and tail of a stream and hashes all of it."""
+
+    def __init__(self, keep):
+        self.keep = keep
+        self.head = b""
+        self.tail = b""
+        self.size = 0
+        self.sha = hashlib.sha256()
+
+    def feed(self, data):
+        self.size += len(data)
+        self.sha.update(data)
+        if len(self.head) < self.keep:
+            room = self.keep - len(self.head)
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail = (self.tail + data)[-self.keep:]
+
+    def preview(self):
+        if self.size > 2 * self.keep:
+            return self.head + b"\n...\n" + self.tail
+        return self.head + self.tail
+
+
+def run_case(index, case, program, limits, on_start=None):
+    input_path = case["input"]
+    answer_path = case.get("answer")
+    output_path = os.path.join("out", "%d.out" % index)
+    stderr_path = os.path.join("out", "%d.err" % index)
+
+    comparator = Comparator(answer_path) if answer_path else None
+    capture = Capture(limits.preview)
+    stopped = None
+    compare_time = 0.0
+
+    with open(input_path, "rb") as fin, open(stderr_path, "wb") as ferr:
+        start = time.monotonic()
+        proc = program.start(limits, fin, ferr)
+        if on_start is not None:
+            on_start(index, proc)
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            program.kill(proc)
+
+        timer = threading.Timer(limits.time_limit * WALL_TIME_FACTOR + WALL_TIME_SLACK, kill)
+        timer.start()
+        try:
+            fd = proc.stdout.fileno()
+            for chunk in iter(lambda: os.read(fd, READ_SIZE), b""):
+                capture.feed(chunk)
+                if capture.size > limits.output_limit:
+                    stopped = "OLE"
+                elif comparator is not None:
+                    compare_start = time.monotonic()
+                    if not comparator.feed(chunk):
+                        stopped = "WA"
+                    compare_time += time.monotonic() - compare_start
+                if stopped:
+                    program.kill(proc)
+                    break
+            proc.stdout.close()
+            _, wait_status, usage = os.wait4(proc.pid, 0)
+        finally:
+            timer.cancel()
+        wall_time = time.monotonic() - start
+        # wait4 already reaped the child; keep Popen from trying again.
+        proc.returncode = 0
+
+    with open(output_path, "wb") as f:
+        f.write(capture.preview())
+
+    cpu_time = usage.ru_utime + usage.ru_stime
+    exit_code = os.WEXITSTATUS(wait_status) if os.WIFEXITED(wait_status) else None
+    sig = os.WTERMSIG(wait_status) if os.WIFSIGNALED(wait_status) else None
+
+    failed = stopped is None and (sig is not None or exit_code != 0)
+    # Python ignores SIGXFSZ and fails the write instead, so also look at
+    # how much stderr actually got through.
+    over_output = (stopped == "OLE" or sig == signal.SIGXFSZ
+                   or os.path.getsize(stderr_path) >= limits.output_limit)
+    memory_limit = limits.memory_limit
+    over_memory = memory_limit and usage.ru_maxrss * 1024 > memory_limit
+
+    if timed_out.is_set() or sig == signal.SIGXCPU or cpu_time > limits.time_limit:
+        status = "TLE"
+    elif over_memory or (failed and memory_limit and _out_of_memory(stderr_path)):
+        status = "MLE"
+    elif over_output:
+        status = "OLE"
+    elif stopped == "WA":
+        status = "WA"
+    elif failed:
+        status = "RE"
+    elif comparator is None:
+        status = "OK"
+    else:
+        compare_start = time.monotonic()
+        status = "OK" if comparator.finish() else "WA"
+        compare_time += time.monotonic() - compare_start
+
+    return {
+        "case": index,
+        "status": status,
+        "exit_code": exit_code,
+        "signal": sig,
+        "cpu_time": round(cpu_time, 4),
+        "wall_time": round(wall_time, 4),
+        "compare_time": round(compare_time, 4),
+        "memory": usage.ru_maxrss,
+        "output": output_path,
+        "stderr": stderr_path,
+        "digest": capture.sha.hexdigest(),
+        "output_size": capture.size,
+        "first_diff": comparator.first_diff if comparator is not None and status == "WA" else None,
+    }
+
+
+class Runner:
+    def __init__(self, cases, program, limits, stop_on_failure, progress=None):
+        self.cases = cases
+        self.program = program
+        self.limits = limits
+        self.stop_on_failure = stop_on_failure
+        # File that gets a line per finished case, as soon as it finishes.
+        self.progress = progress
+        self.failed = None
+        self.running = {}
+        self.lock = threading.Lock()
+
+    def _cancelled(self, index):
+        return self.stop_on_failure and self.failed is not None and index > self.failed
+
+    def _started(self, index, proc):
+        with self.lock:
+            self.running[index] = proc
+            if self._cancelled(index):
+                self.program.kill(proc)
+
+    def run(self, index):
+        with self.lock:
+            if self._cancelled(index):
+                return None
+        result = run_case(index, self.cases[index], self.program, self.limits, self._started)
+        with self.lock:
+            self.running.pop(index, None)
+            if result["status"] != "OK" and (self.failed is None or index < self.failed):
+                self.failed = index
+                if self.stop_on_failure:
+                    for other, proc in self.running.items():
+                        if other > index:
+                            self.program.kill(proc)
+            if self.progress is not None and not self._cancelled(index):
+                self.progress.write(json.dumps({
+                    key: result[key] for key in ("case", "status", "cpu_time", "memory")
+                }, separators=(",", ":")) + "\n")
+                self.progress.flush()
+        return result
+
+
+def main(spec_path):
+    if spec_path == "-":
+        spec = json.load(sys.stdin)
+    else:
+        with open(spec_path) as f:
+            spec = json.load(f)
+
+    program = Program(spec)
+    if program.jail is not None:
+        Jail.protect()
+    if spec.get("workdir"):
+        os.chdir(spec["workdir"])
+    os.makedirs("out", exist_ok=True)
+    progress = open(spec["progress"], "w") if spec.get("progress") else None
+    runner = Runner(
+        spec["cases"],
+        program,
+        Limits(spec),
+        spec.get("stop_on_failure", False),
+        progress,
+    )
+    jobs = max(1, spec.get("jobs", 1))
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(runner.run, range(len(spec["cases"]))))
+    if progress is not None:
+        progress.close()
+
+    for result in results:
+        if result is None:
+            break
+        sys.stdout.write(json.dumps(result, separators=(",", ":")) + "\n")
+        if runner.stop_on_failure and result["case"] == runner.failed:
+            break
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "-")
@@ -0,0 +1,226 @@
+"""
+The global leaderboard, maintained incrementally.
+
+A user's standing lives in ``UserStats`` and the problems behind it in
+``SolvedProblem``, one row per first accepted submission. When a
+submission is judged AC, ``record_ac`` inserts its ``SolvedProblem`` row;
+the unique constraint makes that the "first AC" test, so retries and
+concurrent workers can't count a problem twice. Only then are the user's
+points (100/200/300 by difficulty), solved count and total AC time bumped.
+
+Users are ranked by points, then problems solved, then by the lower
+average CPU time of their first ACs (to the millisecond), then by who
+registered first. The ranking is mirrored into a Redis sorted set at
+``LEADERBOARD_URL`` so a page of it or one user's rank costs a
+``ZRANGE``/``ZRANK`` instead of a scan. The sorted set only holds an
+ordering; names and numbers always come from ``UserStats``. Without Redis,
+or while the set is empty, the same queries run against the table's rank
+index.
+
+Rejudges that take an AC away call ``recount``; ``manage.py
+rebuild_leaderboard`` recomputes everything from the submissions and
+refills the sorted set. Migrations only fill the tables, so run it after
+deploying a change to the ranking.
+"""
+import logging
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from .models import SolvedProblem, Submission, UserStats
+
+logger = logging.getLogger(__name__)
+
+POINTS = {"Easy": 100, "Medium": 200, "Hard": 300}
+
+KEY = "leaderboard:global"
+# Solved counts and average times in milliseconds stay well below these,
+# so points, solved count and average time fit in one score, exactly as
+# long as points stay under 9 * 10**6.
+SOLVED_SCALE = 10 ** 4
+TIME_SCALE = 10 ** 5
+ORDERING = ("-points", "-solved_count", "avg_time", "user_id")
+
+
+@lru_cache(maxsize=None)
+def _client():
+    return redis.Redis.from_url(settings.LEADERBOARD_URL)
+
+
+def _member(user_id):
+    # Zero-padded so Redis' tie order (lexicographic) is by user id.
+    return f"{user_id:012d}"
+
+
+def _average(ac_time_total, solved_count):
+    return round(ac_time_total / solved_count, 3) if solved_count else 0
+
+
+def _score(stats):
+    # Ascending order in Redis, best first.
+    milliseconds = min(round(stats.avg_time * 1000), TIME_SCALE - 1)
+    return -(stats.points * SOLVED_SCALE + stats.solved_count) * TIME_SCALE + milliseconds
+
+
+def mirror(stats_list):
+    """Copy the standing of ``stats_list`` into the sorted set."""
+    if not settings.LEADERBOARD_URL or not stats_list:
+        return
+    try:
+        _client().zadd(KEY, {_member(stats.user_id): _score(stats) for stats in stats_list})
+    except redis.RedisError as e:
+        logger.warning(f"Could not update the leaderboard mirror: {e}")
+
+
+def record_ac(submission):
+    """
+    Count ``submission`` towards its author's standing if it is their first
+    AC on the problem. Returns whether anything changed.
+    """
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                SolvedProblem.objects.create(
+                    user_id=submission.user_id,
+                    problem_id=submission.problem_id,
+                    submission=submission,
+                    time_taken=submission.time_taken or 0,
+                )
+        except IntegrityError:
+            return False
+        UserStats.objects.get_or_create(user_id=submission.user_id)
+        UserStats.objects.filter(user_id=submission.user_id).update(
+            solved_count=F("solved_count") + 1,
+            points=F("points") + POINTS.get(submission.problem.difficulty, 0),
+            ac_time_total=F("ac_time_total") + (submission.time_taken or 0),
+        )
+        # The update holds the row lock, so nothing moves under this.
+        stats = UserStats.objects.get(user_id=submission.user_id)
+        stats.avg_time = _average(stats.ac_time_total, stats.solved_count)
+        stats.save(update_fields=["avg_time"])
+        transaction.on_commit(lambda: mirror([stats]))
+    return True
+
+
+def _first_accepted(submissions):
+    """First AC submission per (user, problem), oldest first."""
+    seen = set()
+    rows = (
+        submissions.filter(verdict="AC")
+        .order_by("submitted_at", "id")
+        .values_list("id", "user_id", "problem_id", "problem__difficulty", "time_taken", "submitted_at")
+    )
+    for row in rows.iterator(chunk_size=10000):
+        if (row[1], row[2]) not in seen:
+            seen.add((row[1], row[2]))
+            yield row
+
+
+def _rebuild(submissions, users=None):
+    solved = []
+    stats = {}
+    for submission_id, user_id, problem_id, difficulty, time_taken, submitted_at in _first_accepted(submissions):
+        solved.append(SolvedProblem(
+            user_id=user_id, problem_id=problem_id, submission_id=submission_id,
+            time_taken=time_taken or 0,
+        ))
+        entry = stats.setdefault(user_id, UserStats(user_id=user_id))
+        entry.solved_count += 1
+        entry.points += POINTS.get(difficulty, 0)
+        entry.ac_time_total += time_taken or 0
+    for entry in stats.values():
+        entry.avg_time = _average(entry.ac_time_total, entry.solved_count)
+
+    with transaction.atomic():
+        solved_rows = SolvedProblem.objects.all()
+        stats_rows = UserStats.objects.all()
+        if users is not None:
+            solved_rows = solved_rows.filter(user_id__in=users)
+            stats_rows = stats_rows.filter(user_id__in=users)
+        solved_rows.delete()
+        stats_rows.delete()
+        SolvedProblem.objects.bulk_create(solved, batch_size=1000)
+        UserStats.objects.bulk_create(stats.values(), batch_size=1000)
+    return list(stats.values())
+
+
+def recount(user_id):
+    """Recompute one user's standing from their submissions."""
+    stats = _rebuild(Submission.objects.filter(user_id=user_id), users=[user_id])
+    if not settings.LEADERBOARD_URL:
+        return
+    if stats:
+        mirror(stats)
+    else:
+        try:
+            _client().zrem(KEY, _member(user_id))
+        except redis.RedisError as e:
+            logger.warning(f"Could not update the leaderboard mirror: {e}")
+
+
+def rebuild():
+    """Recompute every standing and the sorted set. Returns the user count."""
+    stats = _rebuild(Submission.objects.all())
+    if settings.LEADERBOARD_URL:
+        try:
+            _client().delete(KEY)
+        except redis.RedisError as e:
+            logger.warning(f"Could not clear the leaderboard mirror: {e}")
+            return len(stats)
+        for start in range(0, len(stats), 10000):
+            mirror(stats[start:start + 10000])
+    return len(stats)
+
+
+def _mirrored():
+    """Client for the sorted set, or None when it can't be used."""
+    if not settings.LEADERBOARD_URL:
+        return None
+    try:
+        client = _client()
+        return client if client.zcard(KEY) else None
+    except redis.RedisError as e:
+        logger.warning(f"Leaderboard mirror unavailable: {e}")
+        return None
+
+
+def page(offset, limit):
+    """``(total, [(rank, UserStats), ...])`` for one page of the ranking."""
+    client = _mirrored()
+    if client is None:
+        total = UserStats.objects.count()
+        rows = UserStats.objects.select_related("user").order_by(*ORDERING)[offset:offset + limit]
+        return total, list(enumerate(rows, start=offset + 1))
+
+    with client.pipeline(transaction=False) as pipe:
+        pipe.zcard(KEY)
+        pipe.zrange(KEY, offset, offset + limit - 1)
+        total, members = pipe.execute()
+    ids = [int(member) for member in members]
+    rows = UserStats.objects.select_related("user").in_bulk(ids)
+    return total, [
+        (rank, rows[user_id])
+        for rank, user_id in enumerate(ids, start=offset + 1)
+        if user_id in rows
+    ]
+
+
+def rank(user_id):
+    """1-based rank of ``user_id``, or None before their first AC."""
+    client = _mirrored()
+    if client is not None:
+        position = client.zrank(KEY, _member(user_id))
+        return None if position is None else position + 1
+
+    stats = UserStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        return None
+    return UserStats.objects.filter(
+        Q(points__gt=stats.points)
+        | Q(points=stats.points, solved_count__gt=stats.solved_count)
+        | Q(points=stats.points, solved_count=stats.solved_count, avg_time__lt=stats.avg_time)
+        | Q(points=stats.points, solved_count=stats.solved_count, avg_time=stats.avg_time, user_id__lt=user_id)
+    ).count() + 1
@@ -0,0 +1,76 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from submissions.compiler import compile_source
+from submissions.executor import EXECUTORS, get_executor
+
+PROGRAMS = {
+    "python": "print(sum(map(int, input().split())))\n",
+    "cpp": (
+        "#include <iostream>\n"
+        "int main() { long a, b; std::cin >> a >> b; std::cout << a + b << std::endl; }\n"
+    ),
+    "java": (
+        "import java.util.Scanner;\n"
+        "public class Main { public static void main(String[] args) {\n"
+        "    Scanner s = new Scanner(System.in);\n"
+        "    System.out.println(s.nextLong() + s.nextLong());\n"
+        "} }\n"
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = "Compare the spawn and judge cost of the sandbox executors."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--executors", default=",".join(EXECUTORS),
+                            help="Comma separated executors to compare.")
+        parser.add_argument("--language", default="python", choices=sorted(PROGRAMS))
+        parser.add_argument("--runs", type=int, default=20)
+        parser.add_argument("--cases", type=int, default=10)
+
+    def handle(self, *args, **options):
+        names = [name for name in options["executors"].split(",") if name]
+        for name in names:
+            if name not in EXECUTORS:
+                raise CommandError(f"Unknown executor: {name}")
+
+        language = options["language"]
+        cases = [
+            {"input_text": f"{i} {i}\n", "output_text": f"{2 * i}\n"}
+            for i in range(options["cases"])
+        ]
+        self.stdout.write(f"{'executor':<10} {'lease':>10} {'spawn':>10} {'judge':>10}  (median ms, {language})")
+        for name in names:
+            try:
+                lease, spawn, judge = self.measure(get_executor(name), language, cases, options["runs"])
+            except Exception as e:
+                self.stdout.write(f"{name:<10} failed: {e}")
+                continue
+            self.stdout.write(f"{name:<10} {lease:>10.2f} {spawn:>10.2f} {judge:>10.2f}")
+
+    def measure(self, executor, language, cases, runs):
+        """Median milliseconds to lease a sandbox, run `true` and judge ``cases``."""
+        lease, spawn, judge = [], [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            with executor.sandbox(language) as box:
+                leased = time.perf_counter()
+                box.run("true")
+                spawned = time.perf_counter()
+                error = compile_source(box, language, PROGRAMS[language])
+                if error is not None:
+                    raise CommandError(error)
+                # Compilation is cached after the first run; time only the cases.
+                judged = time.perf_counter()
+                results = box.run_cases(language, cases, time_limit=2)
+                if any(r["status"] != "OK" for r in results):
+                    raise CommandError(f"Unexpected results: {results}")
+                done = time.perf_counter()
+            lease.append(leased - start)
+            spawn.append(spawned - leased)
+            judge.append(done - judged)
+        return tuple(statistics.median(t) * 1000 for t in (lease, spawn, judge))
@@ -0,0 +1,259 @@
+import json
+import random
+import subprocess
+import time
+from collections import Counter, defaultdict
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils.timezone import now
+
+from problems.models import Problem
+from submissions import tasks
+from submissions.executor import EXECUTORS
+from submissions.models import Submission
+
+# Each program reads n and then n integers and prints their sum. The
+# "oj-fake" markers tell the fake executor how to behave; real sandboxes
+# see them as comments.
+PROGRAMS = {
+    "python": {
+        "AC": "import sys\ndata = sys.stdin.read().split()\nprint(sum(map(int, data[1:])))\n",
+        "WA": "# oj-fake: WA\nimport sys\ndata = sys.stdin.read().split()\nprint(sum(map(int, data[1:])) + 1)\n",
+        "TLE": "# oj-fake: TLE\nwhile True:\n    pass\n",
+        "CE": "# oj-fake: CE\ndef main(:\n    pass\n",
+    },
+    "cpp": {
+        "AC": (
+            "#include <cstdio>\n"
+            "int main() { long long n, x, s = 0; scanf(\"%lld\", &n);\n"
+            "  while (n-- > 0 && scanf(\"%lld\", &x) == 1) s += x; printf(\"%lld\\n\", s); }\n"
+        ),
+        "WA": (
+            "// oj-fake: WA\n#include <cstdio>\n"
+            "int main() { long long n, x, s = 1; scanf(\"%lld\", &n);\n"
+            "  while (n-- > 0 && scanf(\"%lld\", &x) == 1) s += x; printf(\"%lld\\n\", s); }\n"
+        ),
+        "TLE": "// oj-fake: TLE\nint main() { volatile int x = 0; for (;;) x++; }\n",
+        "CE": "// oj-fake: CE\nint main() { return undefined_name; }\n",
+    },
+    "java": {
+        "AC": (
+            "import java.io.*;\n"
+            "public class Main { public static void main(String[] a) throws IOException {\n"
+            "  StreamTokenizer in = new StreamTokenizer(new BufferedInputStream(System.in));\n"
+            "  in.nextToken(); long n = (long) in.nval, s = 0;\n"
+            "  for (long i = 0; i < n; i++) { in.nextToken(); s += (long) in.nval; }\n"
+            "  System.out.println(s); } }\n"
+        ),
+        "WA": (
+            "// oj-fake: WA\n"
+            "public class Main { public static void main(String[] a) { System.out.println(-1); } }\n"
+        ),
+        "TLE": "// oj-fake: TLE\npublic class Main { public static void main(String[] a) { for (;;) {} } }\n",
+        "CE": "// oj-fake: CE\npublic class Main { public static void main(String[] a) { int x = ; } }\n",
+    },
+}
+
+COMMENT = {"python": "#", "cpp": "//", "java": "//"}
+
+# Test set shape per size: number of cases and integers per case.
+SIZES = {
+    "small": (5, 10),
+    "large": (50, 10000),
+}
+
+STAGES = ("submit", "fetch", "workspace", "compile", "run", "save", "judge")
+# Stages the judge records in Submission.stage_times (see submissions.metrics).
+JUDGE_STAGES = ("fetch", "workspace", "compile", "run")
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+    }
+
+
+def test_cases(cases, numbers, rng):
+    result = []
+    for _ in range(cases):
+        values = [rng.randint(-10 ** 9, 10 ** 9) for _ in range(numbers)]
+        result.append({
+            "input": f"{numbers}\n{' '.join(map(str, values))}\n",
+            "output": f"{sum(values)}\n",
+        })
+    return result
+
+
+class Command(BaseCommand):
+    help = "Drive a synthetic corpus of submissions through the judge and report throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--executor", default="fake", choices=sorted(EXECUTORS))
+        parser.add_argument("--languages", default="python,cpp,java")
+        parser.add_argument("--kinds", default="AC,WA,TLE,CE")
+        parser.add_argument("--sizes", default=",".join(SIZES))
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="Submissions per language, kind and size.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--compare", help="Results JSON of an earlier run to compare against.")
+
+    def handle(self, *args, **options):
+        languages = options["languages"].split(",")
+        kinds = options["kinds"].split(",")
+        sizes = options["sizes"].split(",")
+        for language in languages:
+            if language not in PROGRAMS:
+                raise CommandError(f"Unknown language: {language}")
+        for kind in kinds:
+            if kind not in PROGRAMS["python"]:
+                raise CommandError(f"Unknown kind: {kind}")
+        for size in sizes:
+            if size not in SIZES:
+                raise CommandError(f"Unknown size: {size}")
+
+        self.samples = defaultdict(list)
+        rng = random.Random(options["seed"])
+        corpus = [
+            (language, kind, size)
+            for language in languages
+            for kind in kinds
+            for size in sizes
+            for _ in range(options["repeat"])
+        ]
+        rng.shuffle(corpus)
+
+        # Judge only: no live events, no feedback, and a private cache so
+        # nothing depends on (or pollutes) Redis.
+        with override_settings(
+            JUDGE_EXECUTOR=options["executor"],
+            SUBMISSION_EVENTS_URL="",
+            FEEDBACK_AUTO_VERDICTS=[],
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        ), self.timed_save(), transaction.atomic():
+            verdicts, mismatches, elapsed = self.run_corpus(corpus, sizes, rng)
+            # Leave no benchmark rows behind.
+            transaction.set_rollback(True)
+
+        results = {
+            "commit": self.commit(),
+            "created_at": now().isoformat(),
+            "executor": options["executor"],
+            "submissions": len(corpus),
+            "seconds": elapsed,
+            "submissions_per_second": len(corpus) / elapsed,
+            "verdicts": dict(verdicts),
+            "unexpected_verdicts": mismatches,
+            "stages": {stage: summarize(self.samples[stage]) for stage in STAGES if self.samples[stage]},
+        }
+        self.print_results(results)
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                self.print_comparison(json.load(f), results)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def run_corpus(self, corpus, sizes, rng):
+        user, _ = get_user_model().objects.get_or_create(username="bench-judge")
+        problems = {}
+        for size in sizes:
+            problem = Problem.objects.create(
+                name=f"Benchmark ({size})", code=f"BENCH-{size.upper()}",
+                statement="Print the sum of the numbers.", time_limit=1, memory_limit=256,
+            )
+            problem.set_test_cases(test_cases(*SIZES[size], rng))
+            problem.save()
+            problems[size] = problem
+
+        verdicts = Counter()
+        mismatches = 0
+        expected = {"AC": "AC", "WA": "WA", "TLE": "TLE", "CE": "CE"}
+        started = time.perf_counter()
+        for number, (language, kind, size) in enumerate(corpus):
+            # A unique line per submission so every one is compiled.
+            code = f"{COMMENT[language]} bench {number}\n{PROGRAMS[language][kind]}"
+            submit_start = time.perf_counter()
+            # bulk_create skips save(), which is timed as a judge stage.
+            [submission] = Submission.objects.bulk_create([Submission(
+                user=user, problem=problems[size], code=code, language=language,
+            )])
+            self.samples["submit"].append(time.perf_counter() - submit_start)
+
+            judge_start = time.perf_counter()
+            tasks.evaluate_submission.apply(args=(submission.id,))
+            self.samples["judge"].append(time.perf_counter() - judge_start)
+
+            verdict, stage_times = (
+                Submission.objects.values_list("verdict", "stage_times").get(id=submission.id)
+            )
+            for stage in JUDGE_STAGES:
+                if stage in stage_times:
+                    self.samples[stage].append(stage_times[stage] / 1000)
+            verdicts[verdict] += 1
+            if verdict != expected[kind]:
+                mismatches += 1
+        return verdicts, mismatches, time.perf_counter() - started
+
+    def timed_save(self):
+        """Time saving the verdict, which stage_times can't include."""
+        save = Submission.save
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return save(*args, **kwargs)
+            finally:
+                self.samples["save"].append(time.perf_counter() - start)
+
+        return mock.patch.object(Submission, "save", timed)
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=5,
+            ).stdout.decode().strip() or None
+        except (subprocess.SubprocessError, OSError):
+            return None
+
+    def print_results(self, results):
+        self.stdout.write(
+            f"{results['submissions']} submissions in {results['seconds']:.2f}s "
+            f"({results['submissions_per_second']:.1f}/s) on the {results['executor']} executor"
+        )
+        self.stdout.write(f"verdicts: {results['verdicts']}, unexpected: {results['unexpected_verdicts']}")
+        self.stdout.write(f"{'stage':<10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+        for stage, stats in results["stages"].items():
+            self.stdout.write(
+                f"{stage:<10} {stats['p50'] * 1000:>10.2f} {stats['p95'] * 1000:>10.2f} "
+                f"{stats['p99'] * 1000:>10.2f}"
+            )
+
+    def print_comparison(self, before, after):
+        self.stdout.write(f"compared with {before.get('commit') or 'previous run'}:")
+        change = after["submissions_per_second"] / before["submissions_per_second"] - 1
+        self.stdout.write(f"  throughput {change:+.1%}")
+        for stage, stats in after["stages"].items():
+            old = before["stages"].get(stage)
+            if not old:
+                continue
+            self.stdout.write(
+                f"  {stage:<10} p50 {stats['p50'] / old['p50'] - 1:+.1%}  "
+                f"p95 {stats['p95'] / old['p95'] - 1:+.1%}"
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from submissions import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's leaderboard standing from their submissions and refill the Redis ranking."
+
+    def handle(self, *args, **options):
+        users = leaderboard.rebuild()
+        self.stdout.write(f"Rebuilt the leaderboard for {users} user(s).")
@@ -0,0 +1,87 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from contests.models import Contest
+from submissions import rejudge
+from submissions.models import RejudgeJob, RejudgeStatus, Submission, Verdict
+
+
+class Command(BaseCommand):
+    help = "Rejudge submissions by problem, contest or filter, or show a rejudge report."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--problem", action="append", default=[], help="Problem code (repeatable).")
+        parser.add_argument("--contest", type=int, help="Submissions made to a contest's problems during it.")
+        parser.add_argument("--verdict", action="append", default=[], choices=Verdict.values)
+        parser.add_argument("--language")
+        parser.add_argument("--user", help="Username.")
+        parser.add_argument("--since", help="Only submissions made after this ISO datetime.")
+        parser.add_argument("--rate", type=int, help="Submissions per minute (default JUDGE_REJUDGE_RATE).")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the submissions.")
+        parser.add_argument("--wait", action="store_true", help="Follow progress and print the report.")
+        parser.add_argument("--report", type=int, metavar="JOB_ID", help="Print the report of an existing job.")
+
+    def handle(self, *args, **options):
+        if options["report"]:
+            try:
+                job = RejudgeJob.objects.get(id=options["report"])
+            except RejudgeJob.DoesNotExist:
+                raise CommandError(f"No rejudge job {options['report']}")
+            return self.print_report(job)
+
+        submissions, description = self.select(options)
+        if not description:
+            raise CommandError("Pass at least one of --problem, --contest, --verdict, --language, --user, --since")
+
+        count = submissions.exclude(verdict=Verdict.PENDING).count()
+        if options["dry_run"]:
+            self.stdout.write(f"Would rejudge {count} submissions ({description})")
+            return
+
+        job = rejudge.start(submissions, description=description, rate=options["rate"])
+        self.stdout.write(f"Started rejudge job {job.id}: {job.total} submissions ({description})")
+        if options["wait"]:
+            while job.status in (RejudgeStatus.QUEUED, RejudgeStatus.RUNNING):
+                time.sleep(5)
+                job.refresh_from_db()
+                self.stdout.write(f"  {job.done}/{job.total}")
+            self.print_report(job)
+
+    def select(self, options):
+        submissions = Submission.objects.all()
+        description = []
+        if options["problem"]:
+            submissions = submissions.filter(problem__code__in=options["problem"])
+            description.append("problems " + ", ".join(options["problem"]))
+        if options["contest"]:
+            try:
+                contest = Contest.objects.get(id=options["contest"])
+            except Contest.DoesNotExist:
+                raise CommandError(f"No contest {options['contest']}")
+            submissions = submissions.filter(
+                problem__contestproblem__contest=contest,
+                submitted_at__range=(contest.start_time, contest.end_time),
+            )
+            description.append(f"contest {contest.title}")
+        if options["verdict"]:
+            submissions = submissions.filter(verdict__in=options["verdict"])
+            description.append("verdicts " + ", ".join(options["verdict"]))
+        if options["language"]:
+            submissions = submissions.filter(language=options["language"])
+            description.append(options["language"])
+        if options["user"]:
+            submissions = submissions.filter(user__username=options["user"])
+            description.append(f"user {options['user']}")
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError(f"Invalid datetime: {options['since']}")
+            submissions = submissions.filter(submitted_at__gte=since)
+            description.append(f"since {options['since']}")
+        return submissions.distinct(), "; ".join(description)
+
+    def print_report(self, job):
+        self.stdout.write(json.dumps(rejudge.report(job), indent=2, ensure_ascii=False))
@@ -0,0 +1,129 @@
+"""
+Timing of the judge pipeline.
+
+``evaluate_submission`` wraps each of its stages in a span:
+
+- ``fetch``: loading the submission, its problem and the test manifest.
+- ``workspace``: leasing a sandbox and preparing its workspace.
+- ``compile``: compiling, or restoring cached artifacts.
+- ``run``: the whole harness invocation.
+- ``test``: one observation per test case, its wall time in the harness.
+- ``compare``: one observation per test case, the part of it spent
+  comparing output against the answer.
+- ``save``: writing the verdict.
+- ``feedback``: producing AI feedback (in ``generate_feedback``).
+
+The per-stage totals of a run are stored on the submission as
+``stage_times`` (milliseconds; ``save`` can't time itself into the row it is
+writing and is left out). Every observation also goes into a histogram kept
+in the shared cache, so the numbers from all workers add up in one place;
+``render`` formats them in the Prometheus text exposition format for the
+metrics endpoint, and ``render_queues`` adds gauges for the judge queues
+(``scheduling.queue_stats``).
+"""
+import bisect
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+STAGES = ("fetch", "workspace", "compile", "run", "test", "compare", "save", "feedback")
+
+# Upper bounds in seconds; the last bucket is +Inf.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+METRIC = "oj_judge_stage_seconds"
+
+# Gauge name, ``queue_stats`` field and help text of each queue metric.
+QUEUE_METRICS = (
+    ("oj_judge_queue_depth", "depth", "Messages waiting in each judge queue."),
+    ("oj_judge_queue_throughput_per_minute", "throughput_per_minute",
+     "Submissions each judge queue got through per minute, recently."),
+    ("oj_judge_queue_estimated_wait_seconds", "estimated_wait",
+     "Estimated wait of a new submission in each judge queue."),
+    ("oj_judge_queue_max_backlog", "max_backlog",
+     "Depth at which each judge queue refuses new submissions."),
+)
+
+
+def _bucket_key(stage, index):
+    return f"metrics:judge:{stage}:bucket:{index}"
+
+
+def _sum_key(stage):
+    return f"metrics:judge:{stage}:sum_us"
+
+
+class Spans:
+    """Stage timings of one judge run."""
+
+    def __init__(self):
+        self.observations = defaultdict(list)
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        self.observations[stage].append(seconds)
+
+    def breakdown(self):
+        """Milliseconds spent in each stage so far."""
+        return {
+            stage: round(sum(samples) * 1000, 3)
+            for stage, samples in self.observations.items()
+        }
+
+    def export(self):
+        """Add this run's observations to the shared histograms."""
+        counts = defaultdict(int)
+        for stage, samples in self.observations.items():
+            for seconds in samples:
+                counts[_bucket_key(stage, bisect.bisect_left(BUCKETS, seconds))] += 1
+            # The cache only counts in integers.
+            counts[_sum_key(stage)] += round(sum(samples) * 1e6)
+        for key, value in counts.items():
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, value)
+        self.observations.clear()
+
+
+def render():
+    """All stage histograms in the Prometheus text format."""
+    keys = [
+        key
+        for stage in STAGES
+        for key in [_sum_key(stage)] + [_bucket_key(stage, i) for i in range(len(BUCKETS) + 1)]
+    ]
+    values = cache.get_many(keys)
+    bounds = [str(bound) for bound in BUCKETS] + ["+Inf"]
+
+    lines = [
+        f"# HELP {METRIC} Time spent in each stage of judging a submission.",
+        f"# TYPE {METRIC} histogram",
+    ]
+    for stage in STAGES:
+        total = 0
+        for index, bound in enumerate(bounds):
+            total += values.get(_bucket_key(stage, index), 0)
+            lines.append(f'{METRIC}_bucket{{stage="{stage}",le="{bound}"}} {total}')
+        lines.append(f'{METRIC}_sum{{stage="{stage}"}} {values.get(_sum_key(stage), 0) / 1e6}')
+        lines.append(f'{METRIC}_count{{stage="{stage}"}} {total}')
+    return "\n".join(lines) + "\n"
+
+
+def render_queues(stats):
+    """Gauges of ``scheduling.queue_stats()`` in the Prometheus text format."""
+    lines = []
+    for metric, field, description in QUEUE_METRICS:
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} gauge"]
+        for queue, values in stats.items():
+            # Unknown estimates and unlimited backlogs are left out.
+            if values[field] is not None:
+                lines.append(f'{metric}{{queue="{queue}"}} {values[field]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0008_rejudge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='stage_times',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0009_submission_stage_times'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionTestResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('case_index', models.PositiveIntegerField()),
+                ('verdict', models.CharField(choices=[('PENDING', 'Pending'), ('AC', 'Accepted'), ('WA', 'Wrong Answer'), ('TLE', 'Time Limit Exceeded'), ('MLE', 'Memory Limit Exceeded'), ('OLE', 'Output Limit Exceeded'), ('RE', 'Runtime Error'), ('CE', 'Compilation Error')], max_length=10)),
+                ('cpu_time', models.FloatField()),
+                ('wall_time', models.FloatField()),
+                ('memory', models.IntegerField()),
+                ('output_digest', models.CharField(max_length=64)),
+                ('output_size', models.BigIntegerField()),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_results', to='submissions.submission')),
+            ],
+            options={
+                'ordering': ['submission', 'case_index'],
+                'constraints': [models.UniqueConstraint(fields=('submission', 'case_index'), name='unique_submission_case')],
+            },
+        ),
+    ]
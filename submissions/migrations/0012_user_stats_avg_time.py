@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 19:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0011_leaderboard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userstats',
+            name='user_stats_rank',
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='avg_time',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='userstats',
+            index=models.Index(fields=['-points', '-solved_count', 'avg_time', 'user'], name='user_stats_rank'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# Frozen copy of submissions.leaderboard.POINTS as of this migration.
+POINTS = {"Easy": 100, "Medium": 200, "Hard": 300}
+
+
+def rebuild_leaderboard(apps, schema_editor):
+    # Fills UserStats and SolvedProblem from the submissions judged before
+    # they existed. Only the tables: run ``manage.py rebuild_leaderboard``
+    # after deploying to refill the Redis ranking, which is ignored while
+    # empty.
+    Submission = apps.get_model('submissions', 'Submission')
+    SolvedProblem = apps.get_model('submissions', 'SolvedProblem')
+    UserStats = apps.get_model('submissions', 'UserStats')
+
+    rows = (
+        Submission.objects.filter(verdict='AC')
+        .order_by('submitted_at', 'id')
+        .values_list('id', 'user_id', 'problem_id', 'problem__difficulty', 'time_taken')
+    )
+    seen = set()
+    solved = []
+    stats = {}
+    for submission_id, user_id, problem_id, difficulty, time_taken in rows.iterator(chunk_size=10000):
+        if (user_id, problem_id) in seen:
+            continue
+        seen.add((user_id, problem_id))
+        solved.append(SolvedProblem(
+            user_id=user_id, problem_id=problem_id, submission_id=submission_id,
+            time_taken=time_taken or 0,
+        ))
+        entry = stats.setdefault(user_id, UserStats(user_id=user_id))
+        entry.solved_count += 1
+        entry.points += POINTS.get(difficulty, 0)
+        entry.ac_time_total += time_taken or 0
+    for entry in stats.values():
+        entry.avg_time = round(entry.ac_time_total / entry.solved_count, 3)
+
+    SolvedProblem.objects.all().delete()
+    UserStats.objects.all().delete()
+    SolvedProblem.objects.bulk_create(solved, batch_size=1000)
+    UserStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0012_user_stats_avg_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_leaderboard, migrations.RunPython.noop),
+    ]
@@ -9,6 +9,8 @@ class Verdict(models.TextChoices):
     ACCEPTED = 'AC', _('Accepted')
     WRONG_ANSWER = 'WA', _('Wrong Answer')
     TIME_LIMIT_EXCEEDED = 'TLE', _('Time Limit Exceeded')
+    MEMORY_LIMIT_EXCEEDED = 'MLE', _('Memory Limit Exceeded')
+    OUTPUT_LIMIT_EXCEEDED = 'OLE', _('Output Limit Exceeded')
     RUNTIME_ERROR = 'RE', _('Runtime Error')
     COMPILATION_ERROR = 'CE', _('Compilation Error')
 
@@ -39,17 +41,149 @@ class Submission(models.Model):
         default=Verdict.PENDING,
         db_index=True
     )
+    # Slowest case's CPU seconds and largest peak RSS in KiB.
     time_taken = models.FloatField(null=True, blank=True)
+    memory_used = models.IntegerField(null=True, blank=True)
+    # Per-case status, cpu_time, wall_time, memory and first_diff from the
+    # harness.
+    case_results = models.JSONField(default=list, blank=True)
+    # Milliseconds per judge stage; see submissions.metrics.
+    stage_times = models.JSONField(default=dict, blank=True)
     submitted_at = models.DateTimeField(auto_now_add=True, db_index=True)
     output = models.TextField(blank=True, null=True)
     error = models.TextField(blank=True, null=True)
     feedback = models.TextField(blank=True, null=True)
+    # Verdict memoization key; see submissions.verdict_cache.
+    source_hash = models.CharField(max_length=64, blank=True, default='')
+    test_version = models.PositiveIntegerField(null=True, blank=True)
+    cached_from = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    # Everything evaluate_submission writes, in its single save.
+    JUDGE_RESULT_FIELDS = (
+        'verdict', 'time_taken', 'memory_used', 'case_results', 'output', 'error',
+        'source_hash', 'test_version', 'stage_times', 'cached_from',
+    )
 
     class Meta:
         ordering = ['-submitted_at']
         indexes = [
             models.Index(fields=['user', 'problem']),
+            models.Index(fields=['problem', 'language', 'source_hash', 'test_version']),
         ]
 
     def __str__(self):
         return f"{self.user.username} → {self.problem.code} → {self.get_verdict_display()}"
+
+
+class SubmissionTestResult(models.Model):
+    """One test case of a judge run, written in bulk by the judge."""
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='test_results')
+    case_index = models.PositiveIntegerField()
+    verdict = models.CharField(max_length=10, choices=Verdict.choices)
+    # CPU and wall seconds, peak RSS in KiB.
+    cpu_time = models.FloatField()
+    wall_time = models.FloatField()
+    memory = models.IntegerField()
+    # sha256 and size of everything the program wrote to stdout.
+    output_digest = models.CharField(max_length=64)
+    output_size = models.BigIntegerField()
+
+    class Meta:
+        ordering = ['submission', 'case_index']
+        constraints = [
+            models.UniqueConstraint(fields=['submission', 'case_index'], name='unique_submission_case'),
+        ]
+
+    def __str__(self):
+        return f"{self.submission_id} #{self.case_index + 1}: {self.verdict}"
+
+
+class SolvedProblem(models.Model):
+    """A user's first accepted submission of a problem."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='solved_problems')
+    problem = models.ForeignKey(Problem, on_delete=models.CASCADE, related_name='+')
+    submission = models.ForeignKey(Submission, on_delete=models.SET_NULL, null=True, related_name='+')
+    time_taken = models.FloatField(default=0)
+    solved_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'problem'], name='unique_solved_problem'),
+        ]
+
+
+class UserStats(models.Model):
+    """Global leaderboard standing, kept up to date by submissions.leaderboard."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    solved_count = models.PositiveIntegerField(default=0)
+    points = models.PositiveIntegerField(default=0)
+    # Sum of the CPU time of each first accepted submission.
+    ac_time_total = models.FloatField(default=0)
+    # ac_time_total / solved_count, rounded to the millisecond: the last
+    # tiebreak of the ranking, stored so the ranking can use an index.
+    avg_time = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-points', '-solved_count', 'avg_time', 'user'], name='user_stats_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.points} points, {self.solved_count} solved"
+
+
+class RejudgeStatus(models.TextChoices):
+    QUEUED = 'QUEUED', _('Queued')
+    RUNNING = 'RUNNING', _('Running')
+    DONE = 'DONE', _('Done')
+    CANCELLED = 'CANCELLED', _('Cancelled')
+
+class RejudgeJob(models.Model):
+    description = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=RejudgeStatus.choices,
+        default=RejudgeStatus.QUEUED
+    )
+    # Submissions handed to the judge per minute.
+    rate_per_minute = models.PositiveIntegerField()
+    total = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Rejudge #{self.id}: {self.description or 'submissions'} ({self.done}/{self.total})"
+
+class RejudgeItem(models.Model):
+    job = models.ForeignKey(RejudgeJob, on_delete=models.CASCADE, related_name='items')
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='+')
+    old_verdict = models.CharField(max_length=10, choices=Verdict.choices)
+    new_verdict = models.CharField(max_length=10, choices=Verdict.choices, blank=True, default='')
+    dispatched = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'dispatched']),
+        ]
@@ -0,0 +1,88 @@
+"""
+Bulk rejudging.
+
+A ``RejudgeJob`` records the current verdict of every submission it covers
+and then feeds them to the judge on the ``judge_rejudge`` queue at the
+lowest priority, ``rate_per_minute`` at a time, so fresh submissions never
+wait behind it. Items are ordered by problem, language and source, so
+copies of the same code are judged back to back and find their compiled
+artifacts in the cache. Once the last item is judged the job is DONE and
+``report`` lists every submission whose verdict changed.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from .models import RejudgeItem, RejudgeJob, RejudgeStatus, Verdict
+
+
+def start(submissions, description="", user=None, rate=None):
+    """Create and start a job rejudging the ``submissions`` queryset."""
+    from .tasks import dispatch_rejudge
+
+    rows = (
+        submissions
+        # Pending submissions are about to be judged anyway.
+        .exclude(verdict=Verdict.PENDING)
+        .order_by("problem_id", "language", "source_hash", "id")
+        .values_list("id", "verdict")
+    )
+    with transaction.atomic():
+        job = RejudgeJob.objects.create(
+            description=description[:255],
+            created_by=user,
+            rate_per_minute=rate or settings.JUDGE_REJUDGE_RATE,
+        )
+        items = RejudgeItem.objects.bulk_create(
+            [RejudgeItem(job=job, submission_id=pk, old_verdict=verdict) for pk, verdict in rows],
+            batch_size=1000,
+        )
+        job.total = len(items)
+        if not items:
+            job.status = RejudgeStatus.DONE
+            job.finished_at = now()
+        job.save(update_fields=["total", "status", "finished_at"])
+        if items:
+            transaction.on_commit(lambda: dispatch_rejudge.delay(job.id))
+    return job
+
+
+def cancel(job):
+    """Stop handing out the rest of ``job``; items already queued still run."""
+    RejudgeJob.objects.filter(
+        id=job.id, status__in=[RejudgeStatus.QUEUED, RejudgeStatus.RUNNING]
+    ).update(status=RejudgeStatus.CANCELLED, finished_at=now())
+
+
+def item_finished(job_id):
+    RejudgeJob.objects.filter(id=job_id).update(done=F("done") + 1)
+    RejudgeJob.objects.filter(
+        id=job_id, status=RejudgeStatus.RUNNING, done__gte=F("total")
+    ).update(status=RejudgeStatus.DONE, finished_at=now())
+
+
+def report(job):
+    """
+    Summarize ``job``: how many verdicts moved from what to what, and which
+    submissions changed.
+    """
+    changed = []
+    transitions = Counter()
+    for item in job.items.exclude(new_verdict="").order_by("submission_id"):
+        transitions[f"{item.old_verdict}→{item.new_verdict}"] += 1
+        if item.new_verdict != item.old_verdict:
+            changed.append({
+                "submission": item.submission_id,
+                "old": item.old_verdict,
+                "new": item.new_verdict,
+            })
+    return {
+        "status": job.status,
+        "done": job.done,
+        "total": job.total,
+        "transitions": dict(transitions.most_common()),
+        "changed": changed,
+    }
@@ -0,0 +1,125 @@
+"""
+"Run" with custom input, executed off the request path.
+
+``RunCodeView`` only reserves a run id and queues ``execute_run`` on the
+``run`` queue, whose workers are the only ones touching a sandbox for custom
+runs. The result is kept in the cache under the run id until the client
+fetches it or ``JUDGE_RUN_RESULT_TTL`` passes. A user can have at most
+``JUDGE_RUN_MAX_PER_USER`` runs queued or running at once.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .compiler import compile_source
+from .executor import sandbox
+
+logger = logging.getLogger(__name__)
+
+# Slots of a run whose worker died are freed when the counter expires,
+# ACTIVE_TIMEOUT seconds after the user's last reserve or release.
+ACTIVE_TIMEOUT = 300
+
+
+def _result_key(run_id):
+    return f"run:{run_id}"
+
+
+def _active_key(user_id):
+    return f"run:active:{user_id}"
+
+
+def reserve(user_id):
+    """Return a new run id for ``user_id``, or None if they are at their limit."""
+    key = _active_key(user_id)
+    cache.add(key, 0, timeout=ACTIVE_TIMEOUT)
+    try:
+        active = cache.incr(key)
+    except ValueError:
+        # Expired between the add and the incr.
+        cache.add(key, 0, timeout=ACTIVE_TIMEOUT)
+        active = cache.incr(key)
+    cache.touch(key, ACTIVE_TIMEOUT)
+    if active > settings.JUDGE_RUN_MAX_PER_USER:
+        release(user_id)
+        return None
+    run_id = uuid.uuid4().hex
+    cache.set(
+        _result_key(run_id),
+        {"user": user_id, "status": "PENDING"},
+        timeout=settings.JUDGE_RUN_RESULT_TTL,
+    )
+    return run_id
+
+
+def release(user_id):
+    key = _active_key(user_id)
+    try:
+        active = cache.decr(key)
+    except ValueError:
+        # Already expired, which freed every slot.
+        return
+    if active < 0:
+        # Releases of runs reserved before the counter last expired.
+        cache.set(key, 0, timeout=ACTIVE_TIMEOUT)
+    else:
+        cache.touch(key, ACTIVE_TIMEOUT)
+
+
+def finish(run_id, user_id, result):
+    cache.set(
+        _result_key(run_id),
+        {"user": user_id, **result},
+        timeout=settings.JUDGE_RUN_RESULT_TTL,
+    )
+    release(user_id)
+
+
+def get_result(run_id, user_id):
+    """The run's state, or None if it doesn't exist or isn't ``user_id``'s."""
+    result = cache.get(_result_key(run_id))
+    if result is None or result["user"] != user_id:
+        return None
+    return result
+
+
+def execute(language, code, custom_input):
+    """Compile and run ``code`` on ``custom_input`` in a sandbox."""
+    with sandbox(language) as box:
+        compile_error = compile_source(box, language, code)
+        if compile_error is not None:
+            return {
+                "output": "",
+                "error": compile_error,
+                "status": "error"
+            }
+
+        result = box.run_cases(
+            language,
+            [{"input_text": custom_input}],
+            settings.JUDGE_RUN_TIME_LIMIT,
+            settings.JUDGE_RUN_MEMORY_LIMIT * 1024 * 1024,
+        )[0]
+        output = box.read_output(result["output"]).strip()
+        error = box.read_output(result["stderr"], 64 * 1024).strip()
+
+    if result["status"] == "TLE":
+        output = ""
+        error = f"Time Limit Exceeded ({settings.JUDGE_RUN_TIME_LIMIT:g} seconds)"
+        logger.warning("Code execution timed out")
+    elif result["status"] == "MLE":
+        error = f"Memory Limit Exceeded ({settings.JUDGE_RUN_MEMORY_LIMIT} MB)"
+    elif result["status"] == "OLE":
+        error = "Output Limit Exceeded"
+    elif result["status"] != "OK":
+        logger.warning(f"Execution failed with error: {error}")
+    else:
+        logger.info("Execution completed successfully")
+
+    return {
+        "output": output,
+        "error": error,
+        "status": "success" if not error else "error"
+    }
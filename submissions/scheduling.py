@@ -0,0 +1,164 @@
+"""
+Routing of judge work onto Celery queues.
+
+Submissions go to one of four queues, served by dedicated workers that can
+be sized independently (see docker-compose.yml):
+
+- ``judge_contest``: problems of a contest that is running right now.
+- ``judge``: everything else.
+- ``judge_retry``: re-deliveries after an infrastructure failure, so a flaky
+  sandbox can't hold up fresh submissions.
+- ``judge_rejudge``: bulk rejudges (submissions.rejudge), trickled in at the
+  lowest priority.
+
+Within a queue users get a fair share: a submission's priority drops by
+``JUDGE_FAIR_SHARE_STEP`` for every other submission its author still has
+pending, so a user spamming submits only pushes back their own work. The
+Redis transport serves priority 0 first and has ten levels.
+
+Admission control keeps bursts from piling up without bound: the judge
+counts finished submissions per queue and minute, which gives a recent
+throughput, and a submission is refused with a retry hint once its queue
+holds more than ``JUDGE_MAX_BACKLOG`` messages.
+"""
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+from kombu.exceptions import ChannelError
+
+from contests.models import ContestProblem
+from oj_backend.celery import app
+
+from .models import Submission
+
+logger = logging.getLogger(__name__)
+
+CONTEST_QUEUE = "judge_contest"
+DEFAULT_QUEUE = "judge"
+RETRY_QUEUE = "judge_retry"
+REJUDGE_QUEUE = "judge_rejudge"
+QUEUES = (CONTEST_QUEUE, DEFAULT_QUEUE, RETRY_QUEUE, REJUDGE_QUEUE)
+
+LOWEST_PRIORITY = 9
+
+
+def in_running_contest(problem):
+    current_time = now()
+    return ContestProblem.objects.filter(
+        problem=problem,
+        contest__start_time__lte=current_time,
+        contest__end_time__gte=current_time,
+    ).exists()
+
+
+def judge_queue(submission):
+    return CONTEST_QUEUE if in_running_contest(submission.problem) else DEFAULT_QUEUE
+
+
+def judge_priority(submission):
+    pending = (
+        Submission.objects
+        .filter(user_id=submission.user_id, verdict="PENDING")
+        .exclude(id=submission.id)
+        .count()
+    )
+    return min(LOWEST_PRIORITY, pending * settings.JUDGE_FAIR_SHARE_STEP)
+
+
+def enqueue_submission(submission, queue=None):
+    """Send ``submission`` to the judge on the queue and priority it deserves."""
+    from .tasks import evaluate_submission
+
+    queue = queue or judge_queue(submission)
+    priority = judge_priority(submission)
+    evaluate_submission.apply_async((submission.id,), queue=queue, priority=priority)
+    logger.info(f"Queued submission {submission.id} on {queue} with priority {priority}")
+
+
+# Last depth read of each queue in this process: queue -> (monotonic time, depth).
+_depths = {}
+
+
+def queue_depths(queues=QUEUES):
+    """
+    Number of messages waiting in each of ``queues``, as read from the
+    broker at most ``JUDGE_QUEUE_DEPTH_TTL`` seconds ago.
+    """
+    current = time.monotonic()
+    stale = [
+        queue for queue in queues
+        if queue not in _depths or current - _depths[queue][0] > settings.JUDGE_QUEUE_DEPTH_TTL
+    ]
+    if stale:
+        # A pooled connection; opening one per call costs a broker handshake.
+        with app.connection_or_acquire() as conn:
+            channel = conn.default_channel
+            for queue in stale:
+                try:
+                    depth = channel.queue_declare(queue, passive=True).message_count
+                except ChannelError:
+                    # The transport drops empty queues.
+                    depth = 0
+                _depths[queue] = (current, depth)
+    return {queue: _depths[queue][1] for queue in queues}
+
+
+def _judged_key(queue, minute):
+    return f"judge:judged:{queue}:{minute}"
+
+
+def record_judged(queue):
+    """Count one finished submission towards ``queue``'s throughput."""
+    key = _judged_key(queue, int(time.time() // 60))
+    cache.add(key, 0, timeout=(settings.JUDGE_THROUGHPUT_WINDOW + 1) * 60)
+    cache.incr(key)
+
+
+def throughput(queue):
+    """Submissions per second ``queue`` got through over the last few minutes."""
+    window = settings.JUDGE_THROUGHPUT_WINDOW
+    # The current minute is still filling up, so the window ends before it.
+    current = int(time.time() // 60)
+    keys = [_judged_key(queue, current - i) for i in range(1, window + 1)]
+    return sum(cache.get_many(keys).values()) / (window * 60)
+
+
+def estimated_wait(depth, rate):
+    """Seconds until ``depth`` messages are through at ``rate``, if known."""
+    if not rate:
+        return None
+    return math.ceil(depth / rate)
+
+
+def admission(queue):
+    """
+    Decide whether a new submission may join ``queue``.
+
+    Returns ``(admitted, seconds)``: the estimated wait in the queue when
+    admitted, otherwise how long the client should back off.
+    """
+    depth = queue_depths([queue])[queue]
+    rate = throughput(queue)
+    backlog = settings.JUDGE_MAX_BACKLOG.get(queue)
+    if backlog is not None and depth >= backlog:
+        retry_after = estimated_wait(depth - backlog + 1, rate)
+        return False, max(5, retry_after or settings.JUDGE_RETRY_AFTER)
+    return True, estimated_wait(depth, rate)
+
+
+def queue_stats():
+    """Depth, throughput and estimated wait of every judge queue."""
+    stats = {}
+    for queue, depth in queue_depths().items():
+        rate = throughput(queue)
+        stats[queue] = {
+            "depth": depth,
+            "throughput_per_minute": round(rate * 60, 2),
+            "estimated_wait": estimated_wait(depth, rate),
+            "max_backlog": settings.JUDGE_MAX_BACKLOG.get(queue),
+        }
+    return stats
@@ -1,8 +1,20 @@
 from rest_framework import serializers
-from .models import Submission
+from .models import Submission, SubmissionTestResult
 
 class SubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Submission
         fields = '__all__'
-        read_only_fields = ['verdict', 'time_taken', 'submitted_at','feedback']
+        read_only_fields = ['verdict', 'time_taken', 'memory_used', 'case_results', 'submitted_at','feedback']
+
+
+class SubmissionTestResultSerializer(serializers.ModelSerializer):
+    """Per-case results as the author sees them: no test data, no digests."""
+    class Meta:
+        model = SubmissionTestResult
+        fields = ['case_index', 'verdict', 'cpu_time', 'wall_time', 'memory']
+
+
+class StaffSubmissionTestResultSerializer(SubmissionTestResultSerializer):
+    class Meta(SubmissionTestResultSerializer.Meta):
+        fields = SubmissionTestResultSerializer.Meta.fields + ['output_digest', 'output_size']
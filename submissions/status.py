@@ -0,0 +1,65 @@
+"""
+Slim, cached submission status.
+
+Polling for a verdict only needs a few numbers, so the judge keeps a small
+record per submission in the cache::
+
+    {"id": 7, "user": 3, "verdict": "PENDING", "time_taken": null,
+     "memory_used": null, "cases_done": 4, "cases_total": 12}
+
+``VerdictStatusView`` answers from these records and only goes to
+the database for submissions it has no record for. ``user`` is there for
+the permission check and never returned.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Submission
+
+FIELDS = ("id", "user_id", "verdict", "time_taken", "memory_used")
+
+
+def _key(submission_id):
+    return f"submission:status:{submission_id}"
+
+
+def record(submission, cases_done=0, cases_total=None):
+    return {
+        "id": submission.id,
+        "user": submission.user_id,
+        "verdict": submission.verdict,
+        "time_taken": submission.time_taken,
+        "memory_used": submission.memory_used,
+        "cases_done": cases_done,
+        "cases_total": cases_total,
+    }
+
+
+def save(status):
+    cache.set(_key(status["id"]), status, timeout=settings.SUBMISSION_STATUS_TTL)
+
+
+def forget(submission_ids):
+    cache.delete_many([_key(submission_id) for submission_id in submission_ids])
+
+
+def get_many(submission_ids, user):
+    """Status records of ``user``'s submissions among ``submission_ids``, by id."""
+    cached = cache.get_many([_key(submission_id) for submission_id in submission_ids])
+    statuses = {status["id"]: status for status in cached.values()}
+
+    missing = [submission_id for submission_id in submission_ids if submission_id not in statuses]
+    if missing:
+        for submission in Submission.objects.filter(id__in=missing).only(*FIELDS):
+            status = record(submission)
+            # The judge may have written a record since the cache was read;
+            # that one is newer than the row and must not be overwritten.
+            if not cache.add(_key(submission.id), status, timeout=settings.SUBMISSION_STATUS_TTL):
+                status = cache.get(_key(submission.id), status)
+            statuses[submission.id] = status
+
+    return {
+        submission_id: {key: value for key, value in status.items() if key != "user"}
+        for submission_id, status in statuses.items()
+        if status["user"] == user.id
+    }
@@ -1,20 +1,24 @@
-import os
+import random
 import subprocess
-import uuid
-import time
 import logging
+from contextlib import ExitStack
 import markdown
 from django.conf import settings
-from .models import Submission
+from django.db import transaction
+from .models import RejudgeItem, RejudgeJob, RejudgeStatus, Submission, SubmissionTestResult
+from .executor import sandbox, limits_for, parallel_cases
+from .compiler import compile_source
+from .verdict_cache import source_hash
+from .metrics import Spans
+from .scheduling import LOWEST_PRIORITY, REJUDGE_QUEUE, RETRY_QUEUE, record_judged
+from . import events, leaderboard, rejudge, runs, status
+from .feedback import ERROR_MESSAGE, FeedbackUnavailable, generate_ai_feedback
 from problems.models import Problem
+from contests import scoreboard
 from celery import shared_task
-from dotenv import load_dotenv
-import google.generativeai as genai
 from django.core.exceptions import ObjectDoesNotExist
 from celery.exceptions import MaxRetriesExceededError
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))  
 logger = logging.getLogger(__name__)
 
 def check_db_connection():
@@ -26,159 +30,172 @@ def check_db_connection():
         return True
     except OperationalError:
         return False
+
+
+class CompilationError(Exception):
+    pass
+
+# Bytes of program stderr kept on the submission.
+ERROR_LIMIT = 64 * 1024
     
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=5)
 def evaluate_submission(self, submission_id):
     try:
-        try:
-            submission = Submission.objects.get(id=submission_id)
-        except ObjectDoesNotExist as exc:
-            print(f"Submission {submission_id} does not exist")
-            raise self.retry(exc=exc, countdown=5)  
-            
-        problem = submission.problem
-        statement = problem.statement
-        lang = submission.language
-        code = submission.code
-
-        test_cases = problem.test_cases or [
-            {"input": problem.sample_input, "output": problem.sample_output}
-        ]
-
-        base_path = os.path.join("/var/tmp/oj_temp", str(uuid.uuid4()))
-        #base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../oj_temp")
-        base_path = os.path.abspath(base_path)
-        os.makedirs(base_path, exist_ok=True)
-
-        run_id = str(uuid.uuid4())
-        folder_path = os.path.join(base_path, run_id)
-        os.makedirs(folder_path, exist_ok=True)
-
-        file_name = {
-            "python": "main.py",
-            "cpp": "main.cpp",
-            "java": "Main.java"
-        }[lang]
-
-        code_path = os.path.join(folder_path, file_name)
-        input_path = os.path.join(folder_path, "input.txt")
-
-        with open(code_path, "w") as f:
-            f.write(code)
-
-        try:
-            image = {
-                "python": "oj-python",
-                "cpp": "oj-cpp",
-                "java": "oj-java"
-            }[lang]
-
-            compile_cmds = {
-                "python": "",
-                "cpp": "g++ main.cpp -o main",
-                "java": "javac Main.java"
-            }
-
-            exec_cmds = {
-                "python": "cat input.txt | python3 main.py",
-                "cpp": "cat input.txt | ./main",
-                "java": "cat input.txt | java Main"
-            }
-
-            compile_cmd = compile_cmds[lang]
-            exec_cmd = exec_cmds[lang]
-            full_cmd = f"{compile_cmd} && {exec_cmd}" if compile_cmd else exec_cmd
-            print(f"Contents of {folder_path} before execution: {os.listdir(folder_path)}")
-            print(f"Input file exists: {os.path.exists(input_path)}")
-            command = (
-                f'docker run --rm -i -v "{folder_path}:/app" -w /app {image} '
-                f'sh -c "{full_cmd}"'
-            )
-
-            print(f"Image selected: {image}")
-            print("Folder path (host): %s", folder_path)
-            print("Docker command: %s", command)
-
-            all_passed = True
-            total_exec_time = 0
-            for index, case in enumerate(test_cases):
-                with open(input_path, "w") as f:
-                    print(f"Files in folder before Docker run: {os.listdir(folder_path)}")
-                    f.write(case["input"])
-                start_time = time.time()
-                result = subprocess.run(
-                    command,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    timeout=10
-                )
-                end_time = time.time()
-                elapsed = end_time - start_time
-                total_exec_time += elapsed
-                stdout = result.stdout.decode().strip()
-                stderr = result.stderr.decode().strip()
-
-                submission.output = stdout
-                submission.error = stderr
-
-                print("Test Case #%d", index + 1)
-                print("Input: %s", case["input"])
-                print("STDOUT: %s", stdout)
-                logger.error("STDERR: %s", stderr)
-
-                if stderr:
-                    if "error" in stderr.lower():
-                        submission.verdict = "CE"
-                    else:
-                        submission.verdict = "RE"
-                    all_passed = False
-                    break
-
-                if stdout != case["output"].strip():
-                    submission.verdict = "WA"
-                    all_passed = False
-                    break
-
-            if all_passed:
-                submission.verdict = "AC"
-                # In Django shell
-                submission.save()
-                print(f"Verdict saved: {submission.verdict}")
-
-                print("Verdict saved: %s", submission.verdict)
-            submission.time_taken = round(total_exec_time, 4)
-
-        except subprocess.TimeoutExpired:
-            submission.verdict = "TLE"
-            submission.error = "Time limit exceeded"
-            logger.error("Timeout during execution.")
-        except Exception as e:
-            submission.verdict = "RE"
-            submission.error = str(e)
-            logger.exception("Exception during evaluation:")
-        finally:
-            submission.save()
-            print("Verdict saved:", submission.verdict)
-            if submission.verdict in ["WA", "RE", "CE", "TLE" , "AC"]:
-                feedback = generate_ai_feedback(
-                    problem, lang, statement, code,
-                    submission.error, test_cases[0]["input"], test_cases[0]["output"]
-                )
-                submission.feedback = feedback
-                print("Feedback generated")
-                submission.save()    
-
+        spans = Spans()
+        with spans.span("fetch"):
             try:
-                subprocess.run(f'rm -rf "{folder_path}"', shell=True)
+                submission = Submission.objects.select_related("problem").get(id=submission_id)
+            except ObjectDoesNotExist as exc:
+                logger.warning("Submission %s does not exist", submission_id)
+                raise self.retry(exc=exc, countdown=5, queue=RETRY_QUEUE)
+
+            problem = submission.problem
+            lang = submission.language
+            code = submission.code
+
+            test_cases = problem.judge_cases()
+        submission.test_version = problem.test_version
+        # Judged for real now, so no longer a copy of another run.
+        submission.cached_from = None
+        if not submission.source_hash:
+            submission.source_hash = source_hash(submission.code)
+        # Per-case detail is only worth logging for a sample of submissions.
+        verbose = (
+            logger.isEnabledFor(logging.DEBUG)
+            and random.random() < settings.JUDGE_LOG_SAMPLE_RATE
+        )
+
+        events.publish(submission.id, {"type": "judging", "cases": len(test_cases)})
+        progress = status.record(submission, cases_total=len(test_cases))
+        status.save(progress)
+
+        test_results = []
+
+        def on_progress(case):
+            events.publish(submission.id, {"type": "case", **case})
+            progress["cases_done"] += 1
+            status.save(progress)
+
+        with ExitStack() as stack:
+            with spans.span("workspace"):
+                box = stack.enter_context(sandbox(lang))
+            try:
+                if verbose:
+                    logger.debug("Submission %s: image %s, sandbox %s", submission.id, box.image, box.path)
+
+                with spans.span("compile"):
+                    compile_error = compile_source(box, lang, code)
+                if compile_error is not None:
+                    raise CompilationError(compile_error)
+
+                time_limit, memory_limit = limits_for(problem, lang)
+                with spans.span("run"):
+                    results = box.run_cases(
+                        lang, test_cases, time_limit, memory_limit, stop_on_failure=True,
+                        jobs=parallel_cases(problem, lang, len(test_cases)),
+                        on_progress=on_progress,
+                    )
+                if not results:
+                    raise RuntimeError("Test harness reported no results")
+
+                for result in results:
+                    spans.observe("test", result["wall_time"])
+                    # Harnesses baked into older images don't report it.
+                    spans.observe("compare", result.get("compare_time", 0.0))
+                    if verbose:
+                        logger.debug(
+                            "Submission %s test %d: %s in %.3fs",
+                            submission.id, result["case"] + 1, result["status"], result["cpu_time"],
+                        )
+
+                last = results[-1]
+                # The harness already cut stdout down to a head/tail preview.
+                submission.output = box.read_output(last["output"]).strip()
+                submission.error = box.read_output(last["stderr"], ERROR_LIMIT).strip()
+                submission.time_taken = max(r["cpu_time"] for r in results)
+                submission.memory_used = max(r["memory"] for r in results)
+                submission.case_results = [
+                    {
+                        key: r[key]
+                        for key in ("case", "status", "cpu_time", "wall_time", "memory", "first_diff")
+                    }
+                    for r in results
+                ]
+                test_results = [
+                    SubmissionTestResult(
+                        submission=submission,
+                        case_index=r["case"],
+                        verdict="AC" if r["status"] == "OK" else r["status"],
+                        cpu_time=r["cpu_time"],
+                        wall_time=r["wall_time"],
+                        memory=r["memory"],
+                        output_digest=r["digest"],
+                        output_size=r["output_size"],
+                    )
+                    for r in results
+                ]
+
+                if last["status"] == "OK" and len(results) == len(test_cases):
+                    submission.verdict = "AC"
+                else:
+                    # Harness statuses other than OK are verdict codes.
+                    submission.verdict = last["status"]
+                    if submission.verdict == "TLE":
+                        submission.error = f"Time limit exceeded on test {last['case'] + 1}"
+                    elif submission.verdict == "MLE":
+                        submission.error = f"Memory limit exceeded on test {last['case'] + 1}"
+                    elif submission.verdict == "OLE":
+                        submission.error = f"Output limit exceeded on test {last['case'] + 1}"
+                    elif submission.verdict == "WA" and last["first_diff"] and not submission.error:
+                        diff = last["first_diff"]
+                        submission.error = (
+                            f"Wrong answer on test {last['case'] + 1}: first difference at "
+                            f"line {diff['line']}, column {diff['column']}"
+                        )
+
+            except CompilationError as e:
+                submission.verdict = "CE"
+                submission.output = ""
+                submission.error = str(e)
+            except subprocess.TimeoutExpired:
+                submission.verdict = "TLE"
+                submission.error = "Time limit exceeded"
+                logger.error("Timeout during execution.")
             except Exception as e:
-                logger.warning("Cleanup failed: %s", str(e))
+                submission.verdict = "RE"
+                submission.error = str(e)
+                logger.exception("Exception during evaluation:")
+            finally:
+                submission.stage_times = spans.breakdown()
+                with spans.span("save"), transaction.atomic():
+                    submission.save(update_fields=Submission.JUDGE_RESULT_FIELDS)
+                    # A rejudge replaces the previous run's cases.
+                    SubmissionTestResult.objects.filter(submission=submission).delete()
+                    SubmissionTestResult.objects.bulk_create(test_results)
+                if submission.verdict == "AC":
+                    leaderboard.record_ac(submission)
+                scoreboard.record(submission)
+                logger.debug("Submission %s judged: %s", submission.id, submission.verdict)
+                events.publish(submission.id, events.verdict_event(submission))
+                status.save(status.record(
+                    submission, progress["cases_done"], progress["cases_total"]
+                ))
+                # Only count work that came through a queue (not rejudges
+                # judged inline by rejudge_submission).
+                queue = (self.request.delivery_info or {}).get("routing_key")
+                if queue:
+                    record_judged(queue)
+                spans.export()
+
+        if submission.verdict in settings.FEEDBACK_AUTO_VERDICTS:
+            generate_feedback.delay(submission.id)
 
     except Exception as exc:
         logger.error(f"Error processing submission {submission_id}: {str(exc)}")
         try:
-            raise self.retry(exc=exc)
+            # Retries get their own lane so they never hold up fresh work.
+            raise self.retry(exc=exc, queue=RETRY_QUEUE)
         except MaxRetriesExceededError:
             logger.error(f"Max retries exceeded for submission {submission_id}")
             return {
@@ -187,33 +204,78 @@ def evaluate_submission(self, submission_id):
                 'submission_id': submission_id
             }
 
-def generate_ai_feedback(problem, lang, statement, code, stderr, input_data, output, model="models/gemini-1.5-flash-latest"):
+@shared_task(bind=True, max_retries=5, default_retry_delay=30, ignore_result=True)
+def generate_feedback(self, submission_id):
     try:
-        prompt = f"""The following code failed a programming test.
-
-📘 Problem Statement:
-{statement}
-
-💻 Code in {lang}:
-{code}
-
-📥 Input:
-{input_data}
+        submission = Submission.objects.select_related("problem").get(id=submission_id)
+    except Submission.DoesNotExist:
+        logger.warning(f"Feedback requested for missing submission {submission_id}")
+        return
 
-📤 Expected Output:
-{output}
+    spans = Spans()
+    try:
+        with spans.span("feedback"):
+            feedback = generate_ai_feedback(submission)
+    except FeedbackUnavailable as exc:
+        try:
+            raise self.retry(exc=exc)
+        except MaxRetriesExceededError:
+            feedback = ERROR_MESSAGE
 
-❌ Error:
-{stderr or "Wrong Answer"}
+    if feedback is None:
+        # Limiter is full; come back once a slot or the rate window frees up.
+        raise self.retry(countdown=settings.FEEDBACK_RETRY_DELAY, max_retries=None)
 
-🤔 What could be the reason for the failure and how can the user fix it?
-Please give corrected code if possible.
-"""
+    Submission.objects.filter(id=submission_id).update(
+        feedback=feedback, stage_times={**submission.stage_times, **spans.breakdown()},
+    )
+    spans.export()
+    events.publish(submission_id, {"type": "feedback"})
 
-        model = genai.GenerativeModel(model)
-        response = model.generate_content(prompt)
 
-        return response.text if hasattr(response, 'text') else "⚠️ Unexpected Gemini response format."
+@shared_task(ignore_result=True)
+def execute_run(run_id, user_id, language, code, custom_input):
+    try:
+        result = runs.execute(language, code, custom_input)
     except Exception as e:
-        logging.error("❌ Gemini AI Feedback error: %s", e)
-        return "No feedback generated due to an error."
\ No newline at end of file
+        logger.error(f"Error in run {run_id}: {str(e)}")
+        result = {"output": "", "error": str(e), "status": "error"}
+    runs.finish(run_id, user_id, result)
+
+
+@shared_task(ignore_result=True)
+def dispatch_rejudge(job_id):
+    """Hand the next minute's worth of a rejudge job to the judge."""
+    job = RejudgeJob.objects.get(id=job_id)
+    if job.status in (RejudgeStatus.DONE, RejudgeStatus.CANCELLED):
+        return
+    if job.status == RejudgeStatus.QUEUED:
+        job.status = RejudgeStatus.RUNNING
+        job.save(update_fields=["status"])
+
+    batch = list(
+        job.items.filter(dispatched=False)
+        .order_by("id")
+        .values_list("id", flat=True)[:job.rate_per_minute]
+    )
+    RejudgeItem.objects.filter(id__in=batch).update(dispatched=True)
+    for item_id in batch:
+        rejudge_submission.apply_async((item_id,), queue=REJUDGE_QUEUE, priority=LOWEST_PRIORITY)
+
+    if job.items.filter(dispatched=False).exists():
+        dispatch_rejudge.apply_async((job_id,), countdown=60)
+
+
+@shared_task(ignore_result=True)
+def rejudge_submission(item_id):
+    item = RejudgeItem.objects.select_related("job").get(id=item_id)
+    if item.job.status == RejudgeStatus.CANCELLED:
+        return
+    evaluate_submission.apply(args=(item.submission_id,))
+    submission = Submission.objects.only("user_id", "verdict").get(id=item.submission_id)
+    item.new_verdict = submission.verdict
+    item.save(update_fields=["new_verdict"])
+    if item.old_verdict == "AC" and item.new_verdict != "AC":
+        # The problem may no longer count as solved.
+        leaderboard.recount(submission.user_id)
+    rejudge.item_finished(item.job_id)
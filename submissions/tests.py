@@ -1,3 +1,659 @@
-from django.test import TestCase
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from problems.models import Problem
+
+from . import harness, leaderboard, rejudge, runs, verdict_cache
+from . import status as submission_status
+from .executor import LocalExecutor
+from .harness import READ_SIZE, Comparator, Limits, Program, Runner, Tokenizer
+from .models import SolvedProblem, Submission, SubmissionTestResult, UserStats
+from .tasks import rejudge_submission
+
+# Tests must not need Redis.
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Sleeps for the seconds given on stdin, then prints what follows them.
+SLEEPER = "import sys, time; delay, text = sys.stdin.read().split(); time.sleep(float(delay)); print(text)"
+
+
+def _tokens(chunks):
+    """Whole tokens and their positions from feeding ``chunks``."""
+    tokenizer = Tokenizer()
+    tokens = []
+    for index, chunk in enumerate(chunks):
+        for piece, line, column, first, last in tokenizer.feed(chunk, final=index == len(chunks) - 1):
+            if first:
+                tokens.append([piece, line, column])
+            else:
+                tokens[-1][0] += piece
+    return [tuple(token) for token in tokens]
+
+
+class TokenizerTests(SimpleTestCase):
+    def test_any_whitespace_separates(self):
+        self.assertEqual(
+            _tokens([b"  a\tbb\r\n\n c  \x0b\x0cd\n"]),
+            [(b"a", 1, 3), (b"bb", 1, 5), (b"c", 3, 2), (b"d", 3, 7)],
+        )
+
+    def test_empty_and_blank_streams(self):
+        self.assertEqual(_tokens([b""]), [])
+        self.assertEqual(_tokens([b" \n\t", b"\n", b""]), [])
+
+    def test_tokens_split_across_chunks(self):
+        self.assertEqual(
+            _tokens([b"1 2", b"3", b"4\n56", b" 7", b""]),
+            [(b"1", 1, 1), (b"234", 1, 3), (b"56", 2, 1), (b"7", 2, 4)],
+        )
+
+    def test_same_tokens_for_any_chunking(self):
+        data = b"12 345\n\n  6789 0\t\tab\n"
+        whole = _tokens([data, b""])
+        for size in (1, 2, 3, 7):
+            chunks = [data[i:i + size] for i in range(0, len(data), size)]
+            self.assertEqual(_tokens(chunks + [b""]), whole)
+
+    def test_pieces_mark_token_boundaries(self):
+        tokenizer = Tokenizer()
+        self.assertEqual(tokenizer.feed(b"ab"), [(b"ab", 1, 1, True, False)])
+        self.assertEqual(tokenizer.feed(b"cd ef"), [(b"cd", 1, 1, False, True), (b"ef", 1, 6, True, False)])
+        self.assertEqual(tokenizer.feed(b"", final=True), [(b"", 1, 6, False, True)])
+
+
+class ComparatorTests(SimpleTestCase):
+    def setUp(self):
+        handle, self.answer = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(os.remove, self.answer)
+
+    def compare(self, answer, chunks):
+        with open(self.answer, "wb") as f:
+            f.write(answer)
+        comparator = Comparator(self.answer)
+        for chunk in chunks:
+            if not comparator.feed(chunk):
+                return False, comparator.first_diff
+        return comparator.finish(), comparator.first_diff
+
+    def test_whitespace_is_not_significant(self):
+        self.assertEqual(self.compare(b"1 2\n3\n", [b"1\t\t2   3"]), (True, None))
+        self.assertEqual(self.compare(b"1 2 3", [b"\n1\r\n2\n\n3\n\n"]), (True, None))
+        self.assertEqual(self.compare(b"\n", [b""]), (True, None))
+
+    def test_numbers_are_compared_as_written(self):
+        # No float tolerance: checkers for those are not supported.
+        self.assertEqual(self.compare(b"1.0\n", [b"1.00\n"]), (False, {"line": 1, "column": 1}))
+        self.assertEqual(self.compare(b"1\n", [b"01\n"]), (False, {"line": 1, "column": 1}))
+        self.assertEqual(self.compare(b"0.5\n", [b".5\n"]), (False, {"line": 1, "column": 1}))
+
+    def test_first_diff_points_at_the_wrong_token(self):
+        self.assertEqual(
+            self.compare(b"1 2\n3 4\n", [b"1 2\n", b"3 5\n"]),
+            (False, {"line": 2, "column": 3}),
+        )
+
+    def test_missing_output_points_past_the_end(self):
+        self.assertEqual(self.compare(b"1 2 3", [b"1 2\n"]), (False, {"line": 2, "column": 1}))
+        self.assertEqual(self.compare(b"1", [b""]), (False, {"line": 1, "column": 1}))
+
+    def test_extra_output_fails(self):
+        self.assertEqual(self.compare(b"1 2", [b"1 2 3"]), (False, {"line": 1, "column": 5}))
+
+    def test_prefix_of_a_token_fails(self):
+        self.assertEqual(self.compare(b"abcd", [b"abc"]), (False, {"line": 1, "column": 1}))
+        self.assertEqual(self.compare(b"abc", [b"ab", b"cd"]), (False, {"line": 1, "column": 1}))
+
+    def test_long_tokens_across_chunks(self):
+        token = b"x" * (3 * READ_SIZE + 17)
+        chunks = [token[i:i + 4096] for i in range(0, len(token), 4096)]
+        self.assertEqual(self.compare(token + b"\n", chunks + [b"\n"]), (True, None))
+        self.assertEqual(
+            self.compare(token[:-1] + b"y", chunks),
+            (False, {"line": 1, "column": 1}),
+        )
+
+    def test_outgrown_token_fails_on_the_chunk_that_outgrows_it(self):
+        with open(self.answer, "wb") as f:
+            f.write(b"short")
+        comparator = Comparator(self.answer)
+        self.assertTrue(comparator.feed(b"sho"))
+        self.assertFalse(comparator.feed(b"rt" + b"x" * READ_SIZE))
+        self.assertEqual(comparator.first_diff, {"line": 1, "column": 1})
+
+
+class RunnerTests(SimpleTestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+        cwd = os.getcwd()
+        os.chdir(self.workdir)
+        self.addCleanup(os.chdir, cwd)
+        os.mkdir("out")
+
+    def run_cases(self, cases, jobs, stop_on_failure=True):
+        """Judge ``(delay, passes)`` cases the way harness.main does."""
+        specs = []
+        for index, (delay, passes) in enumerate(cases):
+            specs.append({"input": f"{index}.in", "answer": f"{index}.ans"})
+            with open(f"{index}.in", "w") as f:
+                f.write(f"{delay} ok")
+            with open(f"{index}.ans", "w") as f:
+                f.write("ok" if passes else "wrong")
+        program = Program({"command": f"{sys.executable} -c '{SLEEPER}'"})
+        runner = Runner(specs, program, Limits({"time_limit": 30}), stop_on_failure)
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(runner.run, range(len(specs))))
+        return runner, results
+
+    def test_lowest_index_failure_wins(self):
+        # Case 2 fails first, then the slower case 0 takes its place.
+        runner, results = self.run_cases([(1, False), (0, True), (0, False), (0, True)], jobs=4)
+        self.assertEqual(runner.failed, 0)
+        self.assertEqual(results[0]["status"], "WA")
+        self.assertEqual(results[1]["status"], "OK")
+
+    def test_cases_after_a_failure_are_killed(self):
+        start = time.monotonic()
+        runner, results = self.run_cases([(0, False), (20, True)], jobs=2)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(runner.failed, 0)
+        self.assertEqual(results[0]["status"], "WA")
+        self.assertNotEqual(results[1]["status"], "OK")
+
+    def test_cases_after_a_failure_are_not_started(self):
+        runner, results = self.run_cases([(0, True), (0, False), (0, True)], jobs=1)
+        self.assertEqual(runner.failed, 1)
+        self.assertEqual([result and result["status"] for result in results], ["OK", "WA", None])
+
+    def test_every_case_runs_without_stop_on_failure(self):
+        runner, results = self.run_cases([(0, False), (0, True)], jobs=2, stop_on_failure=False)
+        self.assertEqual(runner.failed, 0)
+        self.assertEqual([result["status"] for result in results], ["WA", "OK"])
+
+
+@override_settings(CACHES=LOCAL_CACHES, JUDGE_VERDICT_CACHE_ENABLED=True)
+class VerdictCacheTests(TestCase):
+    CODE = "print(input())\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("alice")
+        cls.problem = Problem.objects.create(code="echo", name="Echo", difficulty="Easy")
+
+    def judged(self, code=CODE, verdict="AC", case_results=None, **fields):
+        return Submission.objects.create(
+            user=self.user, problem=self.problem, code=code, language="python",
+            verdict=verdict,
+            case_results=[{"status": "OK"}] if case_results is None else case_results,
+            source_hash=verdict_cache.source_hash(code),
+            test_version=self.problem.test_version,
+            **fields
+        )
+
+    def find(self, code=CODE, language="python"):
+        return verdict_cache.find_cached(self.problem, language, code)
+
+    def test_same_source_reuses_the_verdict(self):
+        previous = self.judged()
+        self.assertEqual(self.find(), previous)
+        self.assertEqual(self.find(self.CODE.replace("\n", "\r\n") + "\n\n  "), previous)
+
+    def test_other_source_or_language_misses(self):
+        self.judged()
+        self.assertIsNone(self.find("print(input() )\n"))
+        self.assertIsNone(self.find(language="cpp"))
+
+    def test_new_test_version_misses(self):
+        self.judged()
+        self.problem.time_limit = 2.0
+        self.problem.save()
+        self.assertEqual(self.problem.test_version, 1)
+        self.assertIsNone(self.find())
+        current = self.judged(verdict="TLE")
+        self.assertEqual(self.find(), current)
+
+    def test_bumped_test_version_misses(self):
+        self.judged()
+        self.problem.bump_test_version()
+        self.problem.save()
+        self.assertIsNone(self.find())
+
+    def test_unfinished_runs_are_not_reused(self):
+        self.judged(verdict="PENDING", case_results=[])
+        self.judged(verdict="RE", case_results=[])
+        self.assertIsNone(self.find())
+
+    def test_compile_errors_are_reused(self):
+        previous = self.judged(verdict="CE", case_results=[])
+        self.assertEqual(self.find(), previous)
+
+    def test_latest_verdict_wins(self):
+        older = self.judged(verdict="WA")
+        latest = self.judged(verdict="AC")
+        Submission.objects.filter(id=older.id).update(submitted_at=latest.submitted_at - timedelta(minutes=1))
+        self.assertEqual(self.find(), latest)
+
+    @override_settings(JUDGE_VERDICT_CACHE_ENABLED=False)
+    def test_disabled(self):
+        self.judged()
+        self.assertIsNone(self.find())
+
+    def test_apply_cached_copies_the_results(self):
+        previous = self.judged(time_taken=0.25, memory_used=1024, output="out")
+        submission = Submission(user=self.user, problem=self.problem, code=self.CODE, language="python")
+        verdict_cache.apply_cached(submission, previous)
+        self.assertEqual(
+            (submission.verdict, submission.time_taken, submission.memory_used, submission.output),
+            ("AC", 0.25, 1024, "out"),
+        )
+        self.assertEqual(submission.test_version, previous.test_version)
+        self.assertEqual(submission.cached_from, previous)
+
+
+@override_settings(CACHES=LOCAL_CACHES, LEADERBOARD_URL="")
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.alice, cls.bob, cls.carol = (User.objects.create_user(name) for name in ("alice", "bob", "carol"))
+        cls.easy = Problem.objects.create(code="easy", name="Easy", difficulty="Easy")
+        cls.hard = Problem.objects.create(code="hard", name="Hard", difficulty="Hard")
+
+    def submit(self, user, problem, verdict="AC", time_taken=0.5):
+        submission = Submission.objects.create(
+            user=user, problem=problem, code="", language="python",
+            verdict=verdict, time_taken=time_taken,
+        )
+        if verdict == "AC":
+            leaderboard.record_ac(submission)
+        return submission
+
+    def test_record_ac_counts_the_first_ac_only(self):
+        first = self.submit(self.alice, self.easy, time_taken=0.2)
+        self.assertFalse(leaderboard.record_ac(first))
+        self.submit(self.alice, self.easy, time_taken=0.1)
+        self.submit(self.alice, self.hard, time_taken=0.4)
+
+        stats = UserStats.objects.get(user=self.alice)
+        self.assertEqual((stats.points, stats.solved_count), (400, 2))
+        self.assertAlmostEqual(stats.ac_time_total, 0.6)
+        self.assertEqual(stats.avg_time, 0.3)
+        self.assertEqual(SolvedProblem.objects.get(user=self.alice, problem=self.easy).submission, first)
+
+    def test_average_time_is_rounded_to_the_millisecond(self):
+        self.submit(self.alice, self.easy, time_taken=0.0004)
+        self.submit(self.alice, self.hard, time_taken=0.0001)
+        self.assertEqual(UserStats.objects.get(user=self.alice).avg_time, 0.0)
+
+    def test_recount_after_losing_an_ac(self):
+        taken = self.submit(self.alice, self.easy)
+        self.submit(self.alice, self.hard, time_taken=0.3)
+        later = self.submit(self.alice, self.easy, time_taken=0.9)
+        Submission.objects.filter(id=taken.id).update(verdict="WA")
+        leaderboard.recount(self.alice.id)
+
+        stats = UserStats.objects.get(user=self.alice)
+        self.assertEqual((stats.points, stats.solved_count, stats.avg_time), (400, 2, 0.6))
+        self.assertEqual(SolvedProblem.objects.get(user=self.alice, problem=self.easy).submission, later)
+
+        Submission.objects.filter(user=self.alice).update(verdict="WA")
+        leaderboard.recount(self.alice.id)
+        self.assertFalse(UserStats.objects.filter(user=self.alice).exists())
+        self.assertIsNone(leaderboard.rank(self.alice.id))
+
+    def test_ranking_order_and_ties(self):
+        # Same points and solved count, so the faster average wins;
+        # bob and carol tie outright and are ordered by user id.
+        self.submit(self.alice, self.easy, time_taken=0.5)
+        self.submit(self.bob, self.easy, time_taken=0.2)
+        self.submit(self.carol, self.easy, time_taken=0.2)
+        self.assertEqual(
+            [(position, stats.user_id) for position, stats in leaderboard.page(0, 10)[1]],
+            [(1, self.bob.id), (2, self.carol.id), (3, self.alice.id)],
+        )
+        self.assertEqual(
+            [leaderboard.rank(user.id) for user in (self.alice, self.bob, self.carol)],
+            [3, 1, 2],
+        )
+
+        # Points come before everything else.
+        self.submit(self.alice, self.hard, time_taken=2.0)
+        self.assertEqual(leaderboard.rank(self.alice.id), 1)
+        total, rows = leaderboard.page(1, 1)
+        self.assertEqual((total, [(position, stats.user_id) for position, stats in rows]), (3, [(2, self.bob.id)]))
+
+    def test_rebuild_matches_the_incremental_standing(self):
+        self.submit(self.alice, self.easy, time_taken=0.2)
+        self.submit(self.alice, self.hard, verdict="WA")
+        self.submit(self.bob, self.hard, time_taken=0.7)
+        before = list(UserStats.objects.order_by("user_id").values())
+        self.assertEqual(leaderboard.rebuild(), 2)
+        self.assertEqual(list(UserStats.objects.order_by("user_id").values()), before)
+
+    def test_score_orders_like_the_table(self):
+        ordered = [
+            UserStats(points=300, solved_count=1, avg_time=0.9),
+            UserStats(points=200, solved_count=2, avg_time=0.1),
+            UserStats(points=200, solved_count=1, avg_time=0.1),
+            UserStats(points=200, solved_count=1, avg_time=0.25),
+            UserStats(points=200, solved_count=1, avg_time=1000),
+        ]
+        scores = [leaderboard._score(stats) for stats in ordered]
+        self.assertEqual(scores, sorted(scores))
+        self.assertEqual(len(set(scores)), len(scores))
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES, LEADERBOARD_URL="", SUBMISSION_EVENTS_URL="",
+    JUDGE_EXECUTOR="fake", FEEDBACK_AUTO_VERDICTS=[],
+)
+class RejudgeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("alice")
+        cls.problem = Problem.objects.create(code="echo", name="Echo", difficulty="Easy")
+
+    def setUp(self):
+        workspace = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workspace)
+        self.enterContext(override_settings(JUDGE_WORKSPACE_ROOT=workspace))
+
+    def submission(self, code, **fields):
+        return Submission.objects.create(
+            user=self.user, problem=self.problem, code=code, language="python",
+            source_hash=verdict_cache.source_hash(code), test_version=self.problem.test_version,
+            **fields
+        )
+
+    def test_rejudged_copy_stops_sharing_the_original_run(self):
+        # The tests changed under a memoized verdict: this code now fails.
+        code = "# oj-fake: WA\n"
+        original = self.submission(code, verdict="AC", case_results=[{"status": "OK"}] * 3)
+        SubmissionTestResult.objects.bulk_create([
+            SubmissionTestResult(
+                submission=original, case_index=index, verdict="AC", cpu_time=0.1,
+                wall_time=0.1, memory=1024, output_digest="", output_size=0,
+            )
+            for index in range(3)
+        ])
+        copy = self.submission(code)
+        verdict_cache.apply_cached(copy, original)
+        copy.save()
+
+        job = rejudge.start(Submission.objects.filter(id=copy.id))
+        rejudge_submission(job.items.get().id)
+
+        copy.refresh_from_db()
+        self.assertEqual(copy.verdict, "WA")
+        self.assertIsNone(copy.cached_from)
+        self.assertEqual(list(copy.test_results.values_list("verdict", flat=True)), ["WA"])
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(f"/api/submission/{copy.id}/tests/")
+        self.assertEqual(response.data["verdict"], "WA")
+        self.assertEqual([case["verdict"] for case in response.data["results"]], ["WA"])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SubmissionTestResultsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("alice")
+        cls.problem = Problem.objects.create(code="echo", name="Echo", difficulty="Easy")
+        cls.original = Submission.objects.create(user=cls.user, problem=cls.problem, code="", language="python", verdict="AC")
+        cls.add_cases(cls.original, ["AC", "AC", "AC"])
+
+    @staticmethod
+    def add_cases(submission, verdicts):
+        SubmissionTestResult.objects.bulk_create([
+            SubmissionTestResult(
+                submission=submission, case_index=index, verdict=verdict, cpu_time=0.1,
+                wall_time=0.1, memory=1024, output_digest="", output_size=0,
+            )
+            for index, verdict in enumerate(verdicts)
+        ])
+
+    def cases(self, submission):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(f"/api/submission/{submission.id}/tests/")
+        return [case["verdict"] for case in response.data["results"]]
+
+    def test_memoized_submission_shows_the_original_run(self):
+        copy = Submission.objects.create(
+            user=self.user, problem=self.problem, code="", language="python",
+            verdict="AC", cached_from=self.original,
+        )
+        self.assertEqual(self.cases(copy), ["AC", "AC", "AC"])
+
+    def test_own_cases_win_over_a_stale_link(self):
+        copy = Submission.objects.create(
+            user=self.user, problem=self.problem, code="", language="python",
+            verdict="WA", cached_from=self.original,
+        )
+        self.add_cases(copy, ["AC", "WA"])
+        self.assertEqual(self.cases(copy), ["AC", "WA"])
+
+
+@override_settings(CACHES=LOCAL_CACHES, JUDGE_MAX_BACKLOG={"judge": 5, "judge_contest": 5})
+class SubmitCodeViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("alice")
+        Problem.objects.create(code="echo", name="Echo", difficulty="Easy")
+
+    def setUp(self):
+        # No throughput counted by other tests, so the wait is the default.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.enqueue = self.enterContext(mock.patch("submissions.views.enqueue_submission"))
+
+    def submit(self, language="python", depth=0):
+        depths = {"judge": depth, "judge_contest": depth}
+        with mock.patch("submissions.scheduling.queue_depths", return_value=depths):
+            return self.client.post(
+                "/api/submit/", {"problem_code": "echo", "code": "print(1)", "language": language}, format="json",
+            )
+
+    def test_admitted_submission_is_queued(self):
+        response = self.submit()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["verdict"], "PENDING")
+        self.enqueue.assert_called_once()
+
+    def test_unsupported_language_is_rejected_before_anything_else(self):
+        with mock.patch("submissions.views.find_cached") as find_cached, \
+                mock.patch("submissions.views.admission") as admission:
+            response = self.submit(language="cobol")
+        self.assertEqual(response.status_code, 400)
+        find_cached.assert_not_called()
+        admission.assert_not_called()
+        self.enqueue.assert_not_called()
+        self.assertFalse(Submission.objects.exists())
+
+    @override_settings(JUDGE_RETRY_AFTER=30)
+    def test_full_queue_asks_to_retry_later(self):
+        response = self.submit(depth=5)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(response.data["retry_after"], 30)
+        self.enqueue.assert_not_called()
+        self.assertFalse(Submission.objects.exists())
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class VerdictStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("alice")
+        problem = Problem.objects.create(code="echo", name="Echo", difficulty="Easy")
+        cls.submission = Submission.objects.create(user=cls.user, problem=problem, code="", language="python")
+
+    def setUp(self):
+        submission_status.cache.clear()
+
+    def test_judge_record_written_after_the_read_wins(self):
+        judged = submission_status.record(self.submission, cases_done=3, cases_total=5)
+        # The judge saves its record between get_many's read and its write.
+        real_get_many = submission_status.cache.get_many
+
+        def read_then_judge(keys):
+            found = real_get_many(keys)
+            submission_status.save(judged)
+            return found
+
+        with mock.patch.object(submission_status.cache, "get_many", side_effect=read_then_judge):
+            statuses = submission_status.get_many([self.submission.id], self.user)
+        self.assertEqual(statuses[self.submission.id]["cases_done"], 3)
+        self.assertEqual(submission_status.cache.get(submission_status._key(self.submission.id)), judged)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_unchanged_status_is_not_modified(self):
+        client = self.client_for(self.user)
+        url = f"/api/submission/{self.submission.id}/status/"
+        first = client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data["verdict"], "PENDING")
+
+        again = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+
+        submission_status.save(submission_status.record(self.submission, cases_done=1, cases_total=5))
+        changed = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data["cases_done"], 1)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_other_users_submission_is_not_found(self):
+        bob = get_user_model().objects.create_user("bob")
+        response = self.client_for(bob).get(f"/api/submission/{self.submission.id}/status/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch_returns_only_own_submissions_in_order(self):
+        bob = get_user_model().objects.create_user("bob")
+        other = Submission.objects.create(user=bob, problem=self.submission.problem, code="", language="python")
+        mine = Submission.objects.create(
+            user=self.user, problem=self.submission.problem, code="", language="python", verdict="AC",
+        )
+        client = self.client_for(self.user)
+        ids = f"{mine.id},{other.id},{self.submission.id},999999"
+        response = client.get("/api/submissions/status/", {"ids": ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(status["id"], status["verdict"]) for status in response.data["statuses"]],
+            [(mine.id, "AC"), (self.submission.id, "PENDING")],
+        )
+        self.assertNotIn("user", response.data["statuses"][0])
+
+        again = client.get("/api/submissions/status/", {"ids": ids}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_batch_rejects_bad_ids(self):
+        client = self.client_for(self.user)
+        self.assertEqual(client.get("/api/submissions/status/", {"ids": "1,x"}).status_code, 400)
+        self.assertEqual(client.get("/api/submissions/status/").status_code, 400)
+        too_many = ",".join(str(i) for i in range(1, 102))
+        self.assertEqual(client.get("/api/submissions/status/", {"ids": too_many}).status_code, 400)
+
+
+@override_settings(CACHES=LOCAL_CACHES, JUDGE_RUN_MAX_PER_USER=2)
+class RunSlotTests(SimpleTestCase):
+    def setUp(self):
+        runs.cache.clear()
+
+    def test_limit_per_user(self):
+        self.assertIsNotNone(runs.reserve(1))
+        self.assertIsNotNone(runs.reserve(1))
+        self.assertIsNone(runs.reserve(1))
+        self.assertIsNotNone(runs.reserve(2))
+        runs.release(1)
+        self.assertIsNotNone(runs.reserve(1))
+
+    def test_release_does_not_go_below_zero(self):
+        runs.release(1)
+        runs.reserve(1)
+        runs.release(1)
+        runs.release(1)
+        self.assertIsNotNone(runs.reserve(1))
+        self.assertIsNotNone(runs.reserve(1))
+        self.assertIsNone(runs.reserve(1))
+
+    def test_activity_keeps_the_counter_alive(self):
+        with mock.patch("time.time", return_value=1000.0) as now:
+            runs.reserve(1)
+            now.return_value += runs.ACTIVE_TIMEOUT - 10
+            runs.reserve(1)
+            now.return_value += runs.ACTIVE_TIMEOUT - 10
+            self.assertIsNone(runs.reserve(1))
+            # A worker that died never releases; its slots free up once the
+            # user has been idle for ACTIVE_TIMEOUT.
+            now.return_value += runs.ACTIVE_TIMEOUT + 1
+            self.assertIsNotNone(runs.reserve(1))
+
+
+# Prints the errno names unshare(CLONE_NEWUSER) and an empty
+# process_vm_readv of itself fail with, then checks threads still start.
+SYSCALL_PROBE = """
+import ctypes, errno, os, threading
+libc = ctypes.CDLL(None, use_errno=True)
+for result in (libc.unshare(0x10000000), libc.process_vm_readv(os.getpid(), None, 0, None, 0, 0)):
+    print(errno.errorcode.get(ctypes.get_errno()) if result < 0 else "allowed")
+thread = threading.Thread(target=print, args=("threads",))
+thread.start()
+thread.join()
+"""
+
+
+@unittest.skipUnless(harness.seccomp_available(), "needs libseccomp")
+class SeccompTests(SimpleTestCase):
+    def probe(self, seccomp):
+        jail = harness.Jail(tempfile.gettempdir(), namespaces=False, seccomp=seccomp)
+        result = subprocess.run(
+            [sys.executable, "-c", SYSCALL_PROBE], preexec_fn=jail.enter,
+            capture_output=True, text=True, timeout=30,
+        )
+        return result.stdout.split()
+
+    def test_denied_syscalls_fail_with_eperm(self):
+        self.assertEqual(self.probe(seccomp=True), ["EPERM", "EPERM", "threads"])
+
+    def test_filter_can_be_turned_off(self):
+        self.assertEqual(self.probe(seccomp=False)[1:], ["allowed", "threads"])
+
+
+@unittest.skipUnless(os.getuid() == 0, "sandbox uids are only handed out to root workers")
+class SandboxUserTests(SimpleTestCase):
+    def setUp(self):
+        workspace = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workspace)
+        self.enterContext(override_settings(JUDGE_WORKSPACE_ROOT=workspace, DEBUG=True, JUDGE_LOCAL_SLOTS=2))
+
+    def test_boxes_at_the_same_time_get_their_own_uid(self):
+        executor = LocalExecutor()
+        with executor._user() as first, executor._user() as second:
+            self.assertEqual((first, second), ((65534, 65534), (65533, 65534)))
+            with self.assertRaises(RuntimeError), executor._user():
+                pass
+        with executor._user() as again:
+            self.assertEqual(again, (65534, 65534))
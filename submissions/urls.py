@@ -1,13 +1,23 @@
 from django.urls import path
 from .views import SubmitCodeView , SubmissionListView
-from .views import RunCodeView , SubmissionStatusView , LeaderboardView
+from .views import RunCodeView , RunResultView , SubmissionStatusView , LeaderboardView
+from .views import SubmissionFeedbackView, SubmissionEventsView, VerdictStatusView, JudgeQueueStatsView
+from .views import JudgeMetricsView, SubmissionTestResultsView
 
 
 
 urlpatterns = [
     path('submit/', SubmitCodeView.as_view(), name='submit-code'),
     path("run/", RunCodeView.as_view(), name="run-code"),
+    path("run/<str:run_id>/", RunResultView.as_view(), name="run-result"),
     path('submission/<int:submission_id>/', SubmissionStatusView.as_view()),
+    path('submission/<int:submission_id>/status/', VerdictStatusView.as_view(), name='submission-verdict'),
+    path('submissions/status/', VerdictStatusView.as_view(), name='submission-verdicts'),
+    path('submission/<int:submission_id>/events/', SubmissionEventsView.as_view(), name='submission-events'),
+    path('submission/<int:submission_id>/feedback/', SubmissionFeedbackView.as_view(), name='submission-feedback'),
+    path('submission/<int:submission_id>/tests/', SubmissionTestResultsView.as_view(), name='submission-tests'),
     path("submissions/", SubmissionListView.as_view(), name="submission-list"),
     path("leaderboard/", LeaderboardView.as_view(), name="leaderboard"),
+    path("judge/queues/", JudgeQueueStatsView.as_view(), name="judge-queues"),
+    path("judge/metrics/", JudgeMetricsView.as_view(), name="judge-metrics"),
 ]
@@ -0,0 +1,54 @@
+"""
+Verdict memoization for identical resubmissions.
+
+A judged submission is reused for a new one when both have the same problem,
+language and normalized source and were judged against the same
+``Problem.test_version``. Changing a problem's test data or limits bumps
+that version, which is all the invalidation there is: old verdicts simply
+stop matching. ``JUDGE_VERDICT_CACHE_ENABLED`` turns the cache off, and the
+"Rejudge" admin action always runs the judge.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Submission
+
+
+def source_hash(code):
+    # Only changes that cannot alter behaviour: line endings and trailing
+    # whitespace at the end of the file.
+    normalized = code.replace("\r\n", "\n").rstrip()
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def find_cached(problem, language, code):
+    """Return a judged submission whose verdict can stand in for ``code``."""
+    if not settings.JUDGE_VERDICT_CACHE_ENABLED:
+        return None
+    return (
+        Submission.objects
+        .filter(
+            problem=problem,
+            language=language,
+            source_hash=source_hash(code),
+            test_version=problem.test_version,
+        )
+        # A complete judge run leaves per-case results (or a compile error);
+        # verdicts from infrastructure failures don't and must not be reused.
+        .filter(Q(verdict="CE") | ~Q(case_results=[]))
+        .exclude(verdict="PENDING")
+        .order_by("-submitted_at")
+        .first()
+    )
+
+
+def apply_cached(submission, previous):
+    """Copy ``previous``'s judge results onto ``submission``."""
+    for field in (
+        "verdict", "time_taken", "memory_used", "case_results",
+        "output", "error", "feedback", "test_version",
+    ):
+        setattr(submission, field, getattr(previous, field))
+    submission.cached_from = previous
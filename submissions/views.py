@@ -1,20 +1,36 @@
-import os
-import uuid
-import shutil
-import subprocess
+import asyncio
+import hashlib
+import hmac
+import json
 import logging
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.views import View
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework import status
 from rest_framework.generics import ListAPIView
-from django.db.models import Count, Avg, Case, When, IntegerField, Q, Sum
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
 from django.conf import settings
-from users.models import User
 from problems.models import Problem
-from .models import Submission
-from .serializers import SubmissionSerializer
-from .tasks import evaluate_submission
+from contests import scoreboard
+from .models import Submission, SubmissionTestResult, UserStats
+from .serializers import (
+    StaffSubmissionTestResultSerializer, SubmissionSerializer, SubmissionTestResultSerializer,
+)
+from .tasks import execute_run, generate_feedback
+from .feedback import cached_feedback
+from .verdict_cache import apply_cached, find_cached, source_hash
+from .scheduling import admission, enqueue_submission, judge_queue, queue_stats
+from . import events, leaderboard, metrics
+from . import status as submission_status
+from .executor import SOURCE_FILES
+from . import runs
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +51,13 @@ class SubmitCodeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if language not in SOURCE_FILES:
+            logger.warning(f"Unsupported language in submission: {language}")
+            return Response(
+                {"error": f"Unsupported language: {language}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
             problem = Problem.objects.get(code=problem_code)
             logger.info(f"Found problem: {problem_code}")
@@ -46,29 +69,63 @@ class SubmitCodeView(APIView):
             )
 
         try:
-            submission = Submission.objects.create(
+            submission = Submission(
                 user=request.user,
                 problem=problem,
                 code=code,
                 language=language,
-                verdict="PENDING"
+                verdict="PENDING",
+                source_hash=source_hash(code)
             )
-            print(f"Created submission with ID: {submission.id}")
+            previous = find_cached(problem, language, code)
+            if previous is not None:
+                apply_cached(submission, previous)
+                submission.save()
+                if submission.verdict == "AC":
+                    leaderboard.record_ac(submission)
+                scoreboard.record(submission)
+                logger.info(f"Submission {submission.id} reuses verdict of {previous.id}")
+                if not submission.feedback and submission.verdict in settings.FEEDBACK_AUTO_VERDICTS:
+                    generate_feedback.delay(submission.id)
+                return Response(
+                    {
+                        "submission_id": submission.id,
+                        "verdict": submission.verdict,
+                        "message": "Identical code was already judged; verdict reused"
+                    },
+                    status=status.HTTP_201_CREATED
+                )
 
-            
-            evaluate_submission.delay(submission.id)
-            print(f"Submitted task to Celery for submission {submission.id}")
+            queue = judge_queue(submission)
+            admitted, wait = admission(queue)
+            if not admitted:
+                logger.warning(f"Queue {queue} is full, refusing submission")
+                return Response(
+                    {
+                        "error": "The judge is busy, please try again shortly",
+                        "retry_after": wait
+                    },
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                    headers={"Retry-After": str(wait)}
+                )
+
+            submission.save()
+            logger.info(f"Created submission with ID: {submission.id}")
+
+            enqueue_submission(submission, queue)
+            logger.info(f"Submitted task to Celery for submission {submission.id}")
 
             return Response(
                 {
                     "submission_id": submission.id,
                     "verdict": "PENDING",
+                    "estimated_wait": wait,
                     "message": "Submission received and being processed"
                 },
                 status=status.HTTP_201_CREATED
             )
-        except Exception as e:
-            print(f"Error creating submission: {str(e)}")
+        except Exception:
+            logger.exception("Error creating submission")
             return Response(
                 {"error": "Internal server error"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -92,119 +149,60 @@ class RunCodeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        print(f"Running code in {language} with custom input: {custom_input}")
-        base_path = os.path.join("/var/tmp/oj_temp", str(uuid.uuid4()))
-        temp_dir = os.path.join(base_path, "temp")
-        print(f"Temp directory: {temp_dir}")
-
-
-        try:
-            os.makedirs(temp_dir, exist_ok=True)
-            print(f"Created temp directory: {temp_dir}")
-
-            filename = {
-                "python": "main.py",
-                "cpp": "main.cpp", 
-                "java": "Main.java"
-            }[language]
-            
-            code_path = os.path.join(temp_dir, filename)
-            input_path = os.path.join(temp_dir, "input.txt")
-
-            with open(code_path, "w") as f:
-                f.write(code)
-            with open(input_path, "w") as f:
-                f.write(custom_input)
-
-            image = {
-                "python": "oj-python",
-                "cpp": "oj-cpp",
-                "java": "oj-java"
-            }[language]
-
-            compile_cmds = {
-                "python": "",
-                "cpp": "g++ main.cpp -o main",
-                "java": "javac Main.java"
-            }
-
-            exec_cmds = {
-                "python": "python3 main.py",
-                "cpp": "./main",
-                "java": "java Main"
-            }
-
-            compile_cmd = compile_cmds[language]
-            exec_cmd = exec_cmds[language]
-            full_cmd = f"{compile_cmd} && {exec_cmd}" if compile_cmd else exec_cmd
-
-            
-            docker_path = os.path.abspath(temp_dir).replace("\\", "/")
-           
-           
-            
-            command = (
-                f'docker run --rm -i -v "{docker_path}:/app" -w /app {image} '
-                f'sh -c "{full_cmd}"'
+        if language not in SOURCE_FILES:
+            return Response(
+                {"error": f"Unsupported language: {language}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            if shutil.which("docker") is None:
-                print("Docker is not installed or not in PATH")
-
-            print(f"Executing command: {command}")
-            for root, dirs, files in os.walk(temp_dir):
-                for d in dirs:
-                    os.chmod(os.path.join(root, d), 0o755)
-                for f in files:
-                    os.chmod(os.path.join(root, f), 0o644)
-            os.chmod(temp_dir, 0o755)
-
-            try:
-                result = subprocess.run(
-                    command,
-                    shell=True,
-                    input=custom_input.encode(),
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    timeout=10
-                )
-                output = result.stdout.decode().strip()
-                error = result.stderr.decode().strip()
-
-                if result.returncode != 0:
-                    logger.warning(f"Execution failed with error: {error}")
-                else:
-                    logger.info("Execution completed successfully")
 
-            except subprocess.TimeoutExpired:
-                output = ""
-                error = "Time Limit Exceeded (10 seconds)"
-                logger.warning("Code execution timed out")
+        logger.info(f"Running code in {language}")
 
-            return Response({
-                "output": output,
-                "error": error,
-                "status": "success" if not error else "error"
-            })
+        run_id = runs.reserve(request.user.id)
+        if run_id is None:
+            return Response(
+                {"error": f"At most {settings.JUDGE_RUN_MAX_PER_USER} runs at a time"},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
 
+        try:
+            execute_run.delay(run_id, request.user.id, language, code, custom_input)
         except Exception as e:
             logger.error(f"Error in RunCodeView: {str(e)}")
+            runs.finish(run_id, request.user.id, {"status": "error", "output": "", "error": str(e)})
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        finally:
-            try:
-                subprocess.run(f'rm -rf "{temp_dir}"', shell=True, timeout=5)
-                logger.info(f"Cleaned up temp directory: {temp_dir}")
-            except Exception as e:
-                logger.warning(f"Failed to clean up temp directory: {str(e)}")
+
+        return Response(
+            {"run_id": run_id, "status": "PENDING"},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class RunResultView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, run_id):
+        result = runs.get_result(run_id, request.user.id)
+        if result is None:
+            return Response(
+                {"error": "Run not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({
+            "run_id": run_id,
+            "status": result["status"],
+            "output": result.get("output", ""),
+            "error": result.get("error", ""),
+        })
 
 
 class SubmissionStatusView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, submission_id):
-        print(f"Checking status for submission {submission_id}")
+        logger.info(f"Checking status for submission {submission_id}")
         
         try:
             submission = Submission.objects.get(id=submission_id, user=request.user)
@@ -218,6 +216,183 @@ class SubmissionStatusView(APIView):
             )
 
 
+class VerdictStatusView(APIView):
+    """
+    Verdict and progress only, for polling one submission or up to
+    ``MAX_IDS`` of them at once (``?ids=1,2,3``). Supports If-None-Match.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_IDS = 100
+
+    def get(self, request, submission_id=None):
+        if submission_id is not None:
+            ids = [submission_id]
+        else:
+            try:
+                ids = [int(i) for i in request.query_params.get("ids", "").split(",") if i]
+            except ValueError:
+                return Response(
+                    {"error": "ids must be a comma separated list of submission ids"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not ids or len(ids) > self.MAX_IDS:
+                return Response(
+                    {"error": f"Pass between 1 and {self.MAX_IDS} submission ids"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        statuses = submission_status.get_many(ids, request.user)
+        if submission_id is not None:
+            if not statuses:
+                return Response(
+                    {"error": "Submission not found or you don't have permission"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            data = statuses[submission_id]
+        else:
+            data = {"statuses": [statuses[i] for i in ids if i in statuses]}
+
+        etag = '"%s"' % hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return Response(data, headers={"ETag": etag})
+
+
+class SubmissionEventsView(View):
+    """
+    Server-sent events for one of the user's submissions.
+
+    EventSource can't send headers, so the access token may also come as
+    ``?token=``. The stream starts with the submission's current state and
+    ends after the verdict, or after ``SUBMISSION_EVENTS_TIMEOUT``.
+    """
+
+    async def get(self, request, submission_id):
+        if not settings.SUBMISSION_EVENTS_URL:
+            return JsonResponse({"error": "Live updates are disabled"}, status=503)
+
+        user = await self.authenticate(request)
+        if user is None:
+            return JsonResponse({"error": "Authentication required"}, status=401)
+        if not await Submission.objects.filter(id=submission_id, user=user).aexists():
+            return JsonResponse(
+                {"error": "Submission not found or you don't have permission"},
+                status=404
+            )
+
+        response = StreamingHttpResponse(
+            self.stream(submission_id), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def authenticate(self, request):
+        raw = request.GET.get("token")
+        header = request.headers.get("Authorization", "")
+        if raw is None and header.startswith("Bearer "):
+            raw = header[len("Bearer "):]
+        if not raw:
+            return None
+        auth = JWTAuthentication()
+        try:
+            token = auth.get_validated_token(raw)
+            return await sync_to_async(auth.get_user)(token)
+        except (InvalidToken, AuthenticationFailed):
+            return None
+
+    async def stream(self, submission_id):
+        client = aioredis.Redis.from_url(settings.SUBMISSION_EVENTS_URL)
+        pubsub = client.pubsub()
+        try:
+            # Subscribe before reading the current state so nothing published
+            # in between is lost.
+            await pubsub.subscribe(events.channel(submission_id))
+            submission = await Submission.objects.aget(id=submission_id)
+            if submission.verdict != "PENDING":
+                yield f"data: {json.dumps(events.verdict_event(submission))}\n\n"
+                return
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.SUBMISSION_EVENTS_TIMEOUT
+            while loop.time() < deadline:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=15)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                data = message["data"].decode()
+                yield f"data: {data}\n\n"
+                if json.loads(data)["type"] == "verdict":
+                    return
+        except aioredis.RedisError as e:
+            logger.warning(f"Event stream for submission {submission_id} failed: {e}")
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class SubmissionFeedbackView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, submission_id):
+        try:
+            submission = Submission.objects.select_related('problem').get(
+                id=submission_id, user=request.user
+            )
+        except Submission.DoesNotExist:
+            return Response(
+                {"error": "Submission not found or you don't have permission"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if submission.verdict == "PENDING":
+            return Response(
+                {"error": "Submission has not been judged yet"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        if not submission.feedback:
+            feedback = cached_feedback(submission)
+            if feedback is None:
+                generate_feedback.delay(submission.id)
+                return Response({"feedback": None}, status=status.HTTP_202_ACCEPTED)
+            Submission.objects.filter(id=submission.id).update(feedback=feedback)
+            submission.feedback = feedback
+
+        return Response({"feedback": submission.feedback})
+
+
+class SubmissionTestResultsView(APIView):
+    """Per-case verdicts, times and memory of the author's own submission."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, submission_id):
+        submissions = Submission.objects.all()
+        if not request.user.is_staff:
+            submissions = submissions.filter(user=request.user)
+        try:
+            submission = submissions.only('id', 'verdict', 'cached_from').get(id=submission_id)
+        except Submission.DoesNotExist:
+            return Response(
+                {"error": "Submission not found or you don't have permission"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # A memoized verdict shares the results of the run it was copied
+        # from, until the submission has been judged itself.
+        results = SubmissionTestResult.objects.filter(submission_id=submission.id)
+        if submission.cached_from_id and not results.exists():
+            results = SubmissionTestResult.objects.filter(submission_id=submission.cached_from_id)
+        serializer_class = (
+            StaffSubmissionTestResultSerializer if request.user.is_staff
+            else SubmissionTestResultSerializer
+        )
+        return Response({
+            "verdict": submission.verdict,
+            "results": serializer_class(results, many=True).data,
+        })
+
+
 class SubmissionListView(ListAPIView):
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
@@ -238,44 +413,74 @@ class SubmissionListView(ListAPIView):
 
 
 class LeaderboardView(APIView):
+    """
+    One page of the global ranking (``?page=``, ``?page_size=``), plus the
+    caller's own standing under ``me`` when signed in.
+    """
     permission_classes = [AllowAny]
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    @staticmethod
+    def entry(rank, stats):
+        avg_time = stats.avg_time
+        return {
+            "rank": rank,
+            "username": stats.user.username,
+            "total_ac": stats.solved_count,
+            "total_points": stats.points,
+            "avg_time": round(avg_time, 3) if avg_time is not None else None,
+        }
 
     def get(self, request):
-        logger.info("Generating leaderboard data")
-        
         try:
-            users = User.objects.annotate(
-                total_ac=Count(
-                    'submissions',
-                    filter=Q(submissions__verdict='AC'),
-                    distinct=True
-                ),
-                total_points=Sum(
-                    Case(
-                        When(submissions__verdict='AC', submissions__problem__difficulty='Easy', then=100),
-                        When(submissions__verdict='AC', submissions__problem__difficulty='Medium', then=200),
-                        When(submissions__verdict='AC', submissions__problem__difficulty='Hard', then=300),
-                        default=0,
-                        output_field=IntegerField()
-                    )
-                ),
-                avg_time=Avg('submissions__time_taken', filter=Q(submissions__verdict='AC'))
-            ).order_by('-total_points', '-total_ac', 'avg_time')
-
-            data = [
-                {
-                    "username": user.username,
-                    "total_ac": user.total_ac or 0,
-                    "total_points": user.total_points or 0,
-                    "avg_time": round(user.avg_time or 0, 3) if user.avg_time else 0
-                }
-                for user in users
-            ]
-
-            return Response(data)
+            page = max(1, int(request.query_params.get("page", 1)))
+            page_size = min(self.MAX_PAGE_SIZE, max(1, int(request.query_params.get("page_size", self.PAGE_SIZE))))
+        except ValueError:
+            return Response({"error": "page and page_size must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        total, rows = leaderboard.page((page - 1) * page_size, page_size)
+        data = {
+            "count": total,
+            "page": page,
+            "page_size": page_size,
+            "results": [self.entry(rank, stats) for rank, stats in rows],
+        }
+        if request.user.is_authenticated:
+            stats = UserStats.objects.select_related("user").filter(user=request.user).first()
+            data["me"] = self.entry(leaderboard.rank(request.user.id), stats) if stats else None
+        return Response(data)
+
+
+class JudgeQueueStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            stats = queue_stats()
         except Exception as e:
-            logger.error(f"Error generating leaderboard: {str(e)}")
+            logger.error(f"Could not read queue depths: {str(e)}")
             return Response(
-                {"error": "Could not generate leaderboard"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+                {"error": "Broker unavailable"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        pending = Submission.objects.filter(verdict="PENDING").count()
+        return Response({"queues": stats, "pending_submissions": pending})
+
+
+class JudgeMetricsView(APIView):
+    """Judge stage histograms and queue gauges for Prometheus to scrape."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        token = settings.JUDGE_METRICS_TOKEN
+        scraper = bool(token) and hmac.compare_digest(request.query_params.get("token", ""), token)
+        if not (scraper or request.user.is_staff):
+            return Response({"error": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        body = metrics.render()
+        try:
+            body += metrics.render_queues(queue_stats())
+        except Exception as e:
+            # Still serve the stage histograms while the broker is down.
+            logger.error(f"Could not read queue depths: {str(e)}")
+        return HttpResponse(body, content_type="text/plain; version=0.0.4")